@@ -0,0 +1,141 @@
+import asyncio
+import logging
+from collections.abc import Callable
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from app.cache import RoomListingCache, room_listing_cache
+from app.config import get_settings
+from app.interval_index import RoomIntervalIndex, booking_index, to_local_naive
+from app.locks import RoomLockManager, room_locks
+from app.metrics import metrics_registry
+from app.models import Booking, BookingArchive
+from app.schemas import FINNISH_TZ
+
+logger = logging.getLogger("booking_system")
+
+# Columns copied from bookings to bookings_archive
+_ARCHIVED_COLUMNS = (
+    Booking.id,
+    Booking.room_id,
+    Booking.start_time,
+    Booking.end_time,
+    Booking.user_name,
+    Booking.created_at,
+    Booking.series_id,
+)
+
+bookings_archived = metrics_registry.counter(
+    "bookings_archived_total", "Bookings moved from bookings to bookings_archive"
+).labels()
+
+
+class BookingArchiver:
+    """Moves bookings that ended before the horizon into bookings_archive.
+
+    Each chunk of up to batch_size bookings is deleted with DELETE ...
+    RETURNING and inserted into the archive in the same transaction, so a
+    booking is always in exactly one of the tables. The chunk's room locks
+    are held while it moves, like any other write to those rooms, so writers
+    are only held up for one chunk at a time. Archived bookings leave the interval index
+    and their rooms' cached listings are invalidated; in multi-worker mode
+    the delete triggers tell the other workers.
+    """
+
+    def __init__(
+        self,
+        horizon: timedelta,
+        batch_size: int,
+        index: RoomIntervalIndex = booking_index,
+        listing_cache: RoomListingCache = room_listing_cache,
+        locks: RoomLockManager = room_locks,
+    ):
+        self.horizon = horizon
+        self.batch_size = batch_size
+        self.index = index
+        self.listing_cache = listing_cache
+        self.locks = locks
+
+    def cutoff(self, now: datetime | None = None) -> datetime:
+        """Bookings ending at or before this (naive Finnish) time are archived."""
+        return to_local_naive(now or datetime.now(FINNISH_TZ)) - self.horizon
+
+    def archive(self, db: Session, now: datetime | None = None) -> int:
+        """Archive every booking past the horizon, one chunk per transaction. Returns the count."""
+        cutoff = self.cutoff(now)
+        total = 0
+        while True:
+            moved = self.archive_chunk(db, cutoff)
+            total += moved
+            if moved < self.batch_size:
+                break
+        if total:
+            logger.info("Archived %d bookings that ended before %s", total, cutoff)
+        return total
+
+    def archive_chunk(self, db: Session, cutoff: datetime) -> int:
+        """Move up to batch_size bookings ending at or before cutoff in one transaction.
+
+        The chunk is picked in a read transaction that ends before the room
+        locks are taken, so, as in the request path, no connection is held
+        while waiting for a lock.
+        """
+        try:
+            chunk = db.execute(
+                select(Booking.id, Booking.room_id).where(Booking.end_time <= cutoff).limit(self.batch_size)
+            ).all()
+        finally:
+            db.rollback()
+        if not chunk:
+            return 0
+
+        with self.locks.lock(*{row.room_id for row in chunk}):
+            try:
+                rows = db.execute(
+                    # Bookings canceled since the chunk was picked are simply not returned
+                    delete(Booking).where(Booking.id.in_([row.id for row in chunk])).returning(*_ARCHIVED_COLUMNS)
+                ).all()
+                if rows:
+                    db.execute(insert(BookingArchive), [row._asdict() for row in rows])
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+
+            for row in rows:
+                self.index.remove(row.room_id, row.id, row.start_time)
+        for room_id in {row.room_id for row in rows}:
+            self.listing_cache.invalidate(room_id)
+        bookings_archived.inc(len(rows))
+        return len(rows)
+
+    async def archive_with(self, session_factory: Callable[[], Session]) -> int:
+        """Archive in a thread with a session of its own.
+
+        Sync sessions are used in async mode as well, since blocking on the
+        room locks would stall the event loop.
+        """
+        db = session_factory()
+
+        def run() -> int:
+            try:
+                return self.archive(db)
+            finally:
+                db.close()
+
+        return await asyncio.to_thread(run)
+
+    async def run(self, session_factory: Callable[[], Session], interval: float) -> None:
+        """Archive now and then every `interval` seconds until cancelled."""
+        while True:
+            try:
+                await self.archive_with(session_factory)
+            except Exception as e:
+                logger.error("Archiving bookings failed: %s", e)
+            await asyncio.sleep(interval)
+
+
+_settings = get_settings()
+booking_archiver = BookingArchiver(timedelta(days=_settings.archive_after_days), _settings.archive_batch_size)
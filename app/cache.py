@@ -0,0 +1,93 @@
+import secrets
+import threading
+import zlib
+from collections import OrderedDict
+from collections.abc import Hashable
+from dataclasses import dataclass
+
+from fastapi import Response
+
+from app.config import get_settings
+
+# Distinguishes ETags of this process from those handed out before a restart,
+# when the per-room versions start again from zero.
+_PROCESS_TOKEN = secrets.token_hex(4)
+
+
+@dataclass(frozen=True)
+class ListingLookup:
+    """Result of looking up a room listing in the cache."""
+
+    etag: str
+    version: int
+    response: Response | None  # 304 or cached 200, None on a miss
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+
+class RoomListingCache:
+    """Bounded LRU cache of serialized room listings with version-based ETags.
+
+    Every room has a version that BookingService bumps after each committed
+    change to the room. A cached body and an ETag are only valid for the
+    version they were produced at, so a conditional request can be answered
+    with 304 without touching the database.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._versions: dict[str, int] = {}
+        self._entries: OrderedDict[tuple[str, Hashable], tuple[int, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def etag(self, room_id: str, params: Hashable, version: int) -> str:
+        digest = zlib.crc32(repr((room_id, params)).encode())
+        return f'"{_PROCESS_TOKEN}-{version}-{digest:08x}"'
+
+    def lookup(self, room_id: str, params: Hashable, if_none_match: str | None = None) -> ListingLookup:
+        """Answer a listing request from the cache if possible."""
+        with self._lock:
+            version = self._versions.get(room_id, 0)
+            etag = self.etag(room_id, params, version)
+            if _etag_matches(if_none_match, etag):
+                return ListingLookup(etag, version, Response(status_code=304, headers={"ETag": etag}))
+
+            entry = self._entries.get((room_id, params))
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end((room_id, params))
+                response = Response(content=entry[1], media_type="application/json", headers={"ETag": etag})
+                return ListingLookup(etag, version, response)
+        return ListingLookup(etag, version, None)
+
+    def store(self, room_id: str, params: Hashable, lookup: ListingLookup, body: bytes) -> Response:
+        """Cache a freshly built body and return it as a response.
+
+        The body is only cached if the room has not changed since the lookup;
+        otherwise it may already be stale.
+        """
+        with self._lock:
+            if self.max_entries > 0 and self._versions.get(room_id, 0) == lookup.version:
+                self._entries[(room_id, params)] = (lookup.version, body)
+                self._entries.move_to_end((room_id, params))
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return Response(content=body, media_type="application/json", headers={"ETag": lookup.etag})
+
+    def invalidate(self, room_id: str) -> None:
+        """Mark every cached listing and ETag of a room as stale."""
+        with self._lock:
+            self._versions[room_id] = self._versions.get(room_id, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._versions.clear()
+            self._entries.clear()
+
+
+room_listing_cache = RoomListingCache(get_settings().room_listing_cache_size)
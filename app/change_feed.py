@@ -0,0 +1,204 @@
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime
+from collections.abc import Callable
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.orm import Session
+
+from app.cache import RoomListingCache, room_listing_cache
+from app.config import get_settings
+from app.events import RoomEventBroker, room_events
+from app.interval_index import RoomIntervalIndex, booking_index, to_local_naive
+from app.models import BookingChange
+from app.schemas import FINNISH_TZ, BookingEvent
+
+logger = logging.getLogger("booking_system")
+
+_CHANGE_COLUMNS = "op, booking_id, room_id, start_time, end_time, user_name, changed_at"
+_NOW = "CAST(strftime('%s', 'now') AS INTEGER)"
+
+CHANGE_TRIGGERS = {
+    "bookings_change_insert": f"""
+        CREATE TRIGGER IF NOT EXISTS bookings_change_insert AFTER INSERT ON bookings BEGIN
+            INSERT INTO booking_changes ({_CHANGE_COLUMNS})
+            VALUES ('I', NEW.id, NEW.room_id, NEW.start_time, NEW.end_time, NEW.user_name, {_NOW});
+        END""",
+    "bookings_change_delete": f"""
+        CREATE TRIGGER IF NOT EXISTS bookings_change_delete AFTER DELETE ON bookings BEGIN
+            INSERT INTO booking_changes ({_CHANGE_COLUMNS})
+            VALUES ('D', OLD.id, OLD.room_id, OLD.start_time, OLD.end_time, OLD.user_name, {_NOW});
+        END""",
+    "bookings_change_update": f"""
+        CREATE TRIGGER IF NOT EXISTS bookings_change_update
+        AFTER UPDATE OF room_id, start_time, end_time ON bookings BEGIN
+            INSERT INTO booking_changes ({_CHANGE_COLUMNS})
+            VALUES ('D', OLD.id, OLD.room_id, OLD.start_time, OLD.end_time, OLD.user_name, {_NOW});
+            INSERT INTO booking_changes ({_CHANGE_COLUMNS})
+            VALUES ('I', NEW.id, NEW.room_id, NEW.start_time, NEW.end_time, NEW.user_name, {_NOW});
+        END""",
+}
+
+
+def configure_change_triggers(db: Session, enabled: bool) -> None:
+    """Create the triggers feeding booking_changes, or drop them when disabled.
+
+    Dropping them keeps a database that once ran with several workers from
+    growing an unread change table.
+    """
+    if db.get_bind().dialect.name != "sqlite":
+        if enabled:
+            raise RuntimeError("The multi-worker change feed is only implemented for SQLite")
+        return
+    for name, ddl in CHANGE_TRIGGERS.items():
+        db.execute(text(ddl if enabled else f"DROP TRIGGER IF EXISTS {name}"))
+
+
+class ChangeFeed:
+    """Keeps this worker's index and listing cache in step with other workers.
+
+    Every insert and delete on bookings appends a row to booking_changes (see
+    CHANGE_TRIGGERS). sync() applies the rows after the last one seen: the
+    booking is added to or removed from the interval index and the room's
+    cached listings are invalidated. Applying a change this worker made
+    itself is harmless. If rows were pruned before this worker read them, it
+    reloads the index and drops its whole cache.
+
+    While the feed is enabled it is also the source of the booking events
+    pushed to subscribers, so they see the bookings of every worker. Changes
+    to bookings that have already ended (such as archiving) are not pushed.
+
+    BookingService syncs while it holds the cross-process room locks, so the
+    conflict check always sees every committed booking; reads are brought up
+    to date by a background poller.
+    """
+
+    def __init__(
+        self,
+        index: RoomIntervalIndex,
+        listing_cache: RoomListingCache,
+        retention_seconds: int,
+        events: RoomEventBroker = room_events,
+    ):
+        self.index = index
+        self.listing_cache = listing_cache
+        self.events = events
+        self.retention_seconds = retention_seconds
+        self.enabled = False
+        self._last_seq = 0
+        self._lock = threading.Lock()
+
+    def start(self, db: Session) -> None:
+        """Start following the feed from its current end.
+
+        Call before loading the index, so that changes committed during the
+        load are applied again rather than missed.
+        """
+        with self._lock:
+            self._last_seq = db.scalar(select(func.max(BookingChange.seq))) or 0
+            self.enabled = True
+
+    def stop(self) -> None:
+        with self._lock:
+            self.enabled = False
+
+    def sync(self, db: Session) -> int:
+        """Apply the changes committed since the last sync. Returns their number.
+
+        The lock is only held while applying rows, never during database
+        I/O: on the async path this runs on the event loop thread, and a
+        second sync blocking there on the lock would stall the loop that the
+        first one's query is waiting on.
+        """
+        if not self.enabled:
+            return 0
+        rows = db.execute(
+            select(
+                BookingChange.seq,
+                BookingChange.op,
+                BookingChange.booking_id,
+                BookingChange.room_id,
+                BookingChange.start_time,
+                BookingChange.end_time,
+                BookingChange.user_name,
+            )
+            .where(BookingChange.seq > self._last_seq)
+            .order_by(BookingChange.seq)
+        ).all()
+
+        with self._lock:
+            # Another sync may have applied some of the rows in the meantime
+            rows = [row for row in rows if row.seq > self._last_seq]
+            if not rows:
+                return 0
+            # Sequence numbers are consecutive (AUTOINCREMENT, one writer at a
+            # time), so a gap means rows were pruned before this worker read them
+            gap = rows[0].seq > self._last_seq + 1
+            if not gap:
+                now = to_local_naive(datetime.now(FINNISH_TZ))
+                for row in rows:
+                    if self.index.loaded:
+                        if row.op == "I":
+                            self.index.add(row.room_id, row.start_time, row.end_time, row.booking_id)
+                        else:
+                            self.index.remove(row.room_id, row.booking_id, row.start_time)
+                    self.listing_cache.invalidate(row.room_id)
+                    if row.end_time > now and self.events.has_subscribers(row.room_id):
+                        self._publish(row)
+            self._last_seq = reload_from = rows[-1].seq
+
+        if gap:
+            logger.warning("Change feed fell behind retention; reloading the booking index")
+            if self.index.loaded:
+                self.index.load(db)
+            self.listing_cache.clear()
+            self.events.resync_all()
+            with self._lock:
+                # Changes applied by other syncs during the reload may have
+                # been overwritten by it; applying them again is harmless
+                self._last_seq = min(self._last_seq, reload_from)
+        return len(rows)
+
+    def _publish(self, row) -> None:
+        event = BookingEvent(
+            id=row.booking_id,
+            room_id=row.room_id,
+            start_time=row.start_time,
+            end_time=row.end_time,
+            user_name=row.user_name,
+        )
+        self.events.publish(row.room_id, "created" if row.op == "I" else "canceled", event.model_dump_json().encode())
+
+    def prune(self, db: Session) -> int:
+        """Delete change rows older than the retention period."""
+        cutoff = int(time.time()) - self.retention_seconds
+        return db.execute(delete(BookingChange).where(BookingChange.changed_at < cutoff)).rowcount
+
+    def poll(self, session_factory: Callable[[], Session], prune: bool = False) -> None:
+        """Sync (and optionally prune) with a session of its own."""
+        db = session_factory()
+        try:
+            self.sync(db)
+            if prune:
+                self.prune(db)
+            db.commit()
+        finally:
+            db.close()
+
+    async def run_poller(self, session_factory: Callable[[], Session], interval: float) -> None:
+        """Poll the feed every `interval` seconds until cancelled; prune about once a minute."""
+        last_prune = 0.0
+        while True:
+            await asyncio.sleep(interval)
+            prune = time.monotonic() - last_prune >= 60
+            try:
+                await asyncio.to_thread(self.poll, session_factory, prune)
+                if prune:
+                    last_prune = time.monotonic()
+            except Exception as e:
+                logger.error("Change feed poll failed: %s", e)
+
+
+change_feed = ChangeFeed(booking_index, room_listing_cache, get_settings().change_retention_seconds)
@@ -0,0 +1,180 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+
+from sqlalchemy.engine import make_url
+
+
+def _env_str(name: str, default: str) -> str:
+    return os.environ.get(name, default)
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    if value is None or not value.strip():
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"Environment variable {name} must be an integer, got {value!r}")
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def is_memory_database(url: str) -> bool:
+    """Return True if the URL points to an in-memory SQLite database."""
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Application settings read from environment variables."""
+
+    database_url: str = "sqlite:///:memory:"
+    db_echo: bool = False
+
+    # Serve requests with async def routes on an AsyncEngine instead of the
+    # threadpool-backed sync routes
+    async_db: bool = False
+
+    # How booking start/end times are stored: "datetime" (ISO strings in
+    # SQLite) or "epoch" (integer UTC epoch seconds)
+    booking_time_storage: str = "datetime"
+
+    # Connection pools (ignored for the in-memory database)
+    db_pool_size: int = 4
+    db_read_pool_size: int = 8
+    db_max_overflow: int = 4
+    db_pool_timeout: int = 30
+
+    # SQLite PRAGMAs applied to every file-backed connection
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_cache_size: int = -64000  # negative: KiB, i.e. 64 MiB
+    sqlite_mmap_size: int = 268435456  # 256 MiB
+    sqlite_busy_timeout: int = 5000  # milliseconds
+    # Start write transactions with BEGIN IMMEDIATE so the conflict check and
+    # insert hold SQLite's write lock across processes
+    sqlite_begin_immediate: bool = False
+
+    # Per-room write locks: stripe count and an optional directory of lock
+    # files for excluding other processes
+    room_lock_stripes: int = 64
+    room_lock_dir: str = ""
+
+    # Several worker processes share one database file. Each worker follows
+    # the booking_changes table to keep its in-memory index and caches
+    # current: before every write, and otherwise every poll interval.
+    multi_worker: bool = False
+    change_poll_interval_ms: int = 500
+    change_retention_seconds: int = 3600
+
+    # Snapshots of the in-memory database: file restored at startup and
+    # rewritten every snapshot_interval_seconds (disabled when no path is set)
+    snapshot_path: str = ""
+    snapshot_interval_seconds: int = 60
+
+    # Bookings that ended more than archive_after_days ago are moved to
+    # bookings_archive every archive_interval_seconds (0: never, the default),
+    # in transactions of archive_batch_size bookings
+    archive_after_days: int = 30
+    archive_interval_seconds: int = 0
+    archive_batch_size: int = 1000
+
+    # Server-sent booking events: events queued per subscriber before it is
+    # dropped as too slow, and the keep-alive interval of idle streams
+    event_queue_size: int = 100
+    event_heartbeat_seconds: int = 15
+
+    # Serialized room listings kept for ETag/304 responses
+    room_listing_cache_size: int = 1024
+
+    # Idempotency-Key responses: lifetime in seconds and how many are kept
+    # in memory (all are persisted until they expire)
+    idempotency_key_ttl: int = 86400
+    idempotency_cache_size: int = 10000
+
+    # Logging: records go through a bounded queue to a writer thread. Each
+    # message type is limited to log_rate_limit records per second (0: no
+    # limit), and only every log_sample_every-th INFO/DEBUG record is kept.
+    log_level: str = "INFO"
+    log_format: str = "json"
+    log_queue_size: int = 10000
+    log_rate_limit: int = 50
+    log_sample_every: int = 1
+
+    def __post_init__(self):
+        if self.booking_time_storage not in ("datetime", "epoch"):
+            raise ValueError(
+                f"BOOKING_TIME_STORAGE must be 'datetime' or 'epoch', got {self.booking_time_storage!r}"
+            )
+        if self.async_db and is_memory_database(self.database_url):
+            # aiosqlite would interleave every coroutine's transaction on the
+            # database's single connection
+            raise ValueError("ASYNC_DB requires a file-backed DATABASE_URL")
+        if self.multi_worker:
+            if is_memory_database(self.database_url):
+                raise ValueError("MULTI_WORKER requires a file-backed DATABASE_URL shared by the workers")
+            if not self.room_lock_dir:
+                raise ValueError("MULTI_WORKER requires ROOM_LOCK_DIR for cross-process room locks")
+        if self.snapshot_path and not is_memory_database(self.database_url):
+            raise ValueError("SNAPSHOT_PATH is only used with the in-memory database")
+        if self.archive_after_days < 0:
+            raise ValueError("ARCHIVE_AFTER_DAYS cannot be negative")
+        if self.archive_batch_size < 1:
+            raise ValueError("ARCHIVE_BATCH_SIZE must be at least 1")
+        if self.event_queue_size < 1:
+            raise ValueError("EVENT_QUEUE_SIZE must be at least 1")
+        if self.log_format not in ("json", "text"):
+            raise ValueError(f"LOG_FORMAT must be 'json' or 'text', got {self.log_format!r}")
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            database_url=_env_str("DATABASE_URL", cls.database_url),
+            db_echo=_env_bool("DB_ECHO", cls.db_echo),
+            async_db=_env_bool("ASYNC_DB", cls.async_db),
+            booking_time_storage=_env_str("BOOKING_TIME_STORAGE", cls.booking_time_storage).lower(),
+            db_pool_size=_env_int("DB_POOL_SIZE", cls.db_pool_size),
+            db_read_pool_size=_env_int("DB_READ_POOL_SIZE", cls.db_read_pool_size),
+            db_max_overflow=_env_int("DB_MAX_OVERFLOW", cls.db_max_overflow),
+            db_pool_timeout=_env_int("DB_POOL_TIMEOUT", cls.db_pool_timeout),
+            sqlite_journal_mode=_env_str("SQLITE_JOURNAL_MODE", cls.sqlite_journal_mode),
+            sqlite_synchronous=_env_str("SQLITE_SYNCHRONOUS", cls.sqlite_synchronous),
+            sqlite_cache_size=_env_int("SQLITE_CACHE_SIZE", cls.sqlite_cache_size),
+            sqlite_mmap_size=_env_int("SQLITE_MMAP_SIZE", cls.sqlite_mmap_size),
+            sqlite_busy_timeout=_env_int("SQLITE_BUSY_TIMEOUT", cls.sqlite_busy_timeout),
+            sqlite_begin_immediate=_env_bool("SQLITE_BEGIN_IMMEDIATE", cls.sqlite_begin_immediate),
+            room_lock_stripes=_env_int("ROOM_LOCK_STRIPES", cls.room_lock_stripes),
+            room_lock_dir=_env_str("ROOM_LOCK_DIR", cls.room_lock_dir),
+            multi_worker=_env_bool("MULTI_WORKER", cls.multi_worker),
+            change_poll_interval_ms=_env_int("CHANGE_POLL_INTERVAL_MS", cls.change_poll_interval_ms),
+            change_retention_seconds=_env_int("CHANGE_RETENTION_SECONDS", cls.change_retention_seconds),
+            snapshot_path=_env_str("SNAPSHOT_PATH", cls.snapshot_path),
+            snapshot_interval_seconds=_env_int("SNAPSHOT_INTERVAL_SECONDS", cls.snapshot_interval_seconds),
+            archive_after_days=_env_int("ARCHIVE_AFTER_DAYS", cls.archive_after_days),
+            archive_interval_seconds=_env_int("ARCHIVE_INTERVAL_SECONDS", cls.archive_interval_seconds),
+            archive_batch_size=_env_int("ARCHIVE_BATCH_SIZE", cls.archive_batch_size),
+            event_queue_size=_env_int("EVENT_QUEUE_SIZE", cls.event_queue_size),
+            event_heartbeat_seconds=_env_int("EVENT_HEARTBEAT_SECONDS", cls.event_heartbeat_seconds),
+            room_listing_cache_size=_env_int("ROOM_LISTING_CACHE_SIZE", cls.room_listing_cache_size),
+            idempotency_key_ttl=_env_int("IDEMPOTENCY_KEY_TTL", cls.idempotency_key_ttl),
+            idempotency_cache_size=_env_int("IDEMPOTENCY_CACHE_SIZE", cls.idempotency_cache_size),
+            log_level=_env_str("LOG_LEVEL", cls.log_level),
+            log_format=_env_str("LOG_FORMAT", cls.log_format).lower(),
+            log_queue_size=_env_int("LOG_QUEUE_SIZE", cls.log_queue_size),
+            log_rate_limit=_env_int("LOG_RATE_LIMIT", cls.log_rate_limit),
+            log_sample_every=_env_int("LOG_SAMPLE_EVERY", cls.log_sample_every),
+        )
+
+
+@lru_cache
+def get_settings() -> Settings:
+    """Return the process-wide settings, read from the environment once."""
+    return Settings.from_env()
@@ -1,17 +1,172 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import QueuePool
 
-DATABASE_URL = "sqlite:///:memory:"
+from app.config import Settings, get_settings, is_memory_database
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    echo=False,
-    poolclass=StaticPool,
-)
+SQLITE_JOURNAL_MODES = {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+SQLITE_SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+
+def _sqlite_pragmas(settings: Settings, read_only: bool) -> list[str]:
+    journal_mode = settings.sqlite_journal_mode.upper()
+    synchronous = settings.sqlite_synchronous.upper()
+    if journal_mode not in SQLITE_JOURNAL_MODES:
+        raise ValueError(f"Unsupported SQLITE_JOURNAL_MODE: {settings.sqlite_journal_mode}")
+    if synchronous not in SQLITE_SYNCHRONOUS_MODES:
+        raise ValueError(f"Unsupported SQLITE_SYNCHRONOUS: {settings.sqlite_synchronous}")
+
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(settings.sqlite_busy_timeout)}",
+        f"PRAGMA synchronous = {synchronous}",
+        f"PRAGMA cache_size = {int(settings.sqlite_cache_size)}",
+        f"PRAGMA mmap_size = {int(settings.sqlite_mmap_size)}",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only = ON")
+    else:
+        # The journal mode is persistent, so only the writer needs to set it
+        pragmas.insert(0, f"PRAGMA journal_mode = {journal_mode}")
+    return pragmas
+
+
+def to_async_url(url: str) -> str:
+    """Return the async-driver equivalent of a database URL (aiosqlite for SQLite)."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.get_driver_name() != "aiosqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    return parsed.render_as_string(hide_password=False)
+
+
+def _install_pragmas(engine: Engine, settings: Settings, read_only: bool) -> None:
+    pragmas = _sqlite_pragmas(settings, read_only)
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def _install_begin_immediate(engine: Engine) -> None:
+    # pysqlite/aiosqlite defer BEGIN until the first write; take over
+    # transaction control so the whole read-check-insert runs under the
+    # database write lock.
+    @event.listens_for(engine, "connect")
+    def _disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin_immediate(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def create_db_engine(settings: Settings, read_only: bool = False) -> Engine:
+    """Create an engine for the configured database.
+
+    The in-memory SQLite database lives in a single connection, held in a
+    pool of one: a session has the connection to itself from checkout until
+    its transaction ends, and others wait (up to DB_POOL_TIMEOUT) instead of
+    sharing its transaction, where one session's commit or rollback would end
+    another's. File-backed SQLite gets a real connection pool with the
+    configured PRAGMAs applied to every new connection; read-only engines
+    additionally set query_only so they can never take the write lock.
+    """
+    url = settings.database_url
+
+    if is_memory_database(url):
+        return create_engine(
+            url,
+            connect_args={"check_same_thread": False},
+            echo=settings.db_echo,
+            poolclass=QueuePool,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=settings.db_pool_timeout,
+        )
+
+    pool_size = settings.db_read_pool_size if read_only else settings.db_pool_size
+    backend = make_url(url).get_backend_name()
+    connect_args = {"check_same_thread": False} if backend == "sqlite" else {}
+
+    engine = create_engine(
+        url,
+        connect_args=connect_args,
+        echo=settings.db_echo,
+        pool_size=pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_pre_ping=backend != "sqlite",
+    )
+
+    if backend == "sqlite":
+        _install_pragmas(engine, settings, read_only)
+        if settings.sqlite_begin_immediate and not read_only:
+            _install_begin_immediate(engine)
+
+    return engine
+
+
+def create_async_db_engine(settings: Settings, read_only: bool = False) -> AsyncEngine:
+    """Create an AsyncEngine for the configured database (aiosqlite for SQLite).
+
+    Pooling and PRAGMAs follow create_db_engine. The in-memory database is
+    not supported (see Settings): its single connection cannot be shared by
+    concurrent coroutines without their transactions interleaving.
+    """
+    url = to_async_url(settings.database_url)
+
+    pool_size = settings.db_read_pool_size if read_only else settings.db_pool_size
+    backend = make_url(url).get_backend_name()
+
+    engine = create_async_engine(
+        url,
+        echo=settings.db_echo,
+        pool_size=pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_pre_ping=backend != "sqlite",
+    )
+
+    if backend == "sqlite":
+        _install_pragmas(engine.sync_engine, settings, read_only)
+        if settings.sqlite_begin_immediate and not read_only:
+            _install_begin_immediate(engine.sync_engine)
+
+    return engine
+
+
+settings = get_settings()
+
+engine = create_db_engine(settings)
+
+# Readers get their own pool so they never queue behind writers. The
+# in-memory database only has one connection, so it is shared.
+if is_memory_database(settings.database_url):
+    read_engine = engine
+else:
+    read_engine = create_db_engine(settings, read_only=True)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# The async engines are only created in async mode, so the aiosqlite driver
+# is not needed otherwise.
+async_engine: AsyncEngine | None = None
+async_read_engine: AsyncEngine | None = None
+AsyncSessionLocal: async_sessionmaker[AsyncSession] | None = None
+AsyncReadSessionLocal: async_sessionmaker[AsyncSession] | None = None
+
+if settings.async_db:
+    async_engine = create_async_db_engine(settings)
+    async_read_engine = create_async_db_engine(settings, read_only=True)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
@@ -25,6 +180,48 @@ def get_db():
         db.close()
 
 
+def get_read_db():
+    """Dependency that provides a session for read-only requests."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    """Dependency that provides an async database session."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db():
+    """Dependency that provides an async session for read-only requests."""
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+
 def init_db():
     """Initialize database tables."""
     Base.metadata.create_all(bind=engine)
+
+
+async def init_async_db():
+    """Initialize database tables through the async engine."""
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def dispose_engines():
+    """Close every pooled connection at shutdown.
+
+    aiosqlite runs each connection on a non-daemon thread, so an async-mode
+    process cannot exit until its async engines are disposed.
+    """
+    if async_engine is not None:
+        await async_engine.dispose()
+        if async_read_engine is not async_engine:
+            await async_read_engine.dispose()
+    engine.dispose()
+    if read_engine is not engine:
+        read_engine.dispose()
@@ -0,0 +1,166 @@
+import asyncio
+import threading
+from collections.abc import AsyncIterator, Iterable
+from dataclasses import dataclass
+
+from app.config import get_settings
+from app.metrics import metrics_registry
+
+# Tells a subscriber that it may have missed events and should re-fetch the
+# listing; a subscriber dropped for being too slow gets it as its last event
+RESYNC = "resync"
+
+# Reconnection delay suggested to EventSource clients (milliseconds)
+RETRY_MS = 3000
+
+subscribers_dropped = metrics_registry.counter(
+    "booking_event_subscribers_dropped_total", "Event subscribers disconnected for falling behind"
+).labels()
+
+
+@dataclass(frozen=True)
+class RoomEvent:
+    event: str  # "created", "canceled" or RESYNC
+    data: bytes  # JSON, serialized once for all subscribers
+
+    def encode(self) -> bytes:
+        """Format the event as a server-sent event."""
+        return b"event: " + self.event.encode() + b"\ndata: " + self.data + b"\n\n"
+
+
+_RESYNC_EVENT = RoomEvent(RESYNC, b"{}")
+
+
+class Subscription:
+    """One subscriber's bounded queue of events, read on its event loop."""
+
+    def __init__(self, room_id: str, loop: asyncio.AbstractEventLoop, queue_size: int):
+        self.room_id = room_id
+        self.loop = loop
+        self.queue: asyncio.Queue[RoomEvent] = asyncio.Queue(queue_size)
+        self.closed = False
+
+    def offer(self, event: RoomEvent) -> bool:
+        """Queue an event. Returns False if the queue is full."""
+        if self.closed:
+            return True
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    def close_with_resync(self) -> None:
+        """Replace the backlog with a final resync event and stop accepting events."""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(_RESYNC_EVENT)
+        self.closed = True
+
+
+class RoomEventBroker:
+    """In-process pub/sub of booking events per room.
+
+    Publishing is cheap when a room has no subscribers, and may happen on
+    any thread: events are handed to each subscriber's event loop. Every
+    subscriber has a bounded queue; one whose queue is full is dropped
+    instead of buffering without limit or slowing down the publisher. Its
+    backlog is replaced by a resync event, after which its stream ends and
+    the client reconnects and re-fetches the listing.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._rooms: dict[str, set[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, room_id: str) -> Subscription:
+        """Subscribe to a room's events; must be called on the subscriber's event loop."""
+        subscription = Subscription(room_id, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._rooms.setdefault(room_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            room = self._rooms.get(subscription.room_id)
+            if room is not None:
+                room.discard(subscription)
+                if not room:
+                    del self._rooms[subscription.room_id]
+
+    def has_subscribers(self, room_id: str) -> bool:
+        return room_id in self._rooms
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(room) for room in self._rooms.values())
+
+    def publish(self, room_id: str, event: str, data: bytes) -> None:
+        """Send an event to every subscriber of a room."""
+        with self._lock:
+            subscriptions = tuple(self._rooms.get(room_id, ()))
+        if subscriptions:
+            self._dispatch(subscriptions, RoomEvent(event, data))
+
+    def resync_all(self) -> None:
+        """Tell every subscriber to re-fetch, e.g. after missing changes of other workers."""
+        with self._lock:
+            subscriptions = tuple(s for room in self._rooms.values() for s in room)
+        self._dispatch(subscriptions, _RESYNC_EVENT)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rooms.clear()
+
+    def _dispatch(self, subscriptions: Iterable[Subscription], event: RoomEvent) -> None:
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+        by_loop: dict[asyncio.AbstractEventLoop, list[Subscription]] = {}
+        for subscription in subscriptions:
+            by_loop.setdefault(subscription.loop, []).append(subscription)
+        for loop, group in by_loop.items():
+            if loop is current:
+                self._fan_out(group, event)
+                continue
+            try:
+                loop.call_soon_threadsafe(self._fan_out, group, event)
+            except RuntimeError:
+                # The subscriber's event loop is gone
+                for subscription in group:
+                    self.unsubscribe(subscription)
+
+    def _fan_out(self, subscriptions: list[Subscription], event: RoomEvent) -> None:
+        for subscription in subscriptions:
+            if not subscription.offer(event):
+                self.unsubscribe(subscription)
+                subscription.close_with_resync()
+                subscribers_dropped.inc()
+
+
+async def event_stream(broker: RoomEventBroker, room_id: str, heartbeat: float) -> AsyncIterator[bytes]:
+    """Server-sent event stream of a room, with a comment line every `heartbeat` seconds."""
+    subscription = broker.subscribe(room_id)
+    try:
+        # Sent once subscribed, so a client knows no later change is missed
+        yield f"retry: {RETRY_MS}\n\n".encode()
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+            except TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+            yield event.encode()
+            if subscription.closed and subscription.queue.empty():
+                return
+    finally:
+        broker.unsubscribe(subscription)
+
+
+room_events = RoomEventBroker(get_settings().event_queue_size)
+
+metrics_registry.gauge_callback(
+    "booking_event_subscribers", "Open booking event streams", (), lambda: [((), room_events.subscriber_count())]
+)
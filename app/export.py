@@ -0,0 +1,70 @@
+import csv
+import io
+import json
+from collections.abc import AsyncIterator, Iterable, Iterator, Sequence
+from datetime import datetime
+from typing import Literal
+
+from sqlalchemy import Row, Select, select
+
+from app.models import Booking
+
+ExportFormat = Literal["ndjson", "csv"]
+
+EXPORT_COLUMNS = ("id", "room_id", "start_time", "end_time", "user_name", "created_at")
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Rows fetched from the database cursor per chunk
+EXPORT_CHUNK_SIZE = 1000
+
+
+def export_statement(room_id: str | None = None) -> Select:
+    """Select the exported booking columns, optionally for one room."""
+    stmt = select(*(getattr(Booking, column) for column in EXPORT_COLUMNS))
+    if room_id is not None:
+        stmt = stmt.where(Booking.room_id == room_id)
+    return stmt.order_by(Booking.room_id, Booking.start_time, Booking.id)
+
+
+def _format_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _encode_ndjson(rows: Sequence[Row]) -> str:
+    return "".join(
+        json.dumps(dict(zip(EXPORT_COLUMNS, map(_format_value, row))), ensure_ascii=False) + "\n"
+        for row in rows
+    )
+
+
+def _encode_csv(rows: Sequence[Row], header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    writer.writerows(map(_format_value, row) for row in rows)
+    return buffer.getvalue()
+
+
+def encode_chunks(partitions: Iterable[Sequence[Row]], fmt: ExportFormat) -> Iterator[str]:
+    """Encode row partitions as NDJSON or CSV text, one chunk per partition."""
+    if fmt == "csv":
+        yield _encode_csv([], header=True)
+        for rows in partitions:
+            yield _encode_csv(rows)
+    else:
+        for rows in partitions:
+            yield _encode_ndjson(rows)
+
+
+async def encode_chunks_async(
+    partitions: AsyncIterator[Sequence[Row]], fmt: ExportFormat
+) -> AsyncIterator[str]:
+    """Async variant of encode_chunks for the async request path."""
+    if fmt == "csv":
+        yield _encode_csv([], header=True)
+        async for rows in partitions:
+            yield _encode_csv(rows)
+    else:
+        async for rows in partitions:
+            yield _encode_ndjson(rows)
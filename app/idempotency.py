@@ -0,0 +1,236 @@
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from fastapi import Response
+from pydantic import BaseModel
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.exceptions import BookingConflictError, BookingValidationError
+from app.models import IdempotencyKey
+
+logger = logging.getLogger("booking_system")
+
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+
+# Expired rows are deleted at most this often (seconds)
+PURGE_INTERVAL = 60
+
+# status_code of a key claimed by a request that has not completed yet
+PENDING_STATUS = 0
+
+# A claim whose request never completes (e.g. the worker died) blocks
+# retries with its key for this long (seconds)
+CLAIM_SECONDS = 60
+
+# How often a retry waiting for an in-flight request checks it (seconds)
+CLAIM_POLL_INTERVAL = 0.05
+
+# Returned by try_claim when another request holds the key
+IN_FLIGHT = object()
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    request_hash: str
+    status_code: int
+    body: bytes
+    expires_at: int  # UTC epoch seconds
+
+
+def request_fingerprint(payload: BaseModel) -> str:
+    """Hash of the validated request, so equivalent payloads share a fingerprint."""
+    return hashlib.sha256(payload.model_dump_json().encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """Responses of recent requests made with an Idempotency-Key.
+
+    A request claims its key before doing anything, by inserting a pending
+    row into idempotency_keys; the primary key makes the claim atomic across
+    threads and worker processes. A retry arriving while the first request
+    is in flight waits for it and replays its response. On success the row
+    is filled in with the response; on failure the claim is released so the
+    request can be retried.
+
+    Completed responses are also kept in a bounded in-memory LRU, so a
+    retried request is normally answered without a database round trip.
+    Keys expire after the TTL; expired rows are purged opportunistically
+    when new keys are stored.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, StoredResponse] = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+
+    def cached(self, key: str, request_hash: str) -> Response | None:
+        """Replay a response from memory, or return None if the key is not cached."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return self._replay(entry, request_hash)
+
+    def try_claim(self, db: Session, key: str, request_hash: str) -> Response | object | None:
+        """Claim a key for a new request.
+
+        Returns None if the caller now holds the key, the replayed response
+        if the key has completed, or IN_FLIGHT if another request holds it.
+        """
+        response = self.cached(key, request_hash)
+        if response is not None:
+            return response
+
+        now = int(time.time())
+        try:
+            db.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key, IdempotencyKey.expires_at <= now))
+            db.execute(insert(IdempotencyKey).values(
+                key=key,
+                request_hash=request_hash,
+                status_code=PENDING_STATUS,
+                response_body="",
+                expires_at=now + CLAIM_SECONDS,
+            ))
+            db.commit()
+            return None
+        except IntegrityError:
+            db.rollback()
+
+        # Plain columns rather than an ORM object, which a session polling
+        # the key would keep serving from its identity map
+        row = db.execute(
+            select(
+                IdempotencyKey.request_hash,
+                IdempotencyKey.status_code,
+                IdempotencyKey.response_body,
+                IdempotencyKey.expires_at,
+            ).where(IdempotencyKey.key == key)
+        ).one_or_none()
+        if row is None or row.expires_at <= now:
+            # Released or expired in the meantime; the next attempt claims it
+            return IN_FLIGHT
+        entry = StoredResponse(row.request_hash, row.status_code, row.response_body.encode(), row.expires_at)
+        if entry.status_code == PENDING_STATUS:
+            if entry.request_hash != request_hash:
+                raise BookingValidationError("Idempotency-Key was already used with a different request")
+            return IN_FLIGHT
+        self._remember(key, entry)
+        return self._replay(entry, request_hash)
+
+    def claim(self, db: Session, key: str, request_hash: str) -> Response | None:
+        """Claim a key, waiting while another request holds it.
+
+        Returns None once the caller holds the key, or the response to replay.
+        """
+        deadline = time.monotonic() + CLAIM_SECONDS
+        while True:
+            outcome = self.try_claim(db, key, request_hash)
+            if outcome is not IN_FLIGHT:
+                return outcome
+            self._check_deadline(deadline)
+            time.sleep(CLAIM_POLL_INTERVAL)
+
+    async def claim_async(self, db: AsyncSession, key: str, request_hash: str) -> Response | None:
+        """Claim a key like claim(), waiting without blocking the event loop."""
+        deadline = time.monotonic() + CLAIM_SECONDS
+        while True:
+            outcome = await db.run_sync(self.try_claim, key, request_hash)
+            if outcome is not IN_FLIGHT:
+                return outcome
+            self._check_deadline(deadline)
+            await asyncio.sleep(CLAIM_POLL_INTERVAL)
+
+    def release(self, db: Session, key: str) -> None:
+        """Give up the claim of a request that failed, so it can be retried."""
+        try:
+            db.rollback()
+            db.execute(
+                delete(IdempotencyKey).where(
+                    IdempotencyKey.key == key, IdempotencyKey.status_code == PENDING_STATUS
+                )
+            )
+            db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.warning("Could not release idempotency key %s: %s", key, e)
+
+    def store(self, db: Session, key: str, request_hash: str, status_code: int, body: bytes) -> Response:
+        """Record the response of a completed request in its claimed key and return it.
+
+        A failure to persist the key is logged but does not fail the request;
+        the operation itself has already been committed.
+        """
+        entry = StoredResponse(request_hash, status_code, body, int(time.time()) + self.ttl_seconds)
+        try:
+            self._purge_expired(db)
+            db.merge(IdempotencyKey(
+                key=key,
+                request_hash=request_hash,
+                status_code=status_code,
+                response_body=body.decode(),
+                expires_at=entry.expires_at,
+            ))
+            db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.warning("Could not persist idempotency key %s: %s", key, e)
+        self._remember(key, entry)
+        return Response(content=body, status_code=status_code, media_type="application/json")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._last_purge = 0.0
+
+    def _remember(self, key: str, entry: StoredResponse) -> None:
+        with self._lock:
+            if self.max_entries <= 0:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _purge_expired(self, db: Session) -> None:
+        now = time.time()
+        with self._lock:
+            if now - self._last_purge < PURGE_INTERVAL:
+                return
+            self._last_purge = now
+        db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= int(now)))
+
+    @staticmethod
+    def _check_deadline(deadline: float) -> None:
+        if time.monotonic() >= deadline:
+            raise BookingConflictError("A request with this Idempotency-Key is still in progress")
+
+    @staticmethod
+    def _replay(entry: StoredResponse, request_hash: str) -> Response:
+        if entry.request_hash != request_hash:
+            raise BookingValidationError("Idempotency-Key was already used with a different request")
+        return Response(
+            content=entry.body,
+            status_code=entry.status_code,
+            media_type="application/json",
+            headers={"Idempotent-Replayed": "true"},
+        )
+
+
+_settings = get_settings()
+idempotency_store = IdempotencyStore(_settings.idempotency_key_ttl, _settings.idempotency_cache_size)
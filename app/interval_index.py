@@ -0,0 +1,211 @@
+import threading
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from app.models import Booking
+from app.schemas import FINNISH_TZ, MIN_BOOKING_DURATION
+
+# (start_time, end_time, booking_id), times as naive Finnish wall time
+Interval = tuple[datetime, datetime, str]
+
+# Granularity of the occupancy bitmaps: no booking is shorter than a slot,
+# so at most three bookings can touch one slot and a counter byte suffices
+SLOT = MIN_BOOKING_DURATION
+_SLOT_EPOCH = datetime(2000, 1, 1)
+
+
+def to_local_naive(dt: datetime) -> datetime:
+    """Convert a datetime to naive Finnish wall time, the form stored in the database."""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(FINNISH_TZ).replace(tzinfo=None)
+    return dt
+
+
+def _slot_floor(dt: datetime) -> int:
+    return (dt - _SLOT_EPOCH) // SLOT
+
+
+def _slot_ceil(dt: datetime) -> int:
+    return -((_SLOT_EPOCH - dt) // SLOT)
+
+
+def _default_origin() -> int:
+    # Bookings cannot be created in the past, so the bitmaps start at the
+    # beginning of yesterday and cover everything a create can touch
+    today = to_local_naive(datetime.now(FINNISH_TZ)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return _slot_floor(today - timedelta(days=1))
+
+
+class _RoomIntervals:
+    """Bookings of a single room kept sorted by start time.
+
+    An occupancy bitmap counts, per slot from `origin` on, the bookings that
+    touch the slot. A range whose slots are all zero is free without looking
+    at the intervals; otherwise the sorted intervals give the exact answer
+    (a non-zero slot may only be touched at its edges).
+    """
+
+    __slots__ = ("starts", "intervals", "origin", "occupancy")
+
+    def __init__(self, origin: int):
+        self.starts: list[datetime] = []
+        self.intervals: list[Interval] = []
+        self.origin = origin
+        self.occupancy = bytearray()
+
+    def _is_free(self, start: datetime, end: datetime) -> bool:
+        first = _slot_floor(start) - self.origin
+        if first < 0:
+            return False  # before the bitmap; let the intervals decide
+        return not any(self.occupancy[first:_slot_ceil(end) - self.origin])
+
+    def _mark(self, start: datetime, end: datetime, delta: int) -> None:
+        first = max(_slot_floor(start) - self.origin, 0)
+        last = _slot_ceil(end) - self.origin
+        if last <= first:
+            return
+        if last > len(self.occupancy):
+            self.occupancy.extend(bytes(last - len(self.occupancy)))
+        for i in range(first, last):
+            self.occupancy[i] += delta
+
+    def find_conflict(self, start: datetime, end: datetime) -> Interval | None:
+        if self._is_free(start, end):
+            return None
+        # Bookings in a room never overlap, so sorting by start also sorts by
+        # end: the last booking starting before `end` is the only candidate.
+        i = bisect_left(self.starts, end)
+        if i and self.intervals[i - 1][1] > start:
+            return self.intervals[i - 1]
+        return None
+
+    def overlapping(self, start: datetime, end: datetime) -> list[Interval]:
+        if self._is_free(start, end):
+            return []
+        # Back up one slot: the booking starting before `start` may extend into the window
+        lo = max(bisect_left(self.starts, start) - 1, 0)
+        hi = bisect_left(self.starts, end)
+        return [iv for iv in self.intervals[lo:hi] if iv[1] > start]
+
+    def insert(self, interval: Interval) -> None:
+        i = bisect_left(self.starts, interval[0])
+        self.starts.insert(i, interval[0])
+        self.intervals.insert(i, interval)
+        self._mark(interval[0], interval[1], 1)
+
+    def contains(self, booking_id: str, start: datetime) -> bool:
+        i = bisect_left(self.starts, start)
+        while i < len(self.starts) and self.starts[i] == start:
+            if self.intervals[i][2] == booking_id:
+                return True
+            i += 1
+        return False
+
+    def remove(self, booking_id: str, start: datetime) -> bool:
+        i = bisect_left(self.starts, start)
+        while i < len(self.starts) and self.starts[i] == start:
+            if self.intervals[i][2] == booking_id:
+                self._mark(start, self.intervals[i][1], -1)
+                del self.starts[i]
+                del self.intervals[i]
+                return True
+            i += 1
+        return False
+
+
+class RoomIntervalIndex:
+    """In-memory per-room interval index mirroring the bookings table.
+
+    The database stays the source of truth: the index is loaded from it at
+    startup and updated by BookingService on create and cancel. Until it has
+    been loaded, conflict checks fall back to querying the database.
+    """
+
+    def __init__(self):
+        self._rooms: dict[str, _RoomIntervals] = {}
+        self._lock = threading.Lock()
+        self._origin = _default_origin()
+        self.loaded = False
+
+    def load(self, db: Session) -> None:
+        """(Re)build the index from the bookings table."""
+        rooms: dict[str, _RoomIntervals] = {}
+        origin = _default_origin()
+        rows = (
+            db.query(Booking.room_id, Booking.start_time, Booking.end_time, Booking.id)
+            .order_by(Booking.room_id, Booking.start_time)
+            .all()
+        )
+        for room_id, start_time, end_time, booking_id in rows:
+            room = rooms.get(room_id)
+            if room is None:
+                room = rooms[room_id] = _RoomIntervals(origin)
+            start_time, end_time = to_local_naive(start_time), to_local_naive(end_time)
+            room.starts.append(start_time)
+            room.intervals.append((start_time, end_time, booking_id))
+            room._mark(start_time, end_time, 1)
+        with self._lock:
+            self._rooms = rooms
+            self._origin = origin
+            self.loaded = True
+
+    def clear(self) -> None:
+        """Drop all indexed bookings and mark the index as not loaded."""
+        with self._lock:
+            self._rooms = {}
+            self._origin = _default_origin()
+            self.loaded = False
+
+    def find_conflict(self, room_id: str, start: datetime, end: datetime) -> Interval | None:
+        """Return an indexed booking overlapping [start, end), if any."""
+        start, end = to_local_naive(start), to_local_naive(end)
+        with self._lock:
+            room = self._rooms.get(room_id)
+            return room.find_conflict(start, end) if room else None
+
+    def overlapping(self, room_id: str, start: datetime, end: datetime) -> list[Interval]:
+        """Return the indexed bookings overlapping [start, end) in start-time order."""
+        start, end = to_local_naive(start), to_local_naive(end)
+        with self._lock:
+            room = self._rooms.get(room_id)
+            return room.overlapping(start, end) if room else []
+
+    def reserve(self, room_id: str, start: datetime, end: datetime, booking_id: str) -> Interval | None:
+        """Atomically check for a conflict and, if there is none, index the booking.
+
+        Returns the conflicting interval when the slot is taken. A reservation
+        that is not committed to the database must be undone with remove().
+        """
+        start, end = to_local_naive(start), to_local_naive(end)
+        with self._lock:
+            room = self._rooms.get(room_id)
+            if room is None:
+                room = self._rooms[room_id] = _RoomIntervals(self._origin)
+            conflict = room.find_conflict(start, end)
+            if conflict is None:
+                room.insert((start, end, booking_id))
+            return conflict
+
+    def add(self, room_id: str, start: datetime, end: datetime, booking_id: str) -> None:
+        """Index a booking committed elsewhere, unless it is already indexed."""
+        start, end = to_local_naive(start), to_local_naive(end)
+        with self._lock:
+            room = self._rooms.get(room_id)
+            if room is None:
+                room = self._rooms[room_id] = _RoomIntervals(self._origin)
+            if not room.contains(booking_id, start):
+                room.insert((start, end, booking_id))
+
+    def remove(self, room_id: str, booking_id: str, start: datetime) -> bool:
+        """Remove a booking from the index. Returns False if it was not indexed."""
+        with self._lock:
+            room = self._rooms.get(room_id)
+            if room is None:
+                return False
+            return room.remove(booking_id, to_local_naive(start))
+
+
+# Process-wide index, loaded in the application lifespan
+booking_index = RoomIntervalIndex()
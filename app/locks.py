@@ -0,0 +1,129 @@
+import asyncio
+import os
+import threading
+import zlib
+from collections.abc import AsyncIterator, Iterable, Iterator
+from contextlib import ExitStack, asynccontextmanager, contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+from app.config import get_settings, is_memory_database
+
+
+class RoomLockManager:
+    """Striped per-room locks guarding the conflict check and insert.
+
+    Rooms are hashed onto a fixed number of stripes, so writes to different
+    rooms usually proceed in parallel while writes to the same room are
+    serialized. With a lock directory, each stripe is additionally guarded by
+    an flock()ed file so that several processes sharing one database file
+    exclude each other as well.
+    """
+
+    def __init__(self, stripes: int = 64, lock_dir: str | None = None):
+        if stripes < 1:
+            raise ValueError("stripes must be at least 1")
+        if lock_dir and fcntl is None:
+            raise RuntimeError("File-based room locks require fcntl (POSIX only)")
+        self.stripes = stripes
+        self.lock_dir = lock_dir or None
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+
+    def stripe(self, room_id: str) -> int:
+        """Return the stripe of a room. Stable across processes."""
+        return zlib.crc32(room_id.encode()) % self.stripes
+
+    def _stripes(self, room_ids: Iterable[str]) -> list[int]:
+        # Always acquire in ascending order so that multi-room callers cannot deadlock
+        return sorted({self.stripe(room_id) for room_id in room_ids})
+
+    @contextmanager
+    def _file_lock(self, stripe: int) -> Iterator[None]:
+        with self._flock(f"room-stripe-{stripe}.lock"):
+            yield
+
+    @contextmanager
+    def _flock(self, name: str) -> Iterator[None]:
+        path = os.path.join(self.lock_dir, name)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    @contextmanager
+    def _hold(self, stripe: int) -> Iterator[None]:
+        with self._locks[stripe]:
+            if self.lock_dir:
+                with self._file_lock(stripe):
+                    yield
+            else:
+                yield
+
+    @contextmanager
+    def lock(self, *room_ids: str) -> Iterator[None]:
+        """Hold the locks of the given rooms (blocking)."""
+        with ExitStack() as stack:
+            for stripe in self._stripes(room_ids):
+                stack.enter_context(self._hold(stripe))
+            yield
+
+    @contextmanager
+    def exclusive(self, name: str) -> Iterator[None]:
+        """Hold a named lock shared by all processes using the lock directory.
+
+        Without a lock directory there are no other processes to exclude, so
+        this does nothing.
+        """
+        if not self.lock_dir:
+            yield
+            return
+        with self._flock(f"{name}.lock"):
+            yield
+
+    @asynccontextmanager
+    async def async_lock(self, *room_ids: str) -> AsyncIterator[None]:
+        """Hold the locks of the given rooms without blocking the event loop.
+
+        Uncontended stripes are taken directly; a contended stripe (or a file
+        lock) is waited for on a worker thread.
+        """
+        with ExitStack() as stack:
+            for stripe in self._stripes(room_ids):
+                await self._acquire_async(self._locks[stripe])
+                stack.callback(self._locks[stripe].release)
+                if self.lock_dir:
+                    file_lock = self._file_lock(stripe)
+                    await asyncio.to_thread(file_lock.__enter__)
+                    stack.callback(file_lock.__exit__, None, None, None)
+            yield
+
+    @staticmethod
+    async def _acquire_async(lock: threading.Lock) -> None:
+        if lock.acquire(blocking=False):
+            return
+        acquired = asyncio.get_running_loop().run_in_executor(None, lock.acquire)
+        try:
+            await asyncio.shield(acquired)
+        except asyncio.CancelledError:
+            # The worker thread still gets the lock eventually; give it back
+            acquired.add_done_callback(lambda _: lock.release())
+            raise
+
+
+_settings = get_settings()
+# The in-memory database has a single connection, so writes to different
+# rooms cannot proceed in parallel anyway; one stripe makes that explicit
+room_locks = RoomLockManager(
+    1 if is_memory_database(_settings.database_url) else _settings.room_lock_stripes,
+    _settings.room_lock_dir,
+)
@@ -1,18 +1,153 @@
+import atexit
+import copy
+import json
 import logging
+import queue
 import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
 
+from app.config import Settings, get_settings
+from app.metrics import metrics_registry
 
-def setup_logging():
-    """Configure logging for the booking system."""
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.StreamHandler(sys.stdout)
-        ]
-    )
-    return logging.getLogger("booking_system")
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Distinct message types tracked by the throttle before its state is reset
+MAX_THROTTLE_KEYS = 10000
+
+log_records_dropped = metrics_registry.counter(
+    "log_records_dropped_total", "Log records not written, by reason", ("reason",)
+)
+_dropped_sampled = log_records_dropped.labels("sampled")
+_dropped_rate_limited = log_records_dropped.labels("rate_limited")
+_dropped_queue_full = log_records_dropped.labels("queue_full")
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats each record as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            entry["suppressed"] = suppressed
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class LogThrottle(logging.Filter):
+    """Samples and rate-limits records per message type.
+
+    The message type is the logger name plus the unformatted message
+    template, so "Booking created: id=%s ..." is one type however many
+    bookings are created. Records below WARNING keep only every Nth of their
+    type; every type is then limited by a token bucket of rate_limit records
+    per second. The next record of a type that gets through carries the
+    number of records suppressed since the previous one.
+    """
+
+    def __init__(self, rate_limit: int = 0, sample_every: int = 1):
+        super().__init__()
+        self.rate_limit = rate_limit
+        self.sample_every = max(sample_every, 1)
+        # (logger, template) -> [tokens, last refill, seen, suppressed]
+        self._state: dict[tuple[str, str], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.name, record.msg if isinstance(record.msg, str) else type(record.msg).__name__)
+        now = time.monotonic()
+        with self._lock:
+            state = self._state.get(key)
+            if state is None:
+                if len(self._state) >= MAX_THROTTLE_KEYS:
+                    self._state.clear()
+                state = self._state[key] = [float(self.rate_limit), now, 0, 0]
+            state[2] += 1
+
+            if self.sample_every > 1 and record.levelno < logging.WARNING and (state[2] - 1) % self.sample_every:
+                state[3] += 1
+                _dropped_sampled.inc()
+                return False
+
+            if self.rate_limit:
+                state[0] = min(float(self.rate_limit), state[0] + (now - state[1]) * self.rate_limit)
+                state[1] = now
+                if state[0] < 1:
+                    state[3] += 1
+                    _dropped_rate_limited.inc()
+                    return False
+                state[0] -= 1
+
+            if state[3]:
+                record.suppressed = state[3]
+                state[3] = 0
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks and leaves message formatting to the listener.
+
+    Records are dropped (and counted) when the queue is full. Only the
+    traceback is rendered in the calling thread, since it refers to live
+    frames; %-style arguments are merged on the listener thread.
+    """
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _dropped_queue_full.inc()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Other handlers on the logger may still see the original record
+        record = copy.copy(record)
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging(settings: Settings | None = None) -> tuple[logging.Logger, QueueListener | None]:
+    """Configure logging for the booking system.
+
+    The root logger gets a non-blocking queue handler; a listener thread
+    writes the records to stdout. Like logging.basicConfig, this does nothing
+    if the root logger already has handlers.
+    """
+    settings = settings or get_settings()
+    logger = logging.getLogger("booking_system")
+    root = logging.getLogger()
+    if root.handlers:
+        return logger, None
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if settings.log_format == "json":
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    queue_handler = NonBlockingQueueHandler(queue.Queue(settings.log_queue_size))
+    queue_handler.addFilter(LogThrottle(settings.log_rate_limit, settings.log_sample_every))
+
+    listener = QueueListener(queue_handler.queue, stream_handler)
+    listener.start()
+    atexit.register(listener.stop)
+
+    root.addHandler(queue_handler)
+    root.setLevel(settings.log_level.upper())
+    return logger, listener
 
 
 # Initialize logger
-logger = setup_logging()
+logger, log_listener = setup_logging()
@@ -1,22 +1,82 @@
+import asyncio
 from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.exceptions import RequestValidationError
 from sqlalchemy.exc import IntegrityError, OperationalError, DatabaseError, DataError
-
-from app.database import init_db
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app import database
+from app.database import AsyncSessionLocal, SessionLocal, dispose_engines, init_db, init_async_db
+from app.archive import booking_archiver
+from app.change_feed import change_feed, configure_change_triggers
+from app.interval_index import booking_index
+from app.locks import room_locks
 from app.routes import router
+from app.async_routes import router as async_router
 from app.exceptions import BookingNotFoundError, BookingConflictError, BookingValidationError
 from app.logging_config import logger
+from app.metrics import CONTENT_TYPE, MetricsMiddleware, booking_errors, metrics_registry, pool_collector
 from app.schemas import FINNISH_TZ
+from app.snapshot import Snapshotter
+
+
+settings = get_settings()
+
+# Snapshots of the in-memory database (which is never used in async mode)
+snapshotter = Snapshotter(database.engine, settings.snapshot_path) if settings.snapshot_path else None
+
+
+def prepare_caches(db: Session) -> None:
+    """Set up the change feed (multi-worker mode) and load the interval index."""
+    configure_change_triggers(db, settings.multi_worker)
+    if settings.multi_worker:
+        change_feed.start(db)
+    booking_index.load(db)
+    db.commit()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    init_db()
+    # Workers starting together must not race on creating the schema
+    with room_locks.exclusive("init"):
+        if snapshotter is not None:
+            await snapshotter.restore()
+        if settings.async_db:
+            await init_async_db()
+            async with AsyncSessionLocal() as db:
+                await db.run_sync(prepare_caches)
+        else:
+            init_db()
+            db = SessionLocal()
+            try:
+                prepare_caches(db)
+            finally:
+                db.close()
+
+    tasks = []
+    if settings.multi_worker:
+        tasks.append(asyncio.create_task(
+            change_feed.run_poller(SessionLocal, settings.change_poll_interval_ms / 1000)
+        ))
+    if settings.archive_interval_seconds > 0:
+        tasks.append(asyncio.create_task(booking_archiver.run(
+            SessionLocal, settings.archive_interval_seconds
+        )))
+    if snapshotter is not None:
+        tasks.append(asyncio.create_task(snapshotter.run(settings.snapshot_interval_seconds)))
     yield
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    change_feed.stop()
+    if snapshotter is not None:
+        # Keep the writes made since the last periodic snapshot
+        await snapshotter.snapshot()
+    await dispose_engines()
 
 
 app = FastAPI(
@@ -25,10 +85,29 @@ app = FastAPI(
     version="1.0.0",
     lifespan=lifespan,
 )
+app.add_middleware(MetricsMiddleware)
+
+
+def _pool_engines() -> dict:
+    # The in-memory database shares one engine between readers and writers
+    engines = {"write": database.engine}
+    if database.read_engine is not database.engine:
+        engines["read"] = database.read_engine
+    if database.async_engine is not None:
+        engines["async_write"] = database.async_engine
+        if database.async_read_engine is not database.async_engine:
+            engines["async_read"] = database.async_read_engine
+    return engines
+
+
+metrics_registry.gauge_callback(
+    "db_pool_connections", "Database pool connections by state", ("pool", "state"), pool_collector(_pool_engines())
+)
 
 
 @app.exception_handler(BookingNotFoundError)
 async def booking_not_found_handler(request: Request, exc: BookingNotFoundError):
+    booking_errors.labels("not_found").inc()
     return JSONResponse(
         status_code=404,
         content={"detail": exc.message},
@@ -37,6 +116,7 @@ async def booking_not_found_handler(request: Request, exc: BookingNotFoundError)
 
 @app.exception_handler(BookingConflictError)
 async def booking_conflict_handler(request: Request, exc: BookingConflictError):
+    booking_errors.labels("conflict").inc()
     return JSONResponse(
         status_code=409,
         content={"detail": exc.message},
@@ -45,6 +125,7 @@ async def booking_conflict_handler(request: Request, exc: BookingConflictError):
 
 @app.exception_handler(BookingValidationError)
 async def booking_validation_handler(request: Request, exc: BookingValidationError):
+    booking_errors.labels("validation").inc()
     return JSONResponse(
         status_code=400,
         content={"detail": exc.message},
@@ -54,7 +135,8 @@ async def booking_validation_handler(request: Request, exc: BookingValidationErr
 @app.exception_handler(IntegrityError)
 async def integrity_error_handler(request: Request, exc: IntegrityError):
     """Handle database integrity constraint violations."""
-    logger.warning(f"Database integrity error: {exc}")
+    booking_errors.labels("integrity").inc()
+    logger.warning("Database integrity error: %s", exc)
     return JSONResponse(
         status_code=409,
         content={"detail": "Database integrity constraint violated"},
@@ -64,7 +146,8 @@ async def integrity_error_handler(request: Request, exc: IntegrityError):
 @app.exception_handler(OperationalError)
 async def operational_error_handler(request: Request, exc: OperationalError):
     """Handle database connection and operational issues."""
-    logger.error(f"Database operational error: {exc}")
+    booking_errors.labels("database_unavailable").inc()
+    logger.error("Database operational error: %s", exc)
     return JSONResponse(
         status_code=503,
         content={"detail": "Database temporarily unavailable"},
@@ -74,7 +157,8 @@ async def operational_error_handler(request: Request, exc: OperationalError):
 @app.exception_handler(DataError)
 async def data_error_handler(request: Request, exc: DataError):
     """Handle invalid data for database operations."""
-    logger.warning(f"Database data error: {exc}")
+    booking_errors.labels("data").inc()
+    logger.warning("Database data error: %s", exc)
     return JSONResponse(
         status_code=400,
         content={"detail": "Invalid data format for database operation"},
@@ -84,7 +168,8 @@ async def data_error_handler(request: Request, exc: DataError):
 @app.exception_handler(DatabaseError)
 async def database_error_handler(request: Request, exc: DatabaseError):
     """Handle general database errors."""
-    logger.error(f"Database error: {exc}")
+    booking_errors.labels("database").inc()
+    logger.error("Database error: %s", exc)
     return JSONResponse(
         status_code=500,
         content={"detail": "Database error occurred"},
@@ -94,6 +179,7 @@ async def database_error_handler(request: Request, exc: DatabaseError):
 @app.exception_handler(RequestValidationError)
 async def validation_error_handler(request: Request, exc: RequestValidationError):
     """Handle Pydantic request validation errors with detailed messages."""
+    booking_errors.labels("request_validation").inc()
     errors = []
     for error in exc.errors():
         field = ".".join(str(loc) for loc in error["loc"][1:]) if len(error["loc"]) > 1 else str(error["loc"][0])
@@ -102,7 +188,7 @@ async def validation_error_handler(request: Request, exc: RequestValidationError
             "message": error["msg"],
             "type": error["type"]
         })
-    logger.warning(f"Request validation error: {errors}")
+    logger.warning("Request validation error: %s", errors)
     return JSONResponse(
         status_code=422,
         content={"detail": "Validation error", "errors": errors},
@@ -112,26 +198,44 @@ async def validation_error_handler(request: Request, exc: RequestValidationError
 @app.exception_handler(Exception)
 async def generic_error_handler(request: Request, exc: Exception):
     """Catch-all handler for unexpected errors."""
-    logger.exception(f"Unexpected error: {exc}")
+    booking_errors.labels("unexpected").inc()
+    logger.exception("Unexpected error: %s", exc)
     return JSONResponse(
         status_code=500,
         content={"detail": "An unexpected error occurred"},
     )
 
 
-app.include_router(router)
+app.include_router(async_router if settings.async_db else router)
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Metrics in the Prometheus text format."""
+    return Response(content=metrics_registry.render(), media_type=CONTENT_TYPE)
 
 
 @app.get("/health")
-def health_check():
+async def health_check():
     """Health check endpoint with database connectivity test."""
     from sqlalchemy import text
+    from starlette.concurrency import run_in_threadpool
     from app.database import get_db
 
+    def ping_database():
+        db = next(get_db())
+        try:
+            db.execute(text("SELECT 1"))
+        finally:
+            db.close()
+
     try:
         # Test database connection
-        db = next(get_db())
-        db.execute(text("SELECT 1"))
+        if settings.async_db:
+            async with AsyncSessionLocal() as db:
+                await db.execute(text("SELECT 1"))
+        else:
+            await run_in_threadpool(ping_database)
         return {
             "status": "healthy",
             "database": "connected",
@@ -139,7 +243,7 @@ def health_check():
             "timezone": "Europe/Helsinki"
         }
     except Exception as e:
-        logger.error(f"Health check failed: {e}")
+        logger.error("Health check failed: %s", e)
         return JSONResponse(
             status_code=503,
             content={
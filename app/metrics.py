@@ -0,0 +1,279 @@
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+
+# Default latency buckets in seconds (upper bounds, inclusive)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STAGE_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Sharded:
+    """Values kept in one shard per thread and summed when collected.
+
+    Each thread only ever writes its own shard, so updates need no lock; the
+    registry lock is taken once per thread when its shard is created.
+    """
+
+    def __init__(self, size: int):
+        self._size = size
+        self._local = threading.local()
+        self._shards: list[list] = []
+        self._lock = threading.Lock()
+
+    def _shard(self) -> list:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = [0] * self._size
+            with self._lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
+
+    def _totals(self) -> list:
+        with self._lock:
+            shards = list(self._shards)
+        return [sum(column) for column in zip(*shards)] if shards else [0] * self._size
+
+
+class Counter(_Sharded):
+    """Monotonically increasing counter."""
+
+    def __init__(self):
+        super().__init__(1)
+
+    def inc(self, amount: float = 1) -> None:
+        self._shard()[0] += amount
+
+    def value(self) -> float:
+        return self._totals()[0]
+
+
+class Histogram(_Sharded):
+    """Histogram with fixed buckets; observe() is a bisect and two additions."""
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        # One slot per bucket, one for +Inf and one for the sum
+        super().__init__(len(self.buckets) + 2)
+
+    def observe(self, value: float) -> None:
+        shard = self._shard()
+        shard[bisect_left(self.buckets, value)] += 1
+        shard[-1] += value
+
+    def time(self) -> "_Timer":
+        """Context manager observing the duration of its block."""
+        return _Timer(self)
+
+    def snapshot(self) -> tuple[list[int], int, float]:
+        """Return cumulative bucket counts, total count and sum."""
+        totals = self._totals()
+        cumulative = []
+        running = 0
+        for count in totals[:-1]:
+            running += count
+            cumulative.append(running)
+        return cumulative, running, totals[-1]
+
+
+class _Timer:
+    __slots__ = ("_histogram", "_started")
+
+    def __init__(self, histogram: Histogram):
+        self._histogram = histogram
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._histogram.observe(time.perf_counter() - self._started)
+
+
+class MetricFamily:
+    """A named metric with a fixed set of labels and one child per label combination."""
+
+    def __init__(self, name: str, documentation: str, kind: str, labelnames: tuple[str, ...], factory: Callable):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.labelnames = labelnames
+        self._factory = factory
+        self._children: dict[tuple[str, ...], Counter | Histogram] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        """Return the child for the given label values, creating it on first use."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._factory())
+        return child
+
+    def samples(self) -> Iterable[tuple[str, dict[str, str], float]]:
+        for values, child in list(self._children.items()):
+            labels = dict(zip(self.labelnames, values))
+            if isinstance(child, Histogram):
+                cumulative, count, total = child.snapshot()
+                bounds = [_format_value(bound) for bound in child.buckets] + ["+Inf"]
+                for bound, bucket_count in zip(bounds, cumulative):
+                    yield f"{self.name}_bucket", {**labels, "le": bound}, bucket_count
+                yield f"{self.name}_sum", labels, total
+                yield f"{self.name}_count", labels, count
+            else:
+                yield self.name, labels, child.value()
+
+
+class GaugeCallback:
+    """Gauge whose samples are read from a callback at collection time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...], collect: Callable):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._collect = collect
+
+    def samples(self) -> Iterable[tuple[str, dict[str, str], float]]:
+        for values, value in self._collect():
+            yield self.name, dict(zip(self.labelnames, values)), value
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: dict[str, MetricFamily | GaugeCallback] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> MetricFamily:
+        return self._register(MetricFamily(name, documentation, "counter", labelnames, Counter))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> MetricFamily:
+        buckets = tuple(buckets)
+        return self._register(
+            MetricFamily(name, documentation, "histogram", labelnames, lambda: Histogram(buckets))
+        )
+
+    def gauge_callback(
+        self, name: str, documentation: str, labelnames: tuple[str, ...], collect: Callable
+    ) -> GaugeCallback:
+        return self._register(GaugeCallback(name, documentation, labelnames, collect))
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                if labels:
+                    rendered = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+                    lines.append(f"{name}{{{rendered}}} {_format_value(value)}")
+                else:
+                    lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float) and not value.is_integer():
+        return repr(value)
+    return str(int(value))
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency and status per route template.
+
+    The route is read from the scope after routing, so /bookings/{booking_id}
+    is one series regardless of the id; unmatched paths share one label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            route = getattr(scope.get("route"), "path", "<unmatched>")
+            method = scope["method"]
+            request_duration.labels(method, route).observe(elapsed)
+            request_count.labels(method, route, str(status_code)).inc()
+
+
+def pool_collector(engines: dict[str, object]) -> Callable:
+    """Return a collect callback reporting checked-out and idle connections per pool.
+
+    Engines are given by name; pools that do not track occupancy (such as a
+    StaticPool) are skipped.
+    """
+
+    def collect():
+        for name, engine in engines.items():
+            pool = getattr(engine, "sync_engine", engine).pool
+            if not hasattr(pool, "checkedout"):
+                continue
+            yield (name, "checked_out"), pool.checkedout()
+            yield (name, "idle"), pool.checkedin()
+            yield (name, "overflow"), max(pool.overflow(), 0)
+
+    return collect
+
+
+metrics_registry = MetricsRegistry()
+
+request_duration = metrics_registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route")
+)
+request_count = metrics_registry.counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+)
+booking_stage_duration = metrics_registry.histogram(
+    "booking_create_stage_seconds",
+    "Time spent in each stage of creating a booking",
+    ("stage",),
+    buckets=STAGE_BUCKETS,
+)
+booking_errors = metrics_registry.counter(
+    "booking_errors_total", "Errors returned by the exception handlers", ("error",)
+)
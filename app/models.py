@@ -1,10 +1,62 @@
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 
-from sqlalchemy import Column, String, DateTime, Index, func
+from sqlalchemy import Column, Date, Integer, String, Text, DateTime, Index, func
 from sqlalchemy.orm import validates
+from sqlalchemy.types import TypeDecorator
 
+from app.config import get_settings
 from app.database import Base
+from app.schemas import FINNISH_TZ
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+@lru_cache(maxsize=4096)
+def _finnish_offset_seconds(utc_hour: int) -> int:
+    """UTC offset of Finnish time during the given hour since the epoch.
+
+    Finnish DST transitions happen on the hour in UTC, so the offset is
+    constant within each hour and can be cached per hour.
+    """
+    instant = datetime.fromtimestamp(utc_hour * 3600, timezone.utc)
+    return int(instant.astimezone(FINNISH_TZ).utcoffset().total_seconds())
+
+
+class EpochSeconds(TypeDecorator):
+    """Stores datetimes as integer UTC epoch seconds (sub-second parts are dropped).
+
+    Naive values are taken as Finnish wall time. Values are read back as naive
+    Finnish wall time, the same form the DateTime columns produce, so queries
+    compare integers while the rest of the application is unaffected.
+    """
+
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, int):
+            return value
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=FINNISH_TZ)
+        return int(value.timestamp())
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return _EPOCH + timedelta(seconds=value + _finnish_offset_seconds(value // 3600))
+
+
+# Column type of booking start and end times, chosen by BOOKING_TIME_STORAGE
+BookingTime = EpochSeconds if get_settings().booking_time_storage == "epoch" else DateTime
+
+
+def to_storage_precision(value: datetime) -> datetime:
+    """Drop the sub-second part of a booking time when epoch storage cannot keep it."""
+    return value.replace(microsecond=0) if BookingTime is EpochSeconds else value
 
 
 class Booking(Base):
@@ -12,20 +64,108 @@ class Booking(Base):
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     room_id = Column(String, nullable=False, index=True)
-    start_time = Column(DateTime, nullable=False)
-    end_time = Column(DateTime, nullable=False)
+    start_time = Column(BookingTime, nullable=False)
+    end_time = Column(BookingTime, nullable=False)
     user_name = Column(String, nullable=False)
     created_at = Column(DateTime, default=func.now())
+    # Shared by all occurrences of a recurring booking
+    series_id = Column(String, nullable=True, index=True)
 
     __table_args__ = (
         Index("ix_bookings_room_time", "room_id", "start_time", "end_time"),
+        Index("ix_bookings_user_time", "user_name", "start_time"),
     )
 
     @validates("start_time", "end_time")
     def validate_times(self, key, value):
         if isinstance(value, str):
-            return datetime.fromisoformat(value)
-        return value
+            value = datetime.fromisoformat(value)
+        # Keep the object (and the interval index) equal to what is stored
+        return to_storage_precision(value) if value is not None else value
 
     def __repr__(self):
         return f"<Booking(id={self.id}, room={self.room_id}, user={self.user_name})>"
+
+
+class BookingArchive(Base):
+    """Bookings that ended before the archive horizon, moved out of the hot table.
+
+    Same columns as Booking, so archived rows serialize as BookingResponse.
+    """
+
+    __tablename__ = "bookings_archive"
+
+    id = Column(String, primary_key=True)
+    room_id = Column(String, nullable=False)
+    start_time = Column(BookingTime, nullable=False)
+    end_time = Column(BookingTime, nullable=False)
+    user_name = Column(String, nullable=False)
+    created_at = Column(DateTime)
+    series_id = Column(String, nullable=True)
+    archived_at = Column(DateTime, default=func.now())
+
+    __table_args__ = (
+        Index("ix_bookings_archive_room_time", "room_id", "start_time", "end_time"),
+        Index("ix_bookings_archive_user_time", "user_name", "start_time"),
+    )
+
+    def __repr__(self):
+        return f"<BookingArchive(id={self.id}, room={self.room_id}, user={self.user_name})>"
+
+
+class RoomUtilization(Base):
+    """Booked time of a room per hour of Finnish wall time.
+
+    Kept up to date by BookingService in the same transaction as each
+    create and cancel, and recomputed by `python -m app.utilization`.
+    Archiving does not change the counters.
+    """
+
+    __tablename__ = "room_utilization"
+
+    room_id = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True)
+    hour = Column(Integer, primary_key=True)  # 0-23
+    booked_seconds = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_room_utilization_day", "day"),
+    )
+
+    def __repr__(self):
+        return f"<RoomUtilization(room={self.room_id}, day={self.day}, hour={self.hour})>"
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String, primary_key=True)
+    # SHA-256 of the request the key was first used with
+    request_hash = Column(String, nullable=False)
+    status_code = Column(Integer, nullable=False)
+    response_body = Column(Text, nullable=False)
+    expires_at = Column(Integer, nullable=False, index=True)  # UTC epoch seconds
+
+    def __repr__(self):
+        return f"<IdempotencyKey(key={self.key}, expires_at={self.expires_at})>"
+
+
+class BookingChange(Base):
+    """One row per inserted or deleted booking, written by triggers in multi-worker mode.
+
+    Workers read the rows after the last one they have seen to update their
+    in-memory index and caches with changes made by other processes.
+    """
+
+    __tablename__ = "booking_changes"
+
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    op = Column(String(1), nullable=False)  # "I" insert, "D" delete
+    booking_id = Column(String, nullable=False)
+    room_id = Column(String, nullable=False)
+    start_time = Column(BookingTime, nullable=False)
+    end_time = Column(BookingTime, nullable=False)
+    user_name = Column(String, nullable=True)
+    changed_at = Column(Integer, nullable=False, index=True)  # UTC epoch seconds
+
+    __table_args__ = {"sqlite_autoincrement": True}
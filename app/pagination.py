@@ -0,0 +1,24 @@
+import base64
+import binascii
+from datetime import datetime
+
+from app.exceptions import BookingValidationError
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(start_time: datetime, booking_id: str) -> str:
+    """Encode a (start_time, id) keyset position as an opaque cursor."""
+    raw = f"{start_time.isoformat()}|{booking_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    """Decode a cursor produced by encode_cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        start, booking_id = base64.urlsafe_b64decode(padded).decode().split("|", 1)
+        return datetime.fromisoformat(start), booking_id
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise BookingValidationError("Invalid pagination cursor")
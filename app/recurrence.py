@@ -0,0 +1,45 @@
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+
+from app.exceptions import BookingValidationError
+from app.schemas import FINNISH_TZ, MAX_BOOKING_HORIZON, MAX_SERIES_OCCURRENCES, RecurrenceRule
+
+
+def expand_occurrences(
+    start_time: datetime,
+    end_time: datetime,
+    rule: RecurrenceRule,
+    horizon: datetime | None = None,
+) -> Iterator[tuple[datetime, datetime]]:
+    """Lazily yield the (start, end) of each occurrence of a recurring booking.
+
+    Occurrences repeat at the same Finnish wall-clock time, so a weekly 9:00
+    meeting stays at 9:00 across daylight saving changes. Raises
+    BookingValidationError if the series would run past the booking horizon
+    (90 days from now unless given) or exceed MAX_SERIES_OCCURRENCES.
+    """
+    step = timedelta(days=rule.interval * (7 if rule.frequency == "weekly" else 1))
+    local_start = start_time.astimezone(FINNISH_TZ).replace(tzinfo=None)
+    duration = end_time - start_time
+    if horizon is None:
+        horizon = datetime.now(FINNISH_TZ) + MAX_BOOKING_HORIZON
+
+    n = 0
+    while True:
+        if rule.count is not None and n >= rule.count:
+            return
+        occurrence_local = local_start + n * step
+        if rule.until is not None and occurrence_local.date() > rule.until:
+            return
+        if n >= MAX_SERIES_OCCURRENCES:
+            raise BookingValidationError(
+                f"A recurring series cannot have more than {MAX_SERIES_OCCURRENCES} occurrences"
+            )
+
+        occurrence_start = occurrence_local.replace(tzinfo=FINNISH_TZ)
+        if occurrence_start > horizon:
+            raise BookingValidationError(
+                "Recurring series cannot extend more than 90 days into the future"
+            )
+        yield occurrence_start, occurrence_start + duration
+        n += 1
@@ -1,8 +1,32 @@
-from fastapi import APIRouter, Depends, status
+from datetime import date, datetime, timedelta
+
+from fastapi import APIRouter, Depends, Header, Query, status
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.database import get_db
-from app.schemas import BookingCreate, BookingResponse, BookingListResponse
+from app.cache import room_listing_cache
+from app.config import get_settings
+from app.database import get_db, get_read_db
+from app.idempotency import MAX_IDEMPOTENCY_KEY_LENGTH, idempotency_store, request_fingerprint
+from app.events import event_stream, room_events
+from app.export import EXPORT_MEDIA_TYPES, ExportFormat, encode_chunks
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.schemas import (
+    BookingBatchCreate,
+    BookingBatchResponse,
+    BookingBulkCancelResponse,
+    BookingCreate,
+    BookingListResponse,
+    BookingResponse,
+    BookingSeriesResponse,
+    FreeSlotSearchResponse,
+    MAX_BOOKING_DURATION,
+    MAX_FREE_SLOT_ROOMS,
+    MIN_BOOKING_DURATION,
+    RecurringBookingCreate,
+    UtilizationSummaryResponse,
+    encode_booking_list,
+)
 from app.services import BookingService
 
 router = APIRouter(prefix="/bookings", tags=["bookings"])
@@ -12,14 +36,80 @@ def get_booking_service(db: Session = Depends(get_db)) -> BookingService:
     return BookingService(db)
 
 
+def get_read_booking_service(db: Session = Depends(get_read_db)) -> BookingService:
+    return BookingService(db)
+
+
 @router.post("/", response_model=BookingResponse, status_code=status.HTTP_201_CREATED)
 def create_booking(
     booking_data: BookingCreate,
+    idempotency_key: str | None = Header(None, max_length=MAX_IDEMPOTENCY_KEY_LENGTH),
+    service: BookingService = Depends(get_booking_service),
+):
+    """Create a new room booking.
+
+    With an Idempotency-Key header, a retry of a successful request replays
+    the original 201 response instead of creating the booking again; a retry
+    arriving while the original is still in flight waits for it.
+    """
+    if not idempotency_key:
+        return service.create_booking(booking_data)
+
+    request_hash = request_fingerprint(booking_data)
+    replay = idempotency_store.claim(service.db, idempotency_key, request_hash)
+    if replay is not None:
+        return replay
+
+    try:
+        booking = service.create_booking(booking_data)
+    except Exception:
+        idempotency_store.release(service.db, idempotency_key)
+        raise
+    body = booking.model_dump_json().encode()
+    return idempotency_store.store(service.db, idempotency_key, request_hash, status.HTTP_201_CREATED, body)
+
+
+@router.post("/batch", response_model=BookingBatchResponse)
+def create_bookings_batch(
+    batch: BookingBatchCreate,
+    service: BookingService = Depends(get_booking_service),
+):
+    """Create many bookings in one transaction, with a result for each item."""
+    results = service.create_bookings_batch(batch.bookings)
+    created = sum(1 for result in results if result.status == "created")
+    return BookingBatchResponse(results=results, created=created, failed=len(results) - created)
+
+
+@router.post("/recurring", response_model=BookingSeriesResponse, status_code=status.HTTP_201_CREATED)
+def create_recurring_booking(
+    booking_data: RecurringBookingCreate,
+    service: BookingService = Depends(get_booking_service),
+):
+    """Create a recurring booking (daily or every N weeks) as one series."""
+    series_id, bookings = service.create_recurring_booking(booking_data)
+    return BookingSeriesResponse(series_id=series_id, bookings=bookings, count=len(bookings))
+
+
+@router.delete("/", response_model=BookingBulkCancelResponse)
+def cancel_bookings(
+    room_id: str | None = Query(None, min_length=1, description="Cancel only bookings of this room"),
+    user_name: str | None = Query(None, min_length=1, description="Cancel only bookings of this user"),
+    window_start: datetime | None = Query(None, alias="from", description="Only bookings ending after this time"),
+    window_end: datetime | None = Query(None, alias="to", description="Only bookings starting before this time"),
+    service: BookingService = Depends(get_booking_service),
+):
+    """Cancel every booking matching a room and/or user, optionally within a time window."""
+    booking_ids = service.cancel_bookings(room_id, user_name, window_start, window_end)
+    return BookingBulkCancelResponse(canceled=len(booking_ids), booking_ids=booking_ids)
+
+
+@router.delete("/series/{series_id}", status_code=status.HTTP_204_NO_CONTENT)
+def cancel_series(
+    series_id: str,
     service: BookingService = Depends(get_booking_service),
 ):
-    """Create a new room booking."""
-    booking = service.create_booking(booking_data)
-    return booking
+    """Cancel every occurrence of a recurring booking."""
+    service.cancel_series(series_id)
 
 
 @router.delete("/{booking_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -34,17 +124,142 @@ def cancel_booking(
 @router.get("/room/{room_id}", response_model=BookingListResponse)
 def list_bookings(
     room_id: str,
-    service: BookingService = Depends(get_booking_service),
+    window_start: datetime | None = Query(None, alias="from", description="Only bookings ending after this time"),
+    window_end: datetime | None = Query(None, alias="to", description="Only bookings starting before this time"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    include_history: bool = Query(False, description="Also list archived past bookings"),
+    if_none_match: str | None = Header(None),
+    service: BookingService = Depends(get_read_booking_service),
+):
+    """List bookings for a specific room, optionally within a time window.
+
+    Bookings moved to the archive are only listed with include_history.
+    Responses carry an ETag; a matching If-None-Match gets 304 Not Modified.
+    """
+    params = (window_start, window_end, limit, cursor, include_history)
+    lookup = room_listing_cache.lookup(room_id, params, if_none_match)
+    if lookup.response is not None:
+        return lookup.response
+
+    bookings, next_cursor = service.list_bookings_page(
+        room_id,
+        limit,
+        window_start=window_start,
+        window_end=window_end,
+        cursor=cursor,
+        include_history=include_history,
+    )
+    return room_listing_cache.store(room_id, params, lookup, encode_booking_list(bookings, next_cursor))
+
+
+@router.get("/room/{room_id}/events")
+async def stream_room_events(room_id: str):
+    """Stream the room's booking changes as server-sent events.
+
+    Each "created" or "canceled" event carries the booking as JSON. A
+    "resync" event means changes may have been missed: the client should
+    re-fetch the listing. A client that falls too far behind gets a final
+    resync event and is disconnected.
+    """
+    return StreamingResponse(
+        event_stream(room_events, room_id, get_settings().event_heartbeat_seconds),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/user/{user_name}", response_model=BookingListResponse)
+def list_user_bookings(
+    user_name: str,
+    window_start: datetime | None = Query(None, alias="from", description="Only bookings ending after this time"),
+    window_end: datetime | None = Query(None, alias="to", description="Only bookings starting before this time"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    include_history: bool = Query(False, description="Also list archived past bookings"),
+    service: BookingService = Depends(get_read_booking_service),
+):
+    """List a user's bookings in every room, optionally within a time window.
+
+    Paginated and ordered like the room listing. Not cached, since the
+    listing cache is invalidated per room.
+    """
+    bookings, next_cursor = service.list_user_bookings_page(
+        user_name,
+        limit,
+        window_start=window_start,
+        window_end=window_end,
+        cursor=cursor,
+        include_history=include_history,
+    )
+    return Response(content=encode_booking_list(bookings, next_cursor), media_type="application/json")
+
+
+@router.get("/free-slots", response_model=FreeSlotSearchResponse)
+def find_free_slots(
+    room_ids: list[str] = Query(..., alias="room_id", min_length=1, max_length=MAX_FREE_SLOT_ROOMS),
+    window_start: datetime = Query(..., alias="from"),
+    window_end: datetime = Query(..., alias="to"),
+    duration_minutes: int = Query(
+        ...,
+        ge=MIN_BOOKING_DURATION // timedelta(minutes=1),
+        le=MAX_BOOKING_DURATION // timedelta(minutes=1),
+        description="Required length of a free slot",
+    ),
+    service: BookingService = Depends(get_read_booking_service),
+):
+    """Find free slots of at least the given duration in each of several rooms."""
+    free_slots = service.find_free_slots(
+        room_ids, window_start, window_end, timedelta(minutes=duration_minutes)
+    )
+    return FreeSlotSearchResponse(
+        window_start=window_start,
+        window_end=window_end,
+        duration_minutes=duration_minutes,
+        rooms=[
+            {
+                "room_id": room_id,
+                "free_slots": [{"start_time": start, "end_time": end} for start, end in slots],
+            }
+            for room_id, slots in free_slots.items()
+        ],
+    )
+
+
+@router.get("/utilization", response_model=UtilizationSummaryResponse)
+def utilization_summary(
+    window_start: date = Query(..., alias="from", description="First day of the window"),
+    window_end: date = Query(..., alias="to", description="Day after the last day of the window"),
+    room_ids: list[str] | None = Query(None, alias="room_id", max_length=MAX_FREE_SLOT_ROOMS),
+    service: BookingService = Depends(get_read_booking_service),
 ):
-    """List all bookings for a specific room."""
-    bookings = service.list_bookings(room_id)
-    return BookingListResponse(bookings=bookings, count=len(bookings))
+    """Booked minutes and occupancy per room, by day and by hour of week.
+
+    Computed from counters maintained on every create and cancel, so the
+    cost depends on the number of rooms and days, not on the number of
+    bookings.
+    """
+    return service.utilization_summary(window_start, window_end, room_ids)
+
+
+@router.get("/export")
+def export_bookings(
+    room_id: str | None = Query(None, description="Export only this room"),
+    format: ExportFormat = Query("ndjson", description="ndjson or csv"),
+    service: BookingService = Depends(get_read_booking_service),
+):
+    """Stream bookings for one room or all rooms as NDJSON or CSV."""
+    return StreamingResponse(
+        encode_chunks(service.iter_export_partitions(room_id), format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="bookings.{format}"'},
+    )
 
 
 @router.get("/{booking_id}", response_model=BookingResponse)
 def get_booking(
     booking_id: str,
-    service: BookingService = Depends(get_booking_service),
+    service: BookingService = Depends(get_read_booking_service),
 ):
     """Get a specific booking by ID."""
     return service.get_booking(booking_id)
@@ -1,11 +1,32 @@
-from datetime import datetime, timezone, timedelta
+from datetime import date, datetime, timezone, timedelta
+from typing import Literal
 from zoneinfo import ZoneInfo
 
-from pydantic import BaseModel, Field, field_validator, model_validator
+from pydantic import BaseModel, Field, TypeAdapter, field_validator, model_validator
+# pydantic needs typing_extensions' TypedDict before Python 3.12
+from typing_extensions import TypedDict
 
 # Finnish timezone for the client (EET/EEST - UTC+2/UTC+3 with DST)
 FINNISH_TZ = ZoneInfo("Europe/Helsinki")
 
+# Booking duration and planning horizon limits
+MIN_BOOKING_DURATION = timedelta(minutes=15)
+MAX_BOOKING_DURATION = timedelta(hours=4)
+MAX_BOOKING_HORIZON = timedelta(days=90)
+
+# Maximum number of bookings accepted by a single batch request
+MAX_BATCH_SIZE = 5000
+
+# Maximum number of occurrences in a recurring booking series
+MAX_SERIES_OCCURRENCES = 100
+
+# Limits for a single free-slot search
+MAX_FREE_SLOT_ROOMS = 100
+MAX_FREE_SLOT_WINDOW = timedelta(days=31)
+
+# Longest window of a utilization summary
+MAX_UTILIZATION_WINDOW = timedelta(days=366)
+
 
 class BookingCreate(BaseModel):
     room_id: str = Field(..., min_length=1, max_length=50, description="Room identifier")
@@ -48,21 +69,39 @@ class BookingCreate(BaseModel):
 
         # Prevent extremely short bookings (less than 15 minutes)
         duration = self.end_time - self.start_time
-        if duration < timedelta(minutes=15):
+        if duration < MIN_BOOKING_DURATION:
             raise ValueError("Booking duration must be at least 15 minutes")
 
         # Enforce maximum continuous duration (4 hours)
-        if duration > timedelta(hours=4):
+        if duration > MAX_BOOKING_DURATION:
             raise ValueError("Booking duration cannot exceed 4 hours")
 
         # Prevent bookings too far in the future (more than 90 days)
         now = datetime.now(FINNISH_TZ)
-        if self.start_time > now + timedelta(days=90):
+        if self.start_time > now + MAX_BOOKING_HORIZON:
             raise ValueError("Cannot create bookings more than 90 days in the future")
 
         return self
 
 
+class RecurrenceRule(BaseModel):
+    frequency: Literal["daily", "weekly"] = Field(..., description="Repeat every N days or weeks")
+    interval: int = Field(1, ge=1, le=12, description="N: repeat every N days or weeks")
+    until: date | None = Field(None, description="Last date (inclusive) an occurrence may start on")
+    count: int | None = Field(None, ge=1, le=MAX_SERIES_OCCURRENCES, description="Number of occurrences")
+
+    @model_validator(mode="after")
+    def validate_end_condition(self):
+        """Require exactly one of until and count."""
+        if (self.until is None) == (self.count is None):
+            raise ValueError("Recurrence must specify exactly one of 'until' or 'count'")
+        return self
+
+
+class RecurringBookingCreate(BookingCreate):
+    recurrence: RecurrenceRule
+
+
 class BookingResponse(BaseModel):
     id: str
     room_id: str
@@ -70,6 +109,19 @@ class BookingResponse(BaseModel):
     end_time: datetime
     user_name: str
     created_at: datetime
+    series_id: str | None = None
+
+    model_config = {"from_attributes": True}
+
+
+class BookingEvent(BaseModel):
+    """Data of a "created" or "canceled" server-sent event."""
+
+    id: str
+    room_id: str
+    start_time: datetime
+    end_time: datetime
+    user_name: str | None = None
 
     model_config = {"from_attributes": True}
 
@@ -77,3 +129,119 @@ class BookingResponse(BaseModel):
 class BookingListResponse(BaseModel):
     bookings: list[BookingResponse]
     count: int
+    next_cursor: str | None = Field(
+        None, description="Cursor for the next page, or null when this is the last page"
+    )
+
+
+# Columns selected for listings, in BookingResponse field order
+BOOKING_RESPONSE_FIELDS = tuple(BookingResponse.model_fields)
+
+
+class _BookingRow(TypedDict):
+    id: str
+    room_id: str
+    start_time: datetime
+    end_time: datetime
+    user_name: str
+    created_at: datetime | None
+    series_id: str | None
+
+
+class _BookingListPayload(TypedDict):
+    bookings: list[_BookingRow]
+    count: int
+    next_cursor: str | None
+
+
+_booking_list_adapter = TypeAdapter(_BookingListPayload)
+
+
+def encode_booking_list(rows, next_cursor: str | None) -> bytes:
+    """Serialize listing rows (selected as BOOKING_RESPONSE_FIELDS) as a BookingListResponse body.
+
+    The rows are trusted database values, so they are dumped without
+    building and validating a BookingResponse for each one.
+    """
+    return _booking_list_adapter.dump_json(
+        {
+            # Row._asdict() is several times slower than zipping the plain tuple
+            "bookings": [dict(zip(BOOKING_RESPONSE_FIELDS, row)) for row in rows],
+            "count": len(rows),
+            "next_cursor": next_cursor,
+        }
+    )
+
+
+class BookingSeriesResponse(BaseModel):
+    series_id: str
+    bookings: list[BookingResponse]
+    count: int
+
+
+class BookingBulkCancelResponse(BaseModel):
+    canceled: int
+    booking_ids: list[str]
+
+
+class BookingBatchCreate(BaseModel):
+    bookings: list[BookingCreate] = Field(
+        ..., min_length=1, max_length=MAX_BATCH_SIZE, description="Bookings to create"
+    )
+
+
+class BookingBatchItemResult(BaseModel):
+    index: int = Field(..., description="Position of the booking in the request")
+    status: Literal["created", "conflict", "invalid"]
+    booking: BookingResponse | None = None
+    detail: str | None = None
+
+
+class BookingBatchResponse(BaseModel):
+    results: list[BookingBatchItemResult]
+    created: int
+    failed: int
+
+
+class FreeSlot(BaseModel):
+    start_time: datetime
+    end_time: datetime
+
+
+class RoomFreeSlots(BaseModel):
+    room_id: str
+    free_slots: list[FreeSlot]
+
+
+class FreeSlotSearchResponse(BaseModel):
+    window_start: datetime
+    window_end: datetime
+    duration_minutes: int
+    rooms: list[RoomFreeSlots]
+
+
+class DayUtilization(BaseModel):
+    day: date
+    booked_minutes: float
+    occupancy_percent: float = Field(..., description="Share of the day's 24 hours that is booked")
+
+
+class HourOfWeekUtilization(BaseModel):
+    weekday: int = Field(..., ge=0, le=6, description="0 = Monday")
+    hour: int = Field(..., ge=0, le=23)
+    booked_minutes: float
+    occupancy_percent: float = Field(..., description="Share of this hour, over all such weekdays in the window")
+
+
+class RoomUtilizationSummary(BaseModel):
+    room_id: str
+    booked_minutes: float
+    occupancy_percent: float
+    by_day: list[DayUtilization]
+    by_hour_of_week: list[HourOfWeekUtilization]
+
+
+class UtilizationSummaryResponse(BaseModel):
+    window_start: date
+    window_end: date
+    rooms: list[RoomUtilizationSummary]
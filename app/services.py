@@ -1,88 +1,373 @@
-from datetime import datetime, timezone
+from collections.abc import AsyncIterator, Iterable, Iterator, Sequence
+from contextlib import contextmanager, nullcontext
+from datetime import date, datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 import logging
+import time
+import uuid
 
-from sqlalchemy import and_, or_
+from sqlalchemy import Row, and_, delete, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError, OperationalError
 
-from app.models import Booking
-from app.schemas import BookingCreate, FINNISH_TZ
+from app.cache import RoomListingCache, room_listing_cache
+from app.change_feed import ChangeFeed, change_feed
+from app.events import RoomEventBroker, room_events
+from app.export import EXPORT_CHUNK_SIZE, export_statement
+from app.locks import RoomLockManager, room_locks
+from app.metrics import booking_stage_duration
+from app.interval_index import Interval, RoomIntervalIndex, booking_index, to_local_naive
+from app.models import Booking, BookingArchive, to_storage_precision
+from app.pagination import decode_cursor, encode_cursor
+from app.recurrence import expand_occurrences
+from app.utilization import add_utilization, utilization_deltas, utilization_summary
+from app.schemas import (
+    BOOKING_RESPONSE_FIELDS,
+    BookingBatchItemResult,
+    BookingCreate,
+    BookingEvent,
+    BookingResponse,
+    FINNISH_TZ,
+    MAX_BOOKING_DURATION,
+    MAX_FREE_SLOT_WINDOW,
+    MAX_UTILIZATION_WINDOW,
+    RecurringBookingCreate,
+    UtilizationSummaryResponse,
+)
 from app.exceptions import BookingNotFoundError, BookingConflictError, BookingValidationError
 
 logger = logging.getLogger("booking_system")
 
+# Stage timers of create_booking, resolved once so the hot path skips the label lookup
+_stage_validation = booking_stage_duration.labels("validation")
+_stage_lock_wait = booking_stage_duration.labels("lock_wait")
+_stage_conflict_check = booking_stage_duration.labels("conflict_check")
+_stage_commit = booking_stage_duration.labels("commit")
+
+# Compiled once and reused by every create_booking; a table (not ORM) insert,
+# so its result has the rowcount
+_INSERT_BOOKING = insert(Booking.__table__)
+
+# Columns returned by the cancel statements: enough for the index and for events
+_EVENT_COLUMNS = (Booking.id, Booking.room_id, Booking.start_time, Booking.end_time, Booking.user_name)
+
 
 class BookingService:
-    def __init__(self, db: Session):
+    def __init__(
+        self,
+        db: Session,
+        index: RoomIntervalIndex = booking_index,
+        listing_cache: RoomListingCache = room_listing_cache,
+        locks: RoomLockManager | None = room_locks,
+        changes: ChangeFeed = change_feed,
+        events: RoomEventBroker = room_events,
+    ):
         self.db = db
+        self.index = index
+        self.listing_cache = listing_cache
+        # None means the caller already holds the room locks (see AsyncBookingService)
+        self.locks = locks
+        self.changes = changes
+        self.events = events
 
-    def create_booking(self, booking_data: BookingCreate) -> Booking:
-        """Create a new booking after validation with race condition protection."""
+    def create_booking(self, booking_data: BookingCreate) -> BookingResponse:
+        """Create a new booking after validation with race condition protection.
+
+        The id and created_at are generated here, so the booking is written
+        with a single Core INSERT and returned without reading it back; the
+        INSERT's row count confirms the row was written before the commit.
+        """
+        values = {
+            "id": str(uuid.uuid4()),
+            "room_id": booking_data.room_id,
+            "start_time": to_storage_precision(to_local_naive(booking_data.start_time)),
+            "end_time": to_storage_precision(to_local_naive(booking_data.end_time)),
+            "user_name": booking_data.user_name,
+            "created_at": datetime.now(timezone.utc).replace(tzinfo=None),
+            "series_id": None,
+        }
+        # The values are already validated and normalized
+        booking = BookingResponse.model_construct(**values)
+        reserved = False
         try:
+            started = time.perf_counter()
             self._validate_not_in_past(booking_data.start_time)
+            validated = time.perf_counter()
+            _stage_validation.observe(validated - started)
 
-            # Check for conflicts with row-level locking to prevent race conditions
-            self._check_for_conflicts_with_lock(
-                room_id=booking_data.room_id,
-                start_time=booking_data.start_time,
-                end_time=booking_data.end_time,
-            )
+            # The room lock makes the check and the insert atomic per room
+            with self._room_lock(booking.room_id):
+                locked = time.perf_counter()
+                _stage_lock_wait.observe(locked - validated)
+                if self.index.loaded:
+                    # Check and reserve the slot in the in-memory index in one step
+                    self._reserve_in_index(booking)
+                    reserved = True
+                else:
+                    # Check for conflicts with row-level locking to prevent race conditions
+                    self._check_for_conflicts_with_lock(
+                        room_id=booking_data.room_id,
+                        start_time=booking_data.start_time,
+                        end_time=booking_data.end_time,
+                    )
+                checked = time.perf_counter()
+                _stage_conflict_check.observe(checked - locked)
 
-            booking = Booking(
-                room_id=booking_data.room_id,
-                start_time=booking_data.start_time,
-                end_time=booking_data.end_time,
-                user_name=booking_data.user_name,
-            )
-            self.db.add(booking)
-            self.db.commit()
-            self.db.refresh(booking)
+                if self.db.execute(_INSERT_BOOKING, values).rowcount != 1:
+                    raise RuntimeError(f"Booking {booking.id} was not written")
+                self._count_utilization([booking], 1)
+                self.db.commit()
+                reserved = False
+            _stage_commit.observe(time.perf_counter() - checked)
+            self.listing_cache.invalidate(booking.room_id)
+            self._publish("created", [booking])
 
             logger.info(
-                f"Booking created: id={booking.id}, room={booking.room_id}, "
-                f"user={booking.user_name}, time={booking.start_time} to {booking.end_time}"
+                "Booking created: id=%s, room=%s, user=%s, time=%s to %s",
+                booking.id, booking.room_id, booking.user_name, booking.start_time, booking.end_time,
             )
             return booking
 
         except (BookingConflictError, BookingValidationError):
-            self.db.rollback()
+            self._rollback_create(booking, reserved)
             raise
         except IntegrityError as e:
-            self.db.rollback()
-            logger.warning(f"Integrity error during booking creation: {e}")
+            self._rollback_create(booking, reserved)
+            logger.warning("Integrity error during booking creation: %s", e)
             raise BookingConflictError("Booking conflict detected (database constraint)")
         except OperationalError as e:
+            self._rollback_create(booking, reserved)
+            logger.error("Database operational error during booking creation: %s", e)
+            raise
+        except Exception as e:
+            self._rollback_create(booking, reserved)
+            logger.error("Unexpected error creating booking: %s", e, exc_info=True)
+            raise
+
+    def create_bookings_batch(self, items: list[BookingCreate]) -> list[BookingBatchItemResult]:
+        """Create many bookings in one transaction, reporting a result per item.
+
+        Items are grouped by room and sorted by start time; each room is then
+        resolved with a single sweep against its stored bookings, which are
+        fetched with one range query (or read from the interval index).
+        """
+        results: list[BookingBatchItemResult | None] = [None] * len(items)
+        by_room: dict[str, list[tuple[datetime, datetime, int]]] = {}
+        now = datetime.now(FINNISH_TZ)
+
+        for i, item in enumerate(items):
+            if item.start_time < now:
+                results[i] = BookingBatchItemResult(
+                    index=i, status="invalid", detail="Cannot create bookings in the past"
+                )
+                continue
+            # Times are compared, reserved and stored at storage precision
+            by_room.setdefault(item.room_id, []).append((
+                to_storage_precision(to_local_naive(item.start_time)),
+                to_storage_precision(to_local_naive(item.end_time)),
+                i,
+            ))
+
+        created_at = datetime.now(timezone.utc).replace(tzinfo=None)
+        accepted: list[Booking] = []
+        try:
+            with self._room_lock(*by_room):
+                for room_id, candidates in by_room.items():
+                    self._resolve_batch_room(room_id, candidates, items, created_at, results, accepted)
+                self.db.add_all(accepted)
+                self._count_utilization(accepted, 1)
+                self.db.commit()
+            for room_id in {booking.room_id for booking in accepted}:
+                self.listing_cache.invalidate(room_id)
+        except Exception as e:
+            self.db.rollback()
+            if self.index.loaded:
+                for booking in accepted:
+                    self.index.remove(booking.room_id, booking.id, booking.start_time)
+            logger.error("Error creating booking batch: %s", e, exc_info=True)
+            raise
+
+        # The accepted bookings expired on commit; their responses did not
+        self._publish("created", [r.booking for r in results if r is not None and r.status == "created"])
+
+        logger.info(
+            "Booking batch processed: %d created, %d rejected", len(accepted), len(items) - len(accepted)
+        )
+        return results
+
+    def create_recurring_booking(self, booking_data: RecurringBookingCreate) -> tuple[str, list[BookingResponse]]:
+        """Create every occurrence of a recurring booking as one series, or none of them.
+
+        The whole series is checked against the room's stored bookings with a
+        single range query covering the first to the last occurrence.
+        Returns the series ID and the created bookings.
+        """
+        self._validate_not_in_past(booking_data.start_time)
+        series_id = str(uuid.uuid4())
+        created_at = datetime.now(timezone.utc).replace(tzinfo=None)
+        # Booking's validator truncates the times to storage precision, so the
+        # sweep and the index reservations below use the stored values
+        bookings = [
+            Booking(
+                id=str(uuid.uuid4()),
+                room_id=booking_data.room_id,
+                start_time=to_local_naive(start),
+                end_time=to_local_naive(end),
+                user_name=booking_data.user_name,
+                created_at=created_at,
+                series_id=series_id,
+            )
+            for start, end in expand_occurrences(
+                booking_data.start_time, booking_data.end_time, booking_data.recurrence
+            )
+        ]
+        if not bookings:
+            raise BookingValidationError("Recurrence rule produces no occurrences")
+
+        reserved: list[Booking] = []
+        try:
+            with self._room_lock(booking_data.room_id):
+                candidates = [(b.start_time, b.end_time, i) for i, b in enumerate(bookings)]
+                existing = self._stored_intervals(
+                    booking_data.room_id, bookings[0].start_time, bookings[-1].end_time
+                )
+                for i, conflict in self._sweep_room(candidates, existing):
+                    if conflict is not None:
+                        raise BookingConflictError(
+                            f"Occurrence on {bookings[i].start_time.date()}: {conflict}"
+                        )
+                if self.index.loaded:
+                    for booking in bookings:
+                        self._reserve_in_index(booking)
+                        reserved.append(booking)
+
+                # Serialize before commit, which would expire the attributes
+                responses = [BookingResponse.model_validate(booking) for booking in bookings]
+                self.db.add_all(bookings)
+                self._count_utilization(bookings, 1)
+                self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            for booking in reserved:
+                self.index.remove(booking.room_id, booking.id, booking.start_time)
+            if not isinstance(e, (BookingConflictError, BookingValidationError)):
+                logger.error("Error creating booking series: %s", e, exc_info=True)
+            raise
+
+        self.listing_cache.invalidate(booking_data.room_id)
+        self._publish("created", responses)
+        logger.info(
+            "Booking series created: series=%s, room=%s, user=%s, occurrences=%d",
+            series_id, booking_data.room_id, booking_data.user_name, len(bookings),
+        )
+        return series_id, responses
+
+    def cancel_series(self, series_id: str) -> int:
+        """Cancel every occurrence of a recurring booking with one DELETE statement."""
+        try:
+            deleted = self.db.execute(
+                delete(Booking)
+                .where(Booking.series_id == series_id)
+                .returning(*_EVENT_COLUMNS)
+            ).all()
+            if not deleted:
+                raise BookingNotFoundError(f"Booking series with id '{series_id}' not found")
+            self._count_utilization(deleted, -1)
+            self.db.commit()
+        except BookingNotFoundError:
             self.db.rollback()
-            logger.error(f"Database operational error during booking creation: {e}")
             raise
         except Exception as e:
             self.db.rollback()
-            logger.error(f"Unexpected error creating booking: {e}", exc_info=True)
+            logger.error("Error canceling booking series %s: %s", series_id, e, exc_info=True)
             raise
 
+        for row in deleted:
+            self.index.remove(row.room_id, row.id, row.start_time)
+        for room_id in {row.room_id for row in deleted}:
+            self.listing_cache.invalidate(room_id)
+        self._publish("canceled", deleted)
+        logger.info("Canceled booking series: series=%s, occurrences=%d", series_id, len(deleted))
+        return len(deleted)
+
     def cancel_booking(self, booking_id: str) -> None:
-        """Cancel (delete) a booking by ID."""
+        """Cancel (delete) a booking by ID with one DELETE ... RETURNING statement."""
         try:
-            booking = self.db.query(Booking).filter(Booking.id == booking_id).first()
-            if not booking:
+            deleted = self.db.execute(
+                delete(Booking)
+                .where(Booking.id == booking_id)
+                .returning(*_EVENT_COLUMNS)
+            ).one_or_none()
+            if deleted is None:
                 raise BookingNotFoundError(f"Booking with id '{booking_id}' not found")
-
-            logger.info(
-                f"Canceling booking: id={booking.id}, room={booking.room_id}, "
-                f"user={booking.user_name}"
-            )
-            self.db.delete(booking)
+            self._count_utilization([deleted], -1)
             self.db.commit()
-
         except BookingNotFoundError:
             self.db.rollback()
             raise
         except Exception as e:
             self.db.rollback()
-            logger.error(f"Error canceling booking {booking_id}: {e}", exc_info=True)
+            logger.error("Error canceling booking %s: %s", booking_id, e, exc_info=True)
+            raise
+
+        self.index.remove(deleted.room_id, booking_id, deleted.start_time)
+        self.listing_cache.invalidate(deleted.room_id)
+        self._publish("canceled", [deleted])
+        logger.info("Canceled booking: id=%s, room=%s, user=%s", booking_id, deleted.room_id, deleted.user_name)
+
+    def cancel_bookings(
+        self,
+        room_id: str | None = None,
+        user_name: str | None = None,
+        window_start: datetime | None = None,
+        window_end: datetime | None = None,
+    ) -> list[str]:
+        """Cancel every booking of a room and/or user overlapping [window_start, window_end).
+
+        All matching bookings are removed with a single DELETE ... RETURNING
+        statement. Returns the ids of the canceled bookings.
+        """
+        if room_id is None and user_name is None:
+            raise BookingValidationError("Bulk cancel requires a room_id or a user_name")
+        if window_start is not None and window_end is not None and window_start >= window_end:
+            raise BookingValidationError("Cancel window end must be after its start")
+
+        conditions = []
+        if room_id is not None:
+            conditions.append(Booking.room_id == room_id)
+        if user_name is not None:
+            conditions.append(Booking.user_name == user_name)
+        if window_start is not None:
+            window_start = to_local_naive(window_start)
+            conditions += [
+                Booking.start_time > window_start - MAX_BOOKING_DURATION,
+                Booking.end_time > window_start,
+            ]
+        if window_end is not None:
+            conditions.append(Booking.start_time < to_local_naive(window_end))
+
+        try:
+            deleted = self.db.execute(
+                delete(Booking)
+                .where(*conditions)
+                .returning(*_EVENT_COLUMNS)
+            ).all()
+            self._count_utilization(deleted, -1)
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.error("Error canceling bookings: room=%s, user=%s: %s", room_id, user_name, e, exc_info=True)
             raise
 
+        for row in deleted:
+            self.index.remove(row.room_id, row.id, row.start_time)
+        for deleted_room_id in {row.room_id for row in deleted}:
+            self.listing_cache.invalidate(deleted_room_id)
+        self._publish("canceled", deleted)
+        logger.info("Canceled bookings in bulk: room=%s, user=%s, count=%d", room_id, user_name, len(deleted))
+        return [row.id for row in deleted]
+
     def list_bookings(self, room_id: str) -> list[Booking]:
         """List all bookings for a specific room."""
         return (
@@ -92,13 +377,333 @@ class BookingService:
             .all()
         )
 
-    def get_booking(self, booking_id: str) -> Booking:
-        """Get a single booking by ID."""
+    def list_bookings_page(
+        self,
+        room_id: str,
+        limit: int,
+        window_start: datetime | None = None,
+        window_end: datetime | None = None,
+        cursor: str | None = None,
+        include_history: bool = False,
+    ) -> tuple[list[Row], str | None]:
+        """List one page of a room's bookings overlapping [window_start, window_end).
+
+        Pages are ordered by (start_time, id) and continue from an opaque
+        cursor. With include_history, archived bookings are merged in. Rows
+        carry the BookingResponse fields and are not loaded as ORM objects.
+        Returns the page and the cursor for the next one, if any.
+        """
+        return self._list_page("room_id", room_id, limit, window_start, window_end, cursor, include_history)
+
+    def list_user_bookings_page(
+        self,
+        user_name: str,
+        limit: int,
+        window_start: datetime | None = None,
+        window_end: datetime | None = None,
+        cursor: str | None = None,
+        include_history: bool = False,
+    ) -> tuple[list[Row], str | None]:
+        """List one page of a user's bookings in every room, like list_bookings_page.
+
+        Served by the (user_name, start_time) indexes instead of visiting
+        each room.
+        """
+        return self._list_page("user_name", user_name, limit, window_start, window_end, cursor, include_history)
+
+    def _list_page(
+        self,
+        key: str,
+        value: str,
+        limit: int,
+        window_start: datetime | None,
+        window_end: datetime | None,
+        cursor: str | None,
+        include_history: bool,
+    ) -> tuple[list[Row], str | None]:
+        bookings = self._page_query(Booking, key, value, limit, window_start, window_end, cursor)
+        if include_history:
+            archived = self._page_query(BookingArchive, key, value, limit, window_start, window_end, cursor)
+            bookings = sorted(bookings + archived, key=lambda booking: (booking.start_time, booking.id))[:limit + 1]
+
+        next_cursor = None
+        if len(bookings) > limit:
+            bookings = bookings[:limit]
+            next_cursor = encode_cursor(bookings[-1].start_time, bookings[-1].id)
+        return bookings, next_cursor
+
+    def _page_query(
+        self,
+        model: type[Booking] | type[BookingArchive],
+        key: str,
+        value: str,
+        limit: int,
+        window_start: datetime | None,
+        window_end: datetime | None,
+        cursor: str | None,
+    ) -> list[Row]:
+        """Fetch up to limit + 1 rows where column `key` ("room_id" or "user_name") equals value.
+
+        Both keys have a (key, start_time) index on the bookings and archive tables.
+        """
+        query = select(*(getattr(model, field) for field in BOOKING_RESPONSE_FIELDS)).where(
+            getattr(model, key) == value
+        )
+
+        if window_start is not None:
+            window_start = to_local_naive(window_start)
+            # No booking is longer than MAX_BOOKING_DURATION, so bounding
+            # start_time from below keeps the scan on the (key, time) index
+            query = query.where(
+                model.start_time > window_start - MAX_BOOKING_DURATION,
+                model.end_time > window_start,
+            )
+        if window_end is not None:
+            query = query.where(model.start_time < to_local_naive(window_end))
+        if cursor is not None:
+            after_start, after_id = decode_cursor(cursor)
+            query = query.where(
+                or_(
+                    model.start_time > after_start,
+                    and_(model.start_time == after_start, model.id > after_id),
+                )
+            )
+        return self.db.execute(query.order_by(model.start_time, model.id).limit(limit + 1)).all()
+
+    def find_free_slots(
+        self,
+        room_ids: list[str],
+        window_start: datetime,
+        window_end: datetime,
+        duration: timedelta,
+    ) -> dict[str, list[tuple[datetime, datetime]]]:
+        """Find gaps of at least `duration` in each room within [window_start, window_end).
+
+        The part of the window that is already in the past is skipped. The
+        bookings of all rooms are fetched with one query ordered by room and
+        start time (or read from the interval index) and swept once.
+        """
+        window_start, window_end = to_local_naive(window_start), to_local_naive(window_end)
+        if window_start >= window_end:
+            raise BookingValidationError("Search window end must be after its start")
+        window_start = max(window_start, to_local_naive(datetime.now(FINNISH_TZ)))
+        if window_end - window_start > MAX_FREE_SLOT_WINDOW:
+            raise BookingValidationError(
+                f"Search window cannot exceed {MAX_FREE_SLOT_WINDOW.days} days"
+            )
+
+        room_ids = list(dict.fromkeys(room_ids))
+        booked: dict[str, list[tuple[datetime, datetime]]] = {room_id: [] for room_id in room_ids}
+        if window_start < window_end:
+            if self.index.loaded:
+                for room_id in room_ids:
+                    booked[room_id] = [
+                        (start, end) for start, end, _ in self.index.overlapping(room_id, window_start, window_end)
+                    ]
+            else:
+                rows = (
+                    self.db.query(Booking.room_id, Booking.start_time, Booking.end_time)
+                    .filter(
+                        Booking.room_id.in_(room_ids),
+                        Booking.start_time > window_start - MAX_BOOKING_DURATION,
+                        Booking.start_time < window_end,
+                        Booking.end_time > window_start,
+                    )
+                    .order_by(Booking.room_id, Booking.start_time)
+                    .all()
+                )
+                for room_id, start, end in rows:
+                    booked[room_id].append((start, end))
+
+        return {
+            room_id: self._free_gaps(intervals, window_start, window_end, duration)
+            for room_id, intervals in booked.items()
+        }
+
+    def utilization_summary(
+        self, window_start: date, window_end: date, room_ids: list[str] | None = None
+    ) -> UtilizationSummaryResponse:
+        """Summarize booked time per room in [window_start, window_end) from the counters."""
+        if window_start >= window_end:
+            raise BookingValidationError("Utilization window end must be after its start")
+        if window_end - window_start > MAX_UTILIZATION_WINDOW:
+            raise BookingValidationError(
+                f"Utilization window cannot exceed {MAX_UTILIZATION_WINDOW.days} days"
+            )
+        return utilization_summary(self.db, window_start, window_end, room_ids)
+
+    def iter_export_partitions(
+        self, room_id: str | None = None, chunk_size: int = EXPORT_CHUNK_SIZE
+    ) -> Iterator[Sequence[Row]]:
+        """Yield bookings (one room or all) in chunks read from a streaming cursor."""
+        result = self.db.execute(
+            export_statement(room_id), execution_options={"yield_per": chunk_size}
+        )
+        try:
+            yield from result.partitions()
+        finally:
+            result.close()
+
+    def get_booking(self, booking_id: str) -> Booking | BookingArchive:
+        """Get a single booking by ID, looking in the archive if it has been moved there."""
         booking = self.db.query(Booking).filter(Booking.id == booking_id).first()
+        if not booking:
+            booking = self.db.query(BookingArchive).filter(BookingArchive.id == booking_id).first()
         if not booking:
             raise BookingNotFoundError(f"Booking with id '{booking_id}' not found")
         return booking
 
+    def _count_utilization(self, bookings: Iterable, sign: int) -> None:
+        """Add (sign 1) or subtract (sign -1) the bookings' time in the utilization counters.
+
+        Called before the commit of the create or cancel, so the counters
+        change in the same transaction.
+        """
+        add_utilization(self.db, utilization_deltas(bookings, sign))
+
+    def _publish(self, event: str, bookings: Iterable) -> None:
+        """Push booking events to the rooms' subscribers.
+
+        In multi-worker mode the change feed publishes every worker's changes
+        instead, so nothing is sent from here.
+        """
+        if self.changes.enabled:
+            return
+        for booking in bookings:
+            if self.events.has_subscribers(booking.room_id):
+                data = BookingEvent.model_validate(booking).model_dump_json().encode()
+                self.events.publish(booking.room_id, event, data)
+
+    @contextmanager
+    def _room_lock(self, *room_ids: str) -> Iterator[None]:
+        """Hold the per-room write locks unless the caller already does.
+
+        Once the locks are held, changes committed by other workers are
+        applied to the index, so the conflict check sees all of them.
+        """
+        with self.locks.lock(*room_ids) if self.locks else nullcontext():
+            self.changes.sync(self.db)
+            yield
+
+    def _rollback_create(self, booking: Booking | BookingResponse, reserved: bool) -> None:
+        """Roll back a failed create and release its index reservation."""
+        self.db.rollback()
+        if reserved:
+            self.index.remove(booking.room_id, booking.id, booking.start_time)
+
+    def _reserve_in_index(self, booking: Booking | BookingResponse) -> None:
+        """Reserve the booking's slot in the interval index or raise on conflict."""
+        conflicting = self.index.reserve(
+            booking.room_id, booking.start_time, booking.end_time, booking.id
+        )
+        if conflicting:
+            raise BookingConflictError(
+                f"Booking conflicts with existing booking from "
+                f"{conflicting[0]} to {conflicting[1]}"
+            )
+
+    def _resolve_batch_room(
+        self,
+        room_id: str,
+        candidates: list[tuple[datetime, datetime, int]],
+        items: list[BookingCreate],
+        created_at: datetime,
+        results: list[BookingBatchItemResult | None],
+        accepted: list[Booking],
+    ) -> None:
+        """Sweep one room's batch items, recording results and appending accepted bookings."""
+        candidates.sort()
+        existing = self._stored_intervals(room_id, candidates[0][0], max(c[1] for c in candidates))
+        # The sweep yields in candidate order
+        for (start, end, _), (i, conflict) in zip(candidates, self._sweep_room(candidates, existing)):
+            item = items[i]
+            booking_id = str(uuid.uuid4())
+            if conflict is None and self.index.loaded:
+                # reserve() re-checks the slot against the live index
+                conflicting = self.index.reserve(room_id, start, end, booking_id)
+                if conflicting:
+                    conflict = (
+                        f"Booking conflicts with existing booking from "
+                        f"{conflicting[0]} to {conflicting[1]}"
+                    )
+            if conflict is not None:
+                results[i] = BookingBatchItemResult(index=i, status="conflict", detail=conflict)
+                continue
+
+            booking = Booking(
+                id=booking_id,
+                room_id=item.room_id,
+                start_time=start,
+                end_time=end,
+                user_name=item.user_name,
+                created_at=created_at,
+            )
+            accepted.append(booking)
+            # Serialize before commit, which would expire the attributes
+            results[i] = BookingBatchItemResult(
+                index=i, status="created", booking=BookingResponse.model_validate(booking)
+            )
+
+    def _stored_intervals(self, room_id: str, start: datetime, end: datetime) -> list[Interval]:
+        """Return stored bookings of a room overlapping [start, end), ordered by start."""
+        if self.index.loaded:
+            return self.index.overlapping(room_id, start, end)
+        rows = (
+            self.db.query(Booking.start_time, Booking.end_time, Booking.id)
+            .filter(
+                Booking.room_id == room_id,
+                Booking.start_time < end,
+                Booking.end_time > start,
+            )
+            .order_by(Booking.start_time)
+            .all()
+        )
+        return [(row.start_time, row.end_time, row.id) for row in rows]
+
+    @staticmethod
+    def _sweep_room(
+        candidates: list[tuple[datetime, datetime, int]],
+        existing: list[Interval],
+    ):
+        """Yield (item index, conflict detail or None) for sorted candidates of one room.
+
+        Both lists are ordered by start time and the stored bookings never
+        overlap, so one forward pass over each list finds every conflict.
+        """
+        j = 0
+        last_accepted: tuple[datetime, datetime, int] | None = None
+        for start, end, i in candidates:
+            while j < len(existing) and existing[j][1] <= start:
+                j += 1
+            if j < len(existing) and existing[j][0] < end:
+                yield i, (
+                    f"Booking conflicts with existing booking from "
+                    f"{existing[j][0]} to {existing[j][1]}"
+                )
+            elif last_accepted is not None and last_accepted[1] > start:
+                yield i, f"Booking conflicts with booking at index {last_accepted[2]} in this batch"
+            else:
+                last_accepted = (start, end, i)
+                yield i, None
+
+    @staticmethod
+    def _free_gaps(
+        intervals: list[tuple[datetime, datetime]],
+        window_start: datetime,
+        window_end: datetime,
+        duration: timedelta,
+    ) -> list[tuple[datetime, datetime]]:
+        """Return the gaps between sorted bookings that are at least `duration` long."""
+        gaps = []
+        cursor = window_start
+        for start, end in intervals:
+            if start - cursor >= duration:
+                gaps.append((cursor, start))
+            cursor = max(cursor, end)
+        if window_end - cursor >= duration:
+            gaps.append((cursor, window_end))
+        return gaps
+
     def _validate_not_in_past(self, start_time: datetime) -> None:
         """Validate that the booking start time is not in the past (Finnish time)."""
         now = datetime.now(FINNISH_TZ)
@@ -118,9 +723,12 @@ class BookingService:
         exclude_booking_id: str | None = None,
     ) -> None:
         """Check if the proposed booking conflicts with existing bookings."""
-        query = self.db.query(Booking).filter(
+        # Only the time columns are selected, so ix_bookings_room_time covers
+        # the query; the lower start_time bound keeps the index scan short.
+        query = self.db.query(Booking.start_time, Booking.end_time).filter(
             and_(
                 Booking.room_id == room_id,
+                Booking.start_time > start_time - MAX_BOOKING_DURATION,
                 or_(
                     and_(
                         Booking.start_time < end_time,
@@ -150,9 +758,12 @@ class BookingService:
         """Check for conflicts with row-level locking to prevent race conditions."""
         # Use FOR UPDATE to lock rows during the transaction
         # This prevents concurrent transactions from creating conflicting bookings
-        query = self.db.query(Booking).filter(
+        # Only the time columns are selected, so ix_bookings_room_time covers
+        # the query; the lower start_time bound keeps the index scan short.
+        query = self.db.query(Booking.start_time, Booking.end_time).filter(
             and_(
                 Booking.room_id == room_id,
+                Booking.start_time > start_time - MAX_BOOKING_DURATION,
                 or_(
                     and_(
                         Booking.start_time < end_time,
@@ -171,3 +782,155 @@ class BookingService:
                 f"Booking conflicts with existing booking from "
                 f"{conflicting.start_time} to {conflicting.end_time}"
             )
+
+
+class AsyncBookingService:
+    """Async counterpart of BookingService for the async request path.
+
+    The booking logic is shared with BookingService: each call runs it on the
+    AsyncSession's greenlet bridge (run_sync), so database I/O is awaited on
+    the event loop instead of blocking a threadpool worker. Room locks are
+    taken here with async_lock, since blocking on them inside run_sync would
+    stall the event loop.
+    """
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        index: RoomIntervalIndex = booking_index,
+        listing_cache: RoomListingCache = room_listing_cache,
+        locks: RoomLockManager = room_locks,
+    ):
+        self.db = db
+        self.index = index
+        self.listing_cache = listing_cache
+        self.locks = locks
+
+    def _service(self, session: Session) -> BookingService:
+        return BookingService(session, self.index, self.listing_cache, locks=None)
+
+    async def create_booking(self, booking_data: BookingCreate) -> BookingResponse:
+        """Create a new booking after validation with race condition protection."""
+        async with self.locks.async_lock(booking_data.room_id):
+            return await self.db.run_sync(
+                lambda session: self._service(session).create_booking(booking_data)
+            )
+
+    async def create_bookings_batch(self, items: list[BookingCreate]) -> list[BookingBatchItemResult]:
+        """Create many bookings in one transaction, reporting a result per item."""
+        async with self.locks.async_lock(*{item.room_id for item in items}):
+            return await self.db.run_sync(
+                lambda session: self._service(session).create_bookings_batch(items)
+            )
+
+    async def create_recurring_booking(
+        self, booking_data: RecurringBookingCreate
+    ) -> tuple[str, list[BookingResponse]]:
+        """Create every occurrence of a recurring booking as one series, or none of them."""
+        async with self.locks.async_lock(booking_data.room_id):
+            return await self.db.run_sync(
+                lambda session: self._service(session).create_recurring_booking(booking_data)
+            )
+
+    async def cancel_series(self, series_id: str) -> int:
+        """Cancel every occurrence of a recurring booking with one DELETE statement."""
+        return await self.db.run_sync(
+            lambda session: self._service(session).cancel_series(series_id)
+        )
+
+    async def cancel_booking(self, booking_id: str) -> None:
+        """Cancel (delete) a booking by ID."""
+        await self.db.run_sync(
+            lambda session: self._service(session).cancel_booking(booking_id)
+        )
+
+    async def cancel_bookings(
+        self,
+        room_id: str | None = None,
+        user_name: str | None = None,
+        window_start: datetime | None = None,
+        window_end: datetime | None = None,
+    ) -> list[str]:
+        """Cancel every booking of a room and/or user overlapping [window_start, window_end)."""
+        return await self.db.run_sync(
+            lambda session: self._service(session).cancel_bookings(room_id, user_name, window_start, window_end)
+        )
+
+    async def list_bookings(self, room_id: str) -> list[Booking]:
+        """List all bookings for a specific room."""
+        return await self.db.run_sync(
+            lambda session: self._service(session).list_bookings(room_id)
+        )
+
+    async def list_bookings_page(
+        self,
+        room_id: str,
+        limit: int,
+        window_start: datetime | None = None,
+        window_end: datetime | None = None,
+        cursor: str | None = None,
+        include_history: bool = False,
+    ) -> tuple[list[Row], str | None]:
+        """List one page of a room's bookings within a time window."""
+        return await self.db.run_sync(
+            lambda session: self._service(session).list_bookings_page(
+                room_id, limit, window_start, window_end, cursor, include_history
+            )
+        )
+
+    async def list_user_bookings_page(
+        self,
+        user_name: str,
+        limit: int,
+        window_start: datetime | None = None,
+        window_end: datetime | None = None,
+        cursor: str | None = None,
+        include_history: bool = False,
+    ) -> tuple[list[Row], str | None]:
+        """List one page of a user's bookings in every room."""
+        return await self.db.run_sync(
+            lambda session: self._service(session).list_user_bookings_page(
+                user_name, limit, window_start, window_end, cursor, include_history
+            )
+        )
+
+    async def find_free_slots(
+        self,
+        room_ids: list[str],
+        window_start: datetime,
+        window_end: datetime,
+        duration: timedelta,
+    ) -> dict[str, list[tuple[datetime, datetime]]]:
+        """Find gaps of at least `duration` in each room within the window."""
+        return await self.db.run_sync(
+            lambda session: self._service(session).find_free_slots(
+                room_ids, window_start, window_end, duration
+            )
+        )
+
+    async def utilization_summary(
+        self, window_start: date, window_end: date, room_ids: list[str] | None = None
+    ) -> UtilizationSummaryResponse:
+        """Summarize booked time per room in [window_start, window_end) from the counters."""
+        return await self.db.run_sync(
+            lambda session: self._service(session).utilization_summary(window_start, window_end, room_ids)
+        )
+
+    async def iter_export_partitions(
+        self, room_id: str | None = None, chunk_size: int = EXPORT_CHUNK_SIZE
+    ) -> AsyncIterator[Sequence[Row]]:
+        """Yield bookings (one room or all) in chunks read from a streaming cursor."""
+        result = await self.db.stream(
+            export_statement(room_id).execution_options(yield_per=chunk_size)
+        )
+        try:
+            async for rows in result.partitions():
+                yield rows
+        finally:
+            await result.close()
+
+    async def get_booking(self, booking_id: str) -> Booking | BookingArchive:
+        """Get a single booking by ID, looking in the archive if it has been moved there."""
+        return await self.db.run_sync(
+            lambda session: self._service(session).get_booking(booking_id)
+        )
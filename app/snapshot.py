@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("booking_system")
+
+
+class Snapshotter:
+    """Snapshots of the in-memory database in a file, using SQLite's online backup API.
+
+    restore() copies the last snapshot into the empty in-memory database at
+    startup. snapshot() writes the database to a temporary file and then
+    renames it over the previous snapshot, so a crash mid-write never leaves
+    a truncated snapshot behind. A snapshot is skipped when the connection
+    has made no changes since the previous one.
+
+    Both check the database's single connection out of its pool, so they
+    wait for any request transaction in progress instead of running inside
+    it, and requests wait while the copy runs.
+    """
+
+    def __init__(self, engine: Engine, path: str):
+        self.engine = engine
+        self.path = path
+        self._last_changes: int | None = None
+
+    async def restore(self) -> bool:
+        """Load the snapshot into the database. Returns False if there is none."""
+        if not os.path.exists(self.path):
+            return False
+        started = time.perf_counter()
+        self._last_changes = await asyncio.to_thread(self._restore_sync)
+        logger.info("Restored database snapshot %s in %.3fs", self.path, time.perf_counter() - started)
+        return True
+
+    async def snapshot(self) -> bool:
+        """Write a snapshot if the database changed. Returns whether one was written."""
+        started = time.perf_counter()
+        changes = await asyncio.to_thread(self._snapshot_sync)
+        if changes is None:
+            return False
+        os.replace(self._temporary_path, self.path)
+        self._last_changes = changes
+        logger.info("Wrote database snapshot %s in %.3fs", self.path, time.perf_counter() - started)
+        return True
+
+    async def run(self, interval: float) -> None:
+        """Snapshot every `interval` seconds until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.snapshot()
+            except Exception as e:
+                logger.error("Database snapshot failed: %s", e)
+
+    @property
+    def _temporary_path(self) -> str:
+        return f"{self.path}.tmp"
+
+    def _open_temporary(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self._temporary_path):
+            os.remove(self._temporary_path)
+        return sqlite3.connect(self._temporary_path)
+
+    def _restore_sync(self) -> int:
+        raw = self.engine.raw_connection()
+        try:
+            source = sqlite3.connect(self.path)
+            try:
+                source.backup(raw.driver_connection)
+            finally:
+                source.close()
+            return raw.driver_connection.total_changes
+        finally:
+            raw.close()
+
+    def _snapshot_sync(self) -> int | None:
+        raw = self.engine.raw_connection()
+        try:
+            source = raw.driver_connection
+            changes = source.total_changes
+            if changes == self._last_changes:
+                return None
+            target = self._open_temporary()
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+            return changes
+        finally:
+            raw.close()
@@ -0,0 +1,211 @@
+"""Booked-time counters per room and hour, and the utilization summary built from them.
+
+Rebuild the counters from the bookings and archive tables with:
+
+    python -m app.utilization
+"""
+
+import logging
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import Insert
+
+from app.models import Booking, BookingArchive, RoomUtilization
+from app.schemas import (
+    DayUtilization,
+    HourOfWeekUtilization,
+    RoomUtilizationSummary,
+    UtilizationSummaryResponse,
+)
+
+logger = logging.getLogger("booking_system")
+
+HOUR = timedelta(hours=1)
+SECONDS_PER_DAY = 24 * 3600
+
+_COUNTER_KEY = (RoomUtilization.room_id, RoomUtilization.day, RoomUtilization.hour)
+
+# Rows read per round trip while rebuilding
+REBUILD_CHUNK_SIZE = 5000
+
+
+def hour_buckets(start: datetime, end: datetime) -> Iterator[tuple[date, int, int]]:
+    """Split [start, end) into (day, hour, seconds) pieces of whole wall-clock hours."""
+    bucket = start.replace(minute=0, second=0, microsecond=0)
+    while bucket < end:
+        next_bucket = bucket + HOUR
+        seconds = int((min(end, next_bucket) - max(start, bucket)).total_seconds())
+        if seconds:
+            yield bucket.date(), bucket.hour, seconds
+        bucket = next_bucket
+
+
+@lru_cache(maxsize=None)
+def upsert_statement(dialect: str) -> Insert | None:
+    """INSERT adding booked_seconds to an existing counter, for dialects that have one.
+
+    Executed with one row per counter. Returns None for other dialects.
+    """
+    if dialect in ("sqlite", "postgresql"):
+        statement = (sqlite if dialect == "sqlite" else postgresql).insert(RoomUtilization)
+        return statement.on_conflict_do_update(
+            index_elements=list(_COUNTER_KEY),
+            set_={"booked_seconds": RoomUtilization.booked_seconds + statement.excluded.booked_seconds},
+        )
+    if dialect in ("mysql", "mariadb"):
+        statement = mysql.insert(RoomUtilization)
+        return statement.on_duplicate_key_update(
+            booked_seconds=RoomUtilization.booked_seconds + statement.inserted.booked_seconds
+        )
+    return None
+
+
+def add_utilization(db: Session, deltas: list[dict]) -> None:
+    """Add counter changes from utilization_deltas, creating missing counters.
+
+    Uses the dialect's upsert where there is one, otherwise an UPDATE per
+    counter followed by an INSERT of the counters that did not exist.
+    """
+    if not deltas:
+        return
+    statement = upsert_statement(db.get_bind().dialect.name)
+    if statement is not None:
+        db.execute(statement, deltas)
+        return
+    missing = []
+    for delta in deltas:
+        updated = db.execute(
+            update(RoomUtilization)
+            .where(*(column == delta[column.key] for column in _COUNTER_KEY))
+            .values(booked_seconds=RoomUtilization.booked_seconds + delta["booked_seconds"])
+        )
+        if updated.rowcount == 0:
+            missing.append(delta)
+    if missing:
+        db.execute(insert(RoomUtilization), missing)
+
+
+def utilization_deltas(bookings: Iterable, sign: int = 1) -> list[dict]:
+    """Counter changes for adding (sign 1) or removing (sign -1) bookings.
+
+    Bookings are anything with room_id, start_time and end_time in naive
+    Finnish time: ORM objects, responses or rows returned by the database.
+    """
+    return [
+        {"room_id": booking.room_id, "day": day, "hour": hour, "booked_seconds": sign * seconds}
+        for booking in bookings
+        for day, hour, seconds in hour_buckets(booking.start_time, booking.end_time)
+    ]
+
+
+def rebuild_utilization(db: Session) -> int:
+    """Recompute every counter from the bookings and archive tables. Returns the number of counters.
+
+    The counters are deleted first, which takes SQLite's write lock, so no
+    booking can be created or canceled before the new counters commit.
+    """
+    db.execute(delete(RoomUtilization))
+    totals: dict[tuple[str, date, int], int] = defaultdict(int)
+    for model in (Booking, BookingArchive):
+        result = db.execute(
+            select(model.room_id, model.start_time, model.end_time),
+            execution_options={"yield_per": REBUILD_CHUNK_SIZE},
+        )
+        for room_id, start, end in result:
+            for day, hour, seconds in hour_buckets(start, end):
+                totals[room_id, day, hour] += seconds
+    if totals:
+        db.execute(
+            insert(RoomUtilization),
+            [
+                {"room_id": room_id, "day": day, "hour": hour, "booked_seconds": seconds}
+                for (room_id, day, hour), seconds in totals.items()
+            ],
+        )
+    db.commit()
+    logger.info("Rebuilt %d utilization counters", len(totals))
+    return len(totals)
+
+
+def utilization_summary(
+    db: Session, window_start: date, window_end: date, room_ids: list[str] | None = None
+) -> UtilizationSummaryResponse:
+    """Summarize booked time per room in [window_start, window_end) by day and by hour of week.
+
+    Reads at most one counter per room and hour of the window, however many
+    bookings there are. Rooms without bookings in the window are left out.
+    """
+    query = select(
+        RoomUtilization.room_id, RoomUtilization.day, RoomUtilization.hour, RoomUtilization.booked_seconds
+    ).where(RoomUtilization.day >= window_start, RoomUtilization.day < window_end)
+    if room_ids:
+        query = query.where(RoomUtilization.room_id.in_(room_ids))
+
+    by_day: dict[str, dict[date, int]] = defaultdict(lambda: defaultdict(int))
+    by_hour_of_week: dict[str, dict[tuple[int, int], int]] = defaultdict(lambda: defaultdict(int))
+    for room_id, day, hour, seconds in db.execute(query.order_by(RoomUtilization.room_id)):
+        if seconds:
+            by_day[room_id][day] += seconds
+            by_hour_of_week[room_id][day.weekday(), hour] += seconds
+
+    days = (window_end - window_start).days
+    weekday_counts = [0] * 7
+    for offset in range(days):
+        weekday_counts[(window_start + timedelta(days=offset)).weekday()] += 1
+
+    rooms = []
+    for room_id, day_seconds in by_day.items():
+        total = sum(day_seconds.values())
+        rooms.append(RoomUtilizationSummary(
+            room_id=room_id,
+            booked_minutes=_minutes(total),
+            occupancy_percent=_percent(total, days * SECONDS_PER_DAY),
+            by_day=[
+                DayUtilization(
+                    day=day,
+                    booked_minutes=_minutes(seconds),
+                    occupancy_percent=_percent(seconds, SECONDS_PER_DAY),
+                )
+                for day, seconds in sorted(day_seconds.items())
+            ],
+            by_hour_of_week=[
+                HourOfWeekUtilization(
+                    weekday=weekday,
+                    hour=hour,
+                    booked_minutes=_minutes(seconds),
+                    occupancy_percent=_percent(seconds, weekday_counts[weekday] * 3600),
+                )
+                for (weekday, hour), seconds in sorted(by_hour_of_week[room_id].items())
+            ],
+        ))
+    return UtilizationSummaryResponse(window_start=window_start, window_end=window_end, rooms=rooms)
+
+
+def _minutes(seconds: int) -> float:
+    return round(seconds / 60, 2)
+
+
+def _percent(seconds: int, available: int) -> float:
+    return round(100 * seconds / available, 2) if available else 0.0
+
+
+def main() -> None:
+    from app.database import SessionLocal, init_db
+
+    init_db()
+    db = SessionLocal()
+    try:
+        count = rebuild_utilization(db)
+    finally:
+        db.close()
+    print(f"Rebuilt {count} utilization counters")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,430 @@
+"""Benchmarks for the booking API and service layer.
+
+Runs in-process: HTTP scenarios go through the ASGI app with an httpx client,
+service scenarios call BookingService directly. Each scenario gets a fresh
+file-backed SQLite database configured like production (WAL, PRAGMAs, pools).
+
+    python -m benchmarks.run                    # full run, writes bench_results.json
+    python -m benchmarks.run --quick
+    python -m benchmarks.run --baseline benchmarks/baseline.json --tolerance 0.25
+
+A run's output file can be kept as the baseline of later runs; the process
+exits with status 1 if any scenario regressed beyond the tolerance.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from app.cache import room_listing_cache
+from app.config import get_settings
+from app.database import (
+    Base, create_async_db_engine, create_db_engine, get_async_db, get_async_read_db, get_db, get_read_db,
+)
+from app.interval_index import booking_index
+from app.main import app
+from app.models import Booking
+from app.schemas import BookingCreate, BookingListResponse, BookingResponse, FINNISH_TZ
+from app.services import BookingService
+
+# Every booking fills one slot; slots are spaced so a room holds 90 days of them
+SLOT = timedelta(minutes=30)
+
+
+@dataclass
+class BenchmarkConfig:
+    ops: int = 500
+    concurrency: tuple[int, ...] = (1, 8, 32)
+    bookings_per_room: tuple[int, ...] = (10, 100, 1000)
+    rooms: tuple[int, ...] = (1, 10, 100)
+    use_index: bool = True
+
+
+QUICK = BenchmarkConfig(ops=100, concurrency=(1, 8), bookings_per_room=(10, 100), rooms=(1, 10))
+
+
+@dataclass
+class Result:
+    name: str
+    ops: int
+    seconds: float
+    latencies: list[float] = field(repr=False)
+    errors: int = 0
+
+    def to_dict(self) -> dict:
+        ordered = sorted(self.latencies)
+        return {
+            "ops": self.ops,
+            "errors": self.errors,
+            "seconds": round(self.seconds, 6),
+            "throughput": round(self.ops / self.seconds, 2) if self.seconds else None,
+            "mean_ms": round(statistics.fmean(ordered) * 1000, 4),
+            "p50_ms": round(_percentile(ordered, 0.50) * 1000, 4),
+            "p99_ms": round(_percentile(ordered, 0.99) * 1000, 4),
+        }
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def slot(index: int) -> tuple[datetime, datetime]:
+    """Return the index-th non-overlapping slot, starting tomorrow at midnight."""
+    base = (datetime.now(FINNISH_TZ) + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    start = base + index * SLOT
+    return start, start + SLOT
+
+
+def booking_payload(room_id: str, index: int) -> dict:
+    start, end = slot(index)
+    return {
+        "room_id": room_id,
+        "start_time": start.isoformat(),
+        "end_time": end.isoformat(),
+        "user_name": "bench",
+    }
+
+
+class BenchmarkDatabase:
+    """A throwaway file database wired into the app's dependencies."""
+
+    def __init__(self, directory: str, use_index: bool):
+        self.settings = replace(get_settings(), database_url=f"sqlite:///{directory}/bench.db")
+        self.use_index = use_index
+        self.engine = create_db_engine(self.settings)
+        self.read_engine = create_db_engine(self.settings, read_only=True)
+        self.Session = sessionmaker(autoflush=False, bind=self.engine)
+        self.ReadSession = sessionmaker(autoflush=False, bind=self.read_engine)
+        self.async_engines = []
+        self._saved_overrides = dict(app.dependency_overrides)
+        if self.settings.async_db:
+            self._wire_async()
+        app.dependency_overrides[get_db] = self._dependency(self.Session)
+        app.dependency_overrides[get_read_db] = self._dependency(self.ReadSession)
+
+    @staticmethod
+    def _dependency(factory):
+        def provide():
+            db = factory()
+            try:
+                yield db
+            finally:
+                db.close()
+        return provide
+
+    def _wire_async(self) -> None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        write = create_async_db_engine(self.settings)
+        read = create_async_db_engine(self.settings, read_only=True)
+        self.async_engines = [write, read]
+        for dependency, engine in ((get_async_db, write), (get_async_read_db, read)):
+            factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+            async def provide(factory=factory):
+                async with factory() as db:
+                    yield db
+
+            app.dependency_overrides[dependency] = provide
+
+    def reset(self, rooms: int = 0, bookings_per_room: int = 0) -> None:
+        """Recreate the schema, insert the given bookings and reload the index."""
+        Base.metadata.drop_all(self.engine)
+        Base.metadata.create_all(self.engine)
+        booking_index.clear()
+        room_listing_cache.clear()
+        if rooms and bookings_per_room:
+            rows = []
+            for room in range(rooms):
+                for index in range(bookings_per_room):
+                    start, end = slot(index)
+                    rows.append({
+                        "room_id": f"room-{room}",
+                        "start_time": start,
+                        "end_time": end,
+                        "user_name": "seed",
+                    })
+            with self.Session() as db:
+                db.execute(insert(Booking), rows)
+                db.commit()
+        if self.use_index:
+            with self.Session() as db:
+                booking_index.load(db)
+
+    def close(self) -> None:
+        app.dependency_overrides.clear()
+        app.dependency_overrides.update(self._saved_overrides)
+        booking_index.clear()
+        room_listing_cache.clear()
+        for engine in self.async_engines:
+            asyncio.run(engine.dispose())
+        self.engine.dispose()
+        self.read_engine.dispose()
+
+
+# ============================================================================
+# HTTP SCENARIOS
+# ============================================================================
+
+Call = tuple[str, str, dict | None]
+
+
+async def _run_calls(client: httpx.AsyncClient, name: str, calls: Iterable[Call], concurrency: int,
+                     expected: int) -> tuple[Result, list[httpx.Response]]:
+    calls = list(calls)
+    pending = iter(calls)
+    latencies: list[float] = []
+    responses: list[httpx.Response] = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        # Workers share one iterator, so each call is made exactly once
+        for method, url, body in pending:
+            started = time.perf_counter()
+            response = await client.request(method, url, json=body)
+            latencies.append(time.perf_counter() - started)
+            responses.append(response)
+            if response.status_code != expected:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return Result(name, len(calls), time.perf_counter() - started, latencies, errors), responses
+
+
+def _client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+
+async def http_crud(db: BenchmarkDatabase, config: BenchmarkConfig) -> list[Result]:
+    """Create, get, list and cancel throughput at each concurrency level."""
+    results = []
+    rooms = 50
+    for concurrency in config.concurrency:
+        db.reset()
+        async with _client() as client:
+            creates = (("POST", "/bookings/", booking_payload(f"room-{i % rooms}", i // rooms))
+                       for i in range(config.ops))
+            result, responses = await _run_calls(client, f"http.create.c{concurrency}", creates, concurrency, 201)
+            results.append(result)
+            ids = [response.json()["id"] for response in responses if response.status_code == 201]
+
+            gets = (("GET", f"/bookings/{booking_id}", None) for booking_id in ids)
+            results.append((await _run_calls(client, f"http.get.c{concurrency}", gets, concurrency, 200))[0])
+
+            lists = (("GET", f"/bookings/room/room-{i % rooms}", None) for i in range(config.ops))
+            results.append((await _run_calls(client, f"http.list.c{concurrency}", lists, concurrency, 200))[0])
+
+            cancels = (("DELETE", f"/bookings/{booking_id}", None) for booking_id in ids)
+            results.append((await _run_calls(client, f"http.cancel.c{concurrency}", cancels, concurrency, 204))[0])
+    return results
+
+
+async def http_bookings_per_room(db: BenchmarkDatabase, config: BenchmarkConfig) -> list[Result]:
+    """Create and list latency in a room that already holds N bookings."""
+    results = []
+    for per_room in config.bookings_per_room:
+        db.reset(rooms=1, bookings_per_room=per_room)
+        async with _client() as client:
+            # New bookings go after the seeded ones, so every create passes the conflict check
+            creates = (("POST", "/bookings/", booking_payload("room-0", per_room + i)) for i in range(config.ops))
+            results.append((await _run_calls(client, f"http.create.per_room_{per_room}", creates, 1, 201))[0])
+            lists = (("GET", "/bookings/room/room-0", None) for _ in range(config.ops))
+            results.append((await _run_calls(client, f"http.list.per_room_{per_room}", lists, 1, 200))[0])
+    return results
+
+
+async def http_rooms(db: BenchmarkDatabase, config: BenchmarkConfig) -> list[Result]:
+    """Create latency as the number of rooms in the database grows."""
+    results = []
+    concurrency = max(config.concurrency)
+    for rooms in config.rooms:
+        db.reset(rooms=rooms, bookings_per_room=20)
+        async with _client() as client:
+            creates = (("POST", "/bookings/", booking_payload(f"room-{i % rooms}", 20 + i // rooms))
+                       for i in range(config.ops))
+            results.append((await _run_calls(client, f"http.create.rooms_{rooms}", creates, concurrency, 201))[0])
+    return results
+
+
+async def http_single_room_contention(db: BenchmarkDatabase, config: BenchmarkConfig) -> list[Result]:
+    """Concurrent creates of distinct slots in one room (serialized by the room lock)."""
+    results = []
+    for concurrency in config.concurrency:
+        db.reset()
+        async with _client() as client:
+            creates = (("POST", "/bookings/", booking_payload("room-0", i)) for i in range(config.ops))
+            name = f"http.create.single_room.c{concurrency}"
+            results.append((await _run_calls(client, name, creates, concurrency, 201))[0])
+    return results
+
+
+# ============================================================================
+# SERVICE MICROBENCHMARKS
+# ============================================================================
+
+def _time_each(name: str, items: Iterable, operation: Callable) -> Result:
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+    for item in items:
+        op_started = time.perf_counter()
+        try:
+            operation(item)
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - op_started)
+    return Result(name, len(latencies), time.perf_counter() - started, latencies, errors)
+
+
+def service_operations(db: BenchmarkDatabase, config: BenchmarkConfig) -> list[Result]:
+    """BookingService create/get/list/cancel without the HTTP layer."""
+    db.reset(rooms=10, bookings_per_room=100)
+    ids = []
+    with db.Session() as session:
+        service = BookingService(session)
+
+        def create(i):
+            booking = service.create_booking(BookingCreate(**booking_payload(f"room-{i % 10}", 100 + i // 10)))
+            ids.append(booking.id)
+
+        def list_room(i):
+            # Includes serialization, which the HTTP listing caches
+            bookings = service.list_bookings(f"room-{i % 10}")
+            BookingListResponse(
+                bookings=[BookingResponse.model_validate(b) for b in bookings], count=len(bookings)
+            ).model_dump_json()
+
+        results = [
+            _time_each("service.create", range(config.ops), create),
+            _time_each("service.get", ids, service.get_booking),
+            _time_each("service.list", range(config.ops), list_room),
+            _time_each("service.cancel", list(ids), service.cancel_booking),
+        ]
+    return results
+
+
+SCENARIOS = {
+    "crud": http_crud,
+    "bookings_per_room": http_bookings_per_room,
+    "rooms": http_rooms,
+    "contention": http_single_room_contention,
+    "service": service_operations,
+}
+
+
+def run(config: BenchmarkConfig, scenarios: Iterable[str] = SCENARIOS) -> dict:
+    """Run the selected scenarios and return the results document."""
+    results: dict[str, dict] = {}
+    with tempfile.TemporaryDirectory(prefix="bench-") as directory:
+        db = BenchmarkDatabase(directory, config.use_index)
+        try:
+            for scenario in scenarios:
+                outcome = SCENARIOS[scenario](db, config)
+                if asyncio.iscoroutine(outcome):
+                    outcome = asyncio.run(outcome)
+                for result in outcome:
+                    results[result.name] = result.to_dict()
+        finally:
+            db.close()
+    return {
+        "meta": {
+            "timestamp": datetime.now(FINNISH_TZ).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "async_db": get_settings().async_db,
+            "booking_time_storage": get_settings().booking_time_storage,
+            "use_index": config.use_index,
+            "ops": config.ops,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> Iterator[str]:
+    """Yield a description of every scenario that regressed against the baseline.
+
+    A scenario regresses if its median latency grew, or its throughput fell,
+    by more than the tolerance (a fraction). Scenarios missing from either
+    run are ignored.
+    """
+    for name, result in current["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        if result["p50_ms"] > previous["p50_ms"] * (1 + tolerance):
+            yield f"{name}: p50 {previous['p50_ms']:.3f} ms -> {result['p50_ms']:.3f} ms"
+        if previous["throughput"] and result["throughput"] < previous["throughput"] * (1 - tolerance):
+            yield f"{name}: throughput {previous['throughput']:.1f}/s -> {result['throughput']:.1f}/s"
+
+
+@contextmanager
+def _quiet_client_logs() -> Iterator[None]:
+    # httpx logs every request; that is client overhead, not the API's
+    httpx_logger = logging.getLogger("httpx")
+    level = httpx_logger.level
+    httpx_logger.setLevel(logging.WARNING)
+    try:
+        yield
+    finally:
+        httpx_logger.setLevel(level)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Booking API benchmarks")
+    parser.add_argument("--quick", action="store_true", help="fewer operations and scaling points")
+    parser.add_argument("--ops", type=int, help="operations per measurement")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="run only these")
+    parser.add_argument("--no-index", action="store_true", help="check conflicts in the database only")
+    parser.add_argument("--output", default="bench_results.json", help="where to write the results")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed regression (fraction)")
+    args = parser.parse_args(argv)
+
+    config = QUICK if args.quick else BenchmarkConfig()
+    config = replace(config, use_index=not args.no_index)
+    if args.ops:
+        config = replace(config, ops=args.ops)
+
+    with _quiet_client_logs():
+        document = run(config, args.scenario or SCENARIOS)
+
+    with open(args.output, "w") as f:
+        json.dump(document, f, indent=2)
+
+    for name, result in document["results"].items():
+        print(f"{name:40} {result['throughput']:>10}/s  p50 {result['p50_ms']:>9.3f} ms  "
+              f"p99 {result['p99_ms']:>9.3f} ms  errors {result['errors']}")
+    print(f"Results written to {os.path.abspath(args.output)}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = list(compare(document, baseline, args.tolerance))
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
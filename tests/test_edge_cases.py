@@ -8,17 +8,35 @@ Note: This system uses Finnish timezone (Europe/Helsinki) as the default.
 import pytest
 from datetime import datetime, timezone, timedelta
 from zoneinfo import ZoneInfo
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
+import csv
+import io
+import json
+import logging
+import queue
 import threading
 import time
 
 from app.main import app
-from app.database import Base, get_db
-from app.models import Booking
-from app.schemas import BookingCreate, FINNISH_TZ
+from app.async_routes import router as async_router
+from app.cache import RoomListingCache, room_listing_cache
+from app.config import Settings
+from app.database import (
+    Base, create_db_engine, get_async_db, get_async_read_db, get_db, get_read_db, to_async_url,
+)
+from app.idempotency import idempotency_store
+from app.interval_index import RoomIntervalIndex, booking_index
+from app.locks import RoomLockManager
+from app.logging_config import JsonFormatter, LogThrottle, NonBlockingQueueHandler
+from app.metrics import MetricsRegistry
+from app.models import Booking, BookingTime, EpochSeconds
+from app.schemas import BookingCreate, FINNISH_TZ, RecurrenceRule, RecurringBookingCreate
+from app.recurrence import expand_occurrences
 from app.services import BookingService
 from app.exceptions import BookingConflictError, BookingValidationError
 
@@ -44,6 +62,7 @@ def override_get_db():
 
 
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_read_db] = override_get_db
 client = TestClient(app)
 
 
@@ -53,6 +72,9 @@ def setup_database():
     Base.metadata.create_all(bind=engine)
     yield
     Base.metadata.drop_all(bind=engine)
+    booking_index.clear()
+    room_listing_cache.clear()
+    idempotency_store.clear()
 
 
 @pytest.fixture
@@ -688,6 +710,59 @@ class TestServiceLayer:
         bookings = service.list_bookings("room-1")
         assert len(bookings) == 0
 
+    def test_create_is_a_single_insert(self, db_session):
+        """Test that an indexed create writes one INSERT (plus its utilization counters) and returns the stored values."""
+        from sqlalchemy import event
+
+        index = RoomIntervalIndex()
+        index.load(db_session)
+        service = BookingService(db_session, index=index)
+        start = datetime.now(FINNISH_TZ) + timedelta(days=1)
+
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement.split()[0])
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            booking = service.create_booking(BookingCreate(
+                room_id="room-1", start_time=start, end_time=start + timedelta(hours=1), user_name="User 1"
+            ))
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+        # The booking, then one upsert of the hour's utilization counter
+        assert statements == ["INSERT", "INSERT"]
+        stored = db_session.get(Booking, booking.id)
+        assert (stored.start_time, stored.end_time, stored.created_at) == (
+            booking.start_time, booking.end_time, booking.created_at
+        )
+
+    def test_create_fails_if_insert_writes_no_row(self, db_session):
+        """Test that an INSERT that silently writes nothing fails the create and frees the slot."""
+        index = RoomIntervalIndex()
+        index.load(db_session)
+        service = BookingService(db_session, index=index)
+        start = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        booking = BookingCreate(
+            room_id="room-1", start_time=start, end_time=start + timedelta(hours=1), user_name="User 1"
+        )
+
+        db_session.execute(text(
+            "CREATE TRIGGER skip_bookings BEFORE INSERT ON bookings BEGIN SELECT RAISE(IGNORE); END"
+        ))
+        db_session.commit()
+        try:
+            with pytest.raises(RuntimeError):
+                service.create_booking(booking)
+        finally:
+            db_session.execute(text("DROP TRIGGER skip_bookings"))
+            db_session.commit()
+
+        assert db_session.query(Booking).count() == 0
+        assert service.create_booking(booking).room_id == "room-1"
+
 
 # ============================================================================
 # INTEGRATION TESTS
@@ -761,3 +836,2310 @@ class TestEndToEndScenarios:
         assert data["status"] == "healthy"
         assert data["database"] == "connected"
         assert "timestamp" in data
+
+
+# ============================================================================
+# INTERVAL INDEX TESTS
+# ============================================================================
+
+class TestIntervalIndex:
+    """Test the in-memory per-room interval index used for conflict checks."""
+
+    def test_reserve_detects_overlap_and_allows_touching(self):
+        """Test that overlapping slots conflict and edge-touching slots do not."""
+        index = RoomIntervalIndex()
+        start = datetime(2030, 1, 1, 10, 0)
+
+        assert index.reserve("room-1", start, start + timedelta(hours=1), "a") is None
+        conflict = index.reserve(
+            "room-1", start + timedelta(minutes=30), start + timedelta(hours=2), "b"
+        )
+        assert conflict is not None and conflict[2] == "a"
+        assert index.reserve("room-1", start + timedelta(hours=1), start + timedelta(hours=2), "c") is None
+        assert index.reserve("room-2", start, start + timedelta(hours=1), "d") is None
+
+    def test_aware_and_naive_times_compare_as_finnish_wall_time(self):
+        """Test that aware inputs are normalized to the naive form stored in the database."""
+        index = RoomIntervalIndex()
+        start = datetime(2030, 6, 1, 10, 0)
+        index.reserve("room-1", start, start + timedelta(hours=1), "a")
+
+        utc_start = start.replace(tzinfo=FINNISH_TZ).astimezone(timezone.utc)
+        assert index.find_conflict("room-1", utc_start, utc_start + timedelta(minutes=15)) is not None
+
+    def test_remove_frees_slot(self):
+        """Test that removing a booking makes its slot available again."""
+        index = RoomIntervalIndex()
+        start = datetime(2030, 1, 1, 10, 0)
+        index.reserve("room-1", start, start + timedelta(hours=1), "a")
+
+        assert index.remove("room-1", "a", start)
+        assert not index.remove("room-1", "a", start)
+        assert index.find_conflict("room-1", start, start + timedelta(hours=1)) is None
+
+    def test_service_uses_loaded_index(self, db_session):
+        """Test that create and cancel keep a loaded index in sync with the database."""
+        future_time = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        service = BookingService(db_session)
+        existing = service.create_booking(BookingCreate(
+            room_id="room-1",
+            start_time=future_time,
+            end_time=future_time + timedelta(hours=1),
+            user_name="User 1"
+        ))
+
+        booking_index.load(db_session)
+        assert booking_index.find_conflict("room-1", future_time, future_time + timedelta(minutes=15))
+
+        with pytest.raises(BookingConflictError):
+            service.create_booking(BookingCreate(
+                room_id="room-1",
+                start_time=future_time + timedelta(minutes=30),
+                end_time=future_time + timedelta(hours=2),
+                user_name="User 2"
+            ))
+
+        service.cancel_booking(existing.id)
+        assert booking_index.find_conflict("room-1", future_time, future_time + timedelta(hours=1)) is None
+
+        created = service.create_booking(BookingCreate(
+            room_id="room-1",
+            start_time=future_time + timedelta(minutes=30),
+            end_time=future_time + timedelta(hours=2),
+            user_name="User 2"
+        ))
+        assert [b.id for b in service.list_bookings("room-1")] == [created.id]
+
+    def test_shared_boundary_slot_after_cancel(self):
+        """Test that bookings meeting inside one 15 minute slot stay exact in the occupancy bitmap."""
+        index = RoomIntervalIndex()
+        base = (datetime.now(FINNISH_TZ) + timedelta(days=1)).replace(hour=10, minute=0, second=0, microsecond=0)
+        assert index.reserve("room-1", base, base + timedelta(minutes=20), "a") is None
+        assert index.reserve("room-1", base + timedelta(minutes=20), base + timedelta(minutes=40), "b") is None
+
+        index.remove("room-1", "a", base)
+        # The slot 10:15-10:30 is still partly taken by "b", but 10:00-10:20 is free
+        assert index.find_conflict("room-1", base, base + timedelta(minutes=20)) is None
+        assert index.find_conflict("room-1", base + timedelta(minutes=10), base + timedelta(minutes=25))[2] == "b"
+
+        index.remove("room-1", "b", base + timedelta(minutes=20))
+        assert index.overlapping("room-1", base, base + timedelta(hours=1)) == []
+
+    def test_bookings_before_bitmap_origin(self):
+        """Test that bookings older than the occupancy bitmap are still found."""
+        index = RoomIntervalIndex()
+        past = (datetime.now(FINNISH_TZ) - timedelta(days=10)).replace(minute=0, second=0, microsecond=0)
+        index.reserve("room-1", past, past + timedelta(hours=1), "old")
+        assert index.find_conflict("room-1", past, past + timedelta(minutes=15))[2] == "old"
+        assert [iv[2] for iv in index.overlapping("room-1", past, past + timedelta(days=20))] == ["old"]
+
+
+# ============================================================================
+# DATABASE CONFIGURATION TESTS
+# ============================================================================
+
+class TestDatabaseConfiguration:
+    """Test environment-driven engine configuration."""
+
+    def test_settings_read_from_environment(self, monkeypatch):
+        """Test that settings are parsed from environment variables."""
+        monkeypatch.setenv("DATABASE_URL", "sqlite:///bookings.db")
+        monkeypatch.setenv("DB_POOL_SIZE", "2")
+        monkeypatch.setenv("SQLITE_SYNCHRONOUS", "full")
+        settings = Settings.from_env()
+        assert settings.database_url == "sqlite:///bookings.db"
+        assert settings.db_pool_size == 2
+        assert settings.sqlite_synchronous == "full"
+        assert settings.sqlite_journal_mode == "WAL"
+
+    def test_invalid_integer_setting_rejected(self, monkeypatch):
+        """Test that a malformed integer setting fails loudly."""
+        monkeypatch.setenv("DB_POOL_SIZE", "many")
+        with pytest.raises(ValueError, match="DB_POOL_SIZE"):
+            Settings.from_env()
+
+    def test_file_database_uses_wal_and_pragmas(self, tmp_path):
+        """Test that file-backed SQLite gets a pooled WAL engine with tuned PRAGMAs."""
+        settings = Settings(database_url=f"sqlite:///{tmp_path / 'bookings.db'}", sqlite_cache_size=-2000)
+        writer = create_db_engine(settings)
+        reader = create_db_engine(settings, read_only=True)
+        try:
+            assert not isinstance(writer.pool, StaticPool)
+            with writer.connect() as conn:
+                assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+                assert conn.execute(text("PRAGMA cache_size")).scalar() == -2000
+                conn.execute(text("CREATE TABLE t (x INTEGER)"))
+                conn.commit()
+            with reader.connect() as conn:
+                assert conn.execute(text("SELECT count(*) FROM t")).scalar() == 0
+                with pytest.raises(Exception):
+                    conn.execute(text("INSERT INTO t VALUES (1)"))
+        finally:
+            writer.dispose()
+            reader.dispose()
+
+    def test_unsupported_pragma_value_rejected(self, tmp_path):
+        """Test that PRAGMA values outside the allowed set are rejected."""
+        settings = Settings(database_url=f"sqlite:///{tmp_path / 'bookings.db'}", sqlite_journal_mode="bogus")
+        with pytest.raises(ValueError, match="SQLITE_JOURNAL_MODE"):
+            create_db_engine(settings)
+
+
+# ============================================================================
+# ASYNC MODE TESTS
+# ============================================================================
+
+class TestAsyncMode:
+    """Test the async request path on an aiosqlite AsyncEngine."""
+
+    @pytest.fixture
+    def async_client(self):
+        """Provide a client for an app serving the async router on its own database."""
+        async_engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+        AsyncTestingSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+        async def override_get_async_db():
+            async with AsyncTestingSessionLocal() as db:
+                yield db
+
+        async def create_tables():
+            async with async_engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+
+        async_app = FastAPI()
+        async_app.include_router(async_router)
+        for exc_class, handler in app.exception_handlers.items():
+            async_app.add_exception_handler(exc_class, handler)
+        async_app.dependency_overrides[get_async_db] = override_get_async_db
+        async_app.dependency_overrides[get_async_read_db] = override_get_async_db
+
+        with TestClient(async_app) as async_test_client:
+            async_test_client.portal.call(create_tables)
+            yield async_test_client
+            async_test_client.portal.call(async_engine.dispose)
+
+    def test_async_url_uses_aiosqlite(self):
+        """Test that SQLite URLs are mapped to the aiosqlite driver."""
+        assert to_async_url("sqlite:///:memory:") == "sqlite+aiosqlite:///:memory:"
+        assert to_async_url("sqlite:///./bookings.db") == "sqlite+aiosqlite:///./bookings.db"
+
+    def test_async_booking_lifecycle(self, async_client):
+        """Test create, conflict, list, get and cancel through the async routes."""
+        future_time = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        payload = {
+            "room_id": "room-async",
+            "start_time": future_time.isoformat(),
+            "end_time": (future_time + timedelta(hours=1)).isoformat(),
+            "user_name": "Async User"
+        }
+
+        create_response = async_client.post("/bookings/", json=payload)
+        assert create_response.status_code == 201
+        booking_id = create_response.json()["id"]
+
+        conflict_response = async_client.post("/bookings/", json=payload)
+        assert conflict_response.status_code == 409
+
+        list_response = async_client.get("/bookings/room/room-async")
+        assert list_response.json()["count"] == 1
+        assert async_client.get(f"/bookings/{booking_id}").status_code == 200
+
+        assert async_client.delete(f"/bookings/{booking_id}").status_code == 204
+        assert async_client.get(f"/bookings/{booking_id}").status_code == 404
+
+    def test_async_requires_file_database(self):
+        """Test that async mode rejects the in-memory database, whose one connection coroutines would share."""
+        with pytest.raises(ValueError, match="ASYNC_DB"):
+            Settings(async_db=True)
+        Settings(async_db=True, database_url="sqlite:///./bookings.db")
+
+    def test_shutdown_leaves_no_threads(self, tmp_path):
+        """Test that an async-mode process exits after lifespan shutdown disposes the engines."""
+        import os
+        import subprocess
+        import sys
+
+        script = (
+            "import asyncio, threading\n"
+            "from app.main import app, lifespan\n"
+            "async def run():\n"
+            "    async with lifespan(app):\n"
+            "        pass\n"
+            "asyncio.run(run())\n"
+            "others = [t for t in threading.enumerate() if t is not threading.main_thread() and not t.daemon]\n"
+            "for thread in others:\n"
+            "    thread.join(5)\n"
+            "print([t.name for t in others if t.is_alive()])\n"
+        )
+        env = {**os.environ, "ASYNC_DB": "true", "DATABASE_URL": f"sqlite:///{tmp_path / 'bookings.db'}"}
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip().splitlines()[-1] == "[]"
+
+    def test_async_concurrent_idempotent_retry(self, tmp_path, monkeypatch):
+        """Test that an async retry arriving while the original is in flight gets the replayed 201."""
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+        from app.services import AsyncBookingService
+
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'bookings.db'}")
+        AsyncFileSession = async_sessionmaker(async_engine, expire_on_commit=False)
+
+        async def override():
+            async with AsyncFileSession() as db:
+                yield db
+
+        async def create_tables():
+            async with async_engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+
+        in_create = threading.Event()
+        original_create = AsyncBookingService.create_booking
+
+        async def slow_create(self, booking_data):
+            in_create.set()
+            await asyncio.sleep(0.3)
+            return await original_create(self, booking_data)
+
+        monkeypatch.setattr(AsyncBookingService, "create_booking", slow_create)
+        async_app = FastAPI()
+        async_app.include_router(async_router)
+        for exc_class, handler in app.exception_handlers.items():
+            async_app.add_exception_handler(exc_class, handler)
+        async_app.dependency_overrides[get_async_db] = override
+        async_app.dependency_overrides[get_async_read_db] = override
+
+        start = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        payload = {
+            "room_id": "room-async",
+            "start_time": start.isoformat(),
+            "end_time": (start + timedelta(hours=1)).isoformat(),
+            "user_name": "Async User",
+        }
+        headers = {"Idempotency-Key": "async-concurrent"}
+        with TestClient(async_app) as async_client:
+            async_client.portal.call(create_tables)
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                first = pool.submit(async_client.post, "/bookings/", json=payload, headers=headers)
+                assert in_create.wait(5)
+                second = pool.submit(async_client.post, "/bookings/", json=payload, headers=headers)
+                first, second = first.result(timeout=10), second.result(timeout=10)
+            assert async_client.get("/bookings/room/room-async").json()["count"] == 1
+            async_client.portal.call(async_engine.dispose)
+
+        assert (first.status_code, second.status_code) == (201, 201)
+        assert second.json() == first.json()
+        assert second.headers["idempotent-replayed"] == "true"
+
+    def test_concurrent_creates_with_change_feed(self, async_client):
+        """Test that concurrent async creates syncing the change feed do not stall the event loop."""
+        from concurrent.futures import ThreadPoolExecutor
+        from app.change_feed import change_feed, configure_change_triggers
+
+        def enable(session):
+            configure_change_triggers(session, enabled=True)
+            session.commit()
+            change_feed.start(session)
+
+        async def enable_feed():
+            async for db in async_client.app.dependency_overrides[get_async_db]():
+                await db.run_sync(enable)
+
+        async_client.portal.call(enable_feed)
+        start = datetime.now(FINNISH_TZ) + timedelta(days=1)
+
+        def create(i):
+            return async_client.post("/bookings/", json={
+                "room_id": f"room-feed-{i}",
+                "start_time": start.isoformat(),
+                "end_time": (start + timedelta(hours=1)).isoformat(),
+                "user_name": "Async User",
+            }).status_code
+
+        try:
+            with ThreadPoolExecutor(max_workers=20) as pool:
+                futures = [pool.submit(create, i) for i in range(20)]
+                assert [future.result(timeout=10) for future in futures] == [201] * 20
+        finally:
+            change_feed.stop()
+
+    def test_async_utilization_summary(self, async_client):
+        """Test that async creates update the counters read by the async summary."""
+        day = datetime.now(FINNISH_TZ).replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=2)
+        response = async_client.post("/bookings/", json={
+            "room_id": "room-async",
+            "start_time": (day + timedelta(hours=9)).isoformat(),
+            "end_time": (day + timedelta(hours=10, minutes=30)).isoformat(),
+            "user_name": "Async User",
+        })
+        assert response.status_code == 201
+
+        summary = async_client.get("/bookings/utilization", params={
+            "from": day.date().isoformat(), "to": (day + timedelta(days=1)).date().isoformat(),
+        }).json()
+        assert [(room["room_id"], room["booked_minutes"]) for room in summary["rooms"]] == [("room-async", 90)]
+
+    def test_async_idempotent_create(self, async_client):
+        """Test that the async create replays a response for a repeated Idempotency-Key."""
+        future_time = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        payload = {
+            "room_id": "room-async",
+            "start_time": future_time.isoformat(),
+            "end_time": (future_time + timedelta(hours=1)).isoformat(),
+            "user_name": "Async User"
+        }
+        headers = {"Idempotency-Key": "async-key"}
+
+        first = async_client.post("/bookings/", json=payload, headers=headers)
+        idempotency_store.clear()  # force the replay to come from the database
+        second = async_client.post("/bookings/", json=payload, headers=headers)
+        assert first.status_code == second.status_code == 201
+        assert second.json() == first.json()
+        assert second.headers["idempotent-replayed"] == "true"
+
+    def test_async_export_streams_rows(self, async_client):
+        """Test that the async export streams rows from the async session."""
+        future_time = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        for i in range(3):
+            start = future_time + timedelta(hours=2 * i)
+            async_client.post(
+                "/bookings/",
+                json={
+                    "room_id": "room-async",
+                    "start_time": start.isoformat(),
+                    "end_time": (start + timedelta(hours=1)).isoformat(),
+                    "user_name": "Async User"
+                }
+            )
+
+        response = async_client.get("/bookings/export", params={"format": "csv"})
+        assert response.status_code == 200
+        assert len(list(csv.DictReader(io.StringIO(response.text)))) == 3
+
+    def test_async_service_shares_booking_rules(self, async_client):
+        """Test that the async service enforces the same validation as the sync one."""
+        past_time = datetime.now(FINNISH_TZ) - timedelta(hours=1)
+        response = async_client.post(
+            "/bookings/",
+            json={
+                "room_id": "room-async",
+                "start_time": past_time.isoformat(),
+                "end_time": (past_time + timedelta(hours=1)).isoformat(),
+                "user_name": "Async User"
+            }
+        )
+        assert response.status_code == 400
+        assert "past" in response.json()["detail"].lower()
+
+
+# ============================================================================
+# BATCH BOOKING TESTS
+# ============================================================================
+
+class TestBatchBookings:
+    """Test batch creation with per-item results."""
+
+    @staticmethod
+    def _item(room_id, start, hours=1, user_name="Batch User"):
+        return {
+            "room_id": room_id,
+            "start_time": start.isoformat(),
+            "end_time": (start + timedelta(hours=hours)).isoformat(),
+            "user_name": user_name,
+        }
+
+    def test_batch_reports_result_per_item(self):
+        """Test that conflicts within the batch and with stored bookings are reported per item."""
+        base = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        stored = client.post("/bookings/", json=self._item("room-1", base))
+        assert stored.status_code == 201
+
+        response = client.post("/bookings/batch", json={"bookings": [
+            self._item("room-1", base + timedelta(hours=3)),                # created
+            self._item("room-1", base + timedelta(minutes=30)),             # conflicts with stored
+            self._item("room-1", base + timedelta(hours=3, minutes=30)),    # conflicts with item 0
+            self._item("room-2", base),                                     # other room, created
+            self._item("room-1", base + timedelta(hours=1)),                # touches stored, created
+        ]})
+        assert response.status_code == 200
+        data = response.json()
+        assert [r["status"] for r in data["results"]] == [
+            "created", "conflict", "conflict", "created", "created"
+        ]
+        assert data["created"] == 3
+        assert data["failed"] == 2
+        assert "index 0" in data["results"][2]["detail"]
+        assert data["results"][0]["booking"]["room_id"] == "room-1"
+
+        list_response = client.get("/bookings/room/room-1")
+        assert list_response.json()["count"] == 3
+
+    def test_batch_rejects_past_items_individually(self):
+        """Test that a past booking is reported as invalid without failing the batch."""
+        future_time = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        past_time = datetime.now(FINNISH_TZ) - timedelta(hours=2)
+        response = client.post("/bookings/batch", json={"bookings": [
+            self._item("room-1", past_time),
+            self._item("room-1", future_time),
+        ]})
+        results = response.json()["results"]
+        assert results[0]["status"] == "invalid"
+        assert "past" in results[0]["detail"].lower()
+        assert results[1]["status"] == "created"
+
+    def test_empty_batch_rejected(self):
+        """Test that an empty batch fails validation."""
+        response = client.post("/bookings/batch", json={"bookings": []})
+        assert response.status_code == 422
+
+    def test_batch_uses_loaded_index(self, db_session):
+        """Test that accepted batch items are reserved in a loaded interval index."""
+        base = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        booking_index.load(db_session)
+        service = BookingService(db_session)
+
+        results = service.create_bookings_batch([
+            BookingCreate(room_id="room-1", start_time=base, end_time=base + timedelta(hours=1), user_name="A"),
+            BookingCreate(room_id="room-1", start_time=base, end_time=base + timedelta(hours=1), user_name="B"),
+        ])
+        assert [r.status for r in results] == ["created", "conflict"]
+        assert booking_index.find_conflict("room-1", base, base + timedelta(minutes=15))
+
+
+# ============================================================================
+# WINDOWED LISTING AND PAGINATION TESTS
+# ============================================================================
+
+class TestRoomListingPagination:
+    """Test time windows and keyset pagination on the room listing."""
+
+    @staticmethod
+    def _create(room_id, start, hours=1):
+        response = client.post(
+            "/bookings/",
+            json={
+                "room_id": room_id,
+                "start_time": start.isoformat(),
+                "end_time": (start + timedelta(hours=hours)).isoformat(),
+                "user_name": "Test User"
+            }
+        )
+        assert response.status_code == 201
+        return response.json()["id"]
+
+    def test_pages_follow_cursor_in_start_time_order(self):
+        """Test that following next_cursor walks every booking exactly once."""
+        base = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        ids = [self._create("room-1", base + timedelta(hours=2 * i)) for i in range(5)]
+
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            data = client.get("/bookings/room/room-1", params=params).json()
+            assert data["count"] == len(data["bookings"]) <= 2
+            seen.extend(b["id"] for b in data["bookings"])
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+
+        assert seen == ids
+
+    def test_listing_matches_booking_response_serialization(self, db_session):
+        """Test that the row-based listing encodes exactly like BookingListResponse."""
+        from app.schemas import BookingListResponse
+
+        base = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        self._create("room-1", base)
+        client.post("/bookings/recurring", json={
+            "room_id": "room-1",
+            "start_time": (base + timedelta(hours=2)).isoformat(),
+            "end_time": (base + timedelta(hours=3)).isoformat(),
+            "user_name": "Äänekoski \"tiimi\"",
+            "recurrence": {"frequency": "daily", "count": 2},
+        })
+
+        response = client.get("/bookings/room/room-1")
+        bookings = db_session.query(Booking).order_by(Booking.start_time, Booking.id).all()
+        expected = BookingListResponse(bookings=bookings, count=len(bookings), next_cursor=None)
+        assert response.content == expected.model_dump_json().encode()
+        assert response.json()["count"] == 3
+
+    def test_window_includes_bookings_overlapping_its_start(self):
+        """Test that from/to select bookings overlapping the window."""
+        base = (datetime.now(FINNISH_TZ) + timedelta(days=2)).replace(hour=8, minute=0, second=0, microsecond=0)
+        self._create("room-1", base - timedelta(days=1))                        # before window
+        overlapping = self._create("room-1", base - timedelta(hours=1), hours=2)   # spans window start
+        inside = self._create("room-1", base + timedelta(hours=3))
+        self._create("room-1", base + timedelta(days=1))                        # after window
+
+        data = client.get(
+            "/bookings/room/room-1",
+            params={
+                "from": base.isoformat(),
+                "to": (base + timedelta(hours=12)).isoformat(),
+            },
+        ).json()
+        assert [b["id"] for b in data["bookings"]] == [overlapping, inside]
+        assert data["next_cursor"] is None
+
+    def test_window_accepts_utc_bounds(self):
+        """Test that UTC window bounds are compared as Finnish time."""
+        base = (datetime.now(FINNISH_TZ) + timedelta(days=2)).replace(hour=10, minute=0, second=0, microsecond=0)
+        booking_id = self._create("room-1", base)
+
+        window_start = (base - timedelta(minutes=30)).astimezone(timezone.utc)
+        data = client.get(
+            "/bookings/room/room-1",
+            params={
+                "from": window_start.isoformat().replace("+00:00", "Z"),
+                "to": (window_start + timedelta(minutes=45)).isoformat().replace("+00:00", "Z"),
+            },
+        ).json()
+        assert [b["id"] for b in data["bookings"]] == [booking_id]
+
+    def test_invalid_cursor_returns_400(self):
+        """Test that a malformed cursor is rejected."""
+        response = client.get("/bookings/room/room-1", params={"cursor": "not-a-cursor"})
+        assert response.status_code == 400
+        assert "cursor" in response.json()["detail"].lower()
+
+    def test_limit_out_of_range_returns_422(self):
+        """Test that the page size is bounded."""
+        response = client.get("/bookings/room/room-1", params={"limit": 0})
+        assert response.status_code == 422
+
+
+# ============================================================================
+# EXPORT TESTS
+# ============================================================================
+
+class TestExport:
+    """Test streaming NDJSON and CSV exports."""
+
+    @staticmethod
+    def _create(room_id, start):
+        response = client.post(
+            "/bookings/",
+            json={
+                "room_id": room_id,
+                "start_time": start.isoformat(),
+                "end_time": (start + timedelta(hours=1)).isoformat(),
+                "user_name": "Export User"
+            }
+        )
+        assert response.status_code == 201
+        return response.json()
+
+    def test_ndjson_export_for_one_room(self):
+        """Test that a room export streams one JSON object per booking."""
+        base = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        created = [self._create("room-1", base + timedelta(hours=2 * i)) for i in range(3)]
+        self._create("room-2", base)
+
+        response = client.get("/bookings/export", params={"room_id": "room-1"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["id"] for row in rows] == [b["id"] for b in created]
+        assert rows[0]["start_time"] == created[0]["start_time"]
+
+    def test_csv_export_for_all_rooms(self):
+        """Test that a full CSV export has a header and every booking."""
+        base = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        self._create("room-1", base)
+        self._create("room-2", base)
+
+        response = client.get("/bookings/export", params={"format": "csv"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert [row["room_id"] for row in rows] == ["room-1", "room-2"]
+        assert rows[0]["user_name"] == "Export User"
+
+    def test_export_reads_in_chunks(self, db_session):
+        """Test that the service yields the table in chunk-sized partitions."""
+        base = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        for i in range(5):
+            self._create("room-1", base + timedelta(hours=2 * i))
+
+        service = BookingService(db_session)
+        partitions = list(service.iter_export_partitions(chunk_size=2))
+        assert [len(rows) for rows in partitions] == [2, 2, 1]
+
+    def test_unknown_export_format_rejected(self):
+        """Test that only NDJSON and CSV are accepted."""
+        response = client.get("/bookings/export", params={"format": "xml"})
+        assert response.status_code == 422
+
+
+# ============================================================================
+# FREE SLOT SEARCH TESTS
+# ============================================================================
+
+class TestFreeSlotSearch:
+    """Test the multi-room free slot search."""
+
+    @staticmethod
+    def _create(room_id, start, minutes):
+        response = client.post(
+            "/bookings/",
+            json={
+                "room_id": room_id,
+                "start_time": start.isoformat(),
+                "end_time": (start + timedelta(minutes=minutes)).isoformat(),
+                "user_name": "Test User"
+            }
+        )
+        assert response.status_code == 201
+
+    def test_gaps_reported_per_room(self):
+        """Test that gaps shorter than the duration are skipped and empty rooms are fully free."""
+        day = (datetime.now(FINNISH_TZ) + timedelta(days=2)).replace(hour=8, minute=0, second=0, microsecond=0)
+        self._create("room-1", day + timedelta(hours=1), 60)                  # 09:00-10:00
+        self._create("room-1", day + timedelta(hours=2, minutes=30), 60)      # 10:30-11:30
+        self._create("room-2", day - timedelta(minutes=30), 90)               # 07:30-09:00
+
+        response = client.get(
+            "/bookings/free-slots",
+            params={
+                "room_id": ["room-1", "room-2", "room-3"],
+                "from": day.isoformat(),
+                "to": (day + timedelta(hours=4)).isoformat(),
+                "duration_minutes": 60,
+            },
+        )
+        assert response.status_code == 200
+        rooms = {room["room_id"]: room["free_slots"] for room in response.json()["rooms"]}
+
+        naive = lambda dt: dt.replace(tzinfo=None).isoformat()
+        assert rooms["room-1"] == [
+            {"start_time": naive(day), "end_time": naive(day + timedelta(hours=1))},
+        ]
+        assert rooms["room-2"] == [
+            {"start_time": naive(day + timedelta(hours=1)), "end_time": naive(day + timedelta(hours=4))},
+        ]
+        assert rooms["room-3"] == [
+            {"start_time": naive(day), "end_time": naive(day + timedelta(hours=4))},
+        ]
+
+    def test_index_and_database_paths_agree(self, db_session):
+        """Test that the interval index gives the same gaps as the database query."""
+        day = (datetime.now(FINNISH_TZ) + timedelta(days=2)).replace(hour=8, minute=0, second=0, microsecond=0)
+        self._create("room-1", day + timedelta(hours=1), 60)
+        service = BookingService(db_session)
+        args = (["room-1"], day, day + timedelta(hours=4), timedelta(minutes=30))
+
+        from_database = service.find_free_slots(*args)
+        booking_index.load(db_session)
+        assert service.find_free_slots(*args) == from_database
+
+    def test_duration_outside_booking_limits_rejected(self):
+        """Test that the duration follows the 15 minute to 4 hour booking limits."""
+        day = datetime.now(FINNISH_TZ) + timedelta(days=2)
+        for minutes in (10, 300):
+            response = client.get(
+                "/bookings/free-slots",
+                params={
+                    "room_id": "room-1",
+                    "from": day.isoformat(),
+                    "to": (day + timedelta(hours=8)).isoformat(),
+                    "duration_minutes": minutes,
+                },
+            )
+            assert response.status_code == 422
+
+    def test_reversed_window_rejected(self):
+        """Test that a window ending before it starts is rejected."""
+        day = datetime.now(FINNISH_TZ) + timedelta(days=2)
+        response = client.get(
+            "/bookings/free-slots",
+            params={
+                "room_id": "room-1",
+                "from": day.isoformat(),
+                "to": (day - timedelta(hours=1)).isoformat(),
+                "duration_minutes": 30,
+            },
+        )
+        assert response.status_code == 400
+
+
+# ============================================================================
+# ROOM LISTING CACHE TESTS
+# ============================================================================
+
+class TestRoomListingCache:
+    """Test ETag/304 handling and invalidation of cached room listings."""
+
+    @staticmethod
+    def _create(room_id, start):
+        response = client.post(
+            "/bookings/",
+            json={
+                "room_id": room_id,
+                "start_time": start.isoformat(),
+                "end_time": (start + timedelta(hours=1)).isoformat(),
+                "user_name": "Test User"
+            }
+        )
+        assert response.status_code == 201
+        return response.json()["id"]
+
+    def test_matching_etag_returns_304(self):
+        """Test that an unchanged room answers a conditional request with 304."""
+        self._create("room-1", datetime.now(FINNISH_TZ) + timedelta(days=1))
+
+        first = client.get("/bookings/room/room-1")
+        assert first.status_code == 200
+        etag = first.headers["etag"]
+
+        second = client.get("/bookings/room/room-1", headers={"If-None-Match": etag})
+        assert second.status_code == 304
+        assert second.headers["etag"] == etag
+        assert second.content == b""
+
+    def test_create_and_cancel_invalidate_room(self):
+        """Test that writes to a room change its ETag but leave other rooms cached."""
+        base = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        booking_id = self._create("room-1", base)
+        etag_room_1 = client.get("/bookings/room/room-1").headers["etag"]
+        etag_room_2 = client.get("/bookings/room/room-2").headers["etag"]
+
+        self._create("room-1", base + timedelta(hours=2))
+        after_create = client.get("/bookings/room/room-1", headers={"If-None-Match": etag_room_1})
+        assert after_create.status_code == 200
+        assert after_create.json()["count"] == 2
+        assert client.get("/bookings/room/room-2", headers={"If-None-Match": etag_room_2}).status_code == 304
+
+        client.delete(f"/bookings/{booking_id}")
+        after_cancel = client.get("/bookings/room/room-1", headers={"If-None-Match": after_create.headers["etag"]})
+        assert after_cancel.status_code == 200
+        assert after_cancel.json()["count"] == 1
+
+    def test_query_parameters_have_distinct_etags(self):
+        """Test that each page or window of a room is cached separately."""
+        base = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        self._create("room-1", base)
+        self._create("room-1", base + timedelta(hours=2))
+
+        full = client.get("/bookings/room/room-1")
+        page = client.get("/bookings/room/room-1", params={"limit": 1})
+        assert full.headers["etag"] != page.headers["etag"]
+        assert page.json()["count"] == 1
+        assert client.get("/bookings/room/room-1", params={"limit": 1}).json() == page.json()
+
+    def test_cache_evicts_least_recently_used(self):
+        """Test that the cache stays within its size bound."""
+        cache = RoomListingCache(max_entries=2)
+        for room_id in ("a", "b"):
+            cache.store(room_id, (), cache.lookup(room_id, ()), room_id.encode())
+        cache.lookup("a", ())
+        cache.store("c", (), cache.lookup("c", ()), b"c")
+
+        assert cache.lookup("a", ()).response is not None
+        assert cache.lookup("b", ()).response is None
+        assert cache.lookup("c", ()).response is not None
+
+    def test_stale_body_not_cached(self):
+        """Test that a body built before a concurrent invalidation is not cached."""
+        cache = RoomListingCache(max_entries=2)
+        lookup = cache.lookup("a", ())
+        cache.invalidate("a")
+        cache.store("a", (), lookup, b"stale")
+        assert cache.lookup("a", ()).response is None
+
+
+# ============================================================================
+# ROOM LOCK TESTS
+# ============================================================================
+
+class TestRoomLocks:
+    """Test striped per-room locking of the check-then-insert sequence."""
+
+    @staticmethod
+    def _rooms_on_different_stripes(locks):
+        first = "room-a"
+        second = next(f"room-{i}" for i in range(1000) if locks.stripe(f"room-{i}") != locks.stripe(first))
+        return first, second
+
+    def test_different_rooms_lock_in_parallel(self):
+        """Test that holding one room's lock does not block another room."""
+        locks = RoomLockManager(stripes=16)
+        room_a, room_b = self._rooms_on_different_stripes(locks)
+        acquired = threading.Event()
+
+        def lock_other_room():
+            with locks.lock(room_b):
+                acquired.set()
+
+        with locks.lock(room_a):
+            worker = threading.Thread(target=lock_other_room)
+            worker.start()
+            assert acquired.wait(timeout=2)
+        worker.join()
+
+    def test_same_room_lock_is_exclusive(self):
+        """Test that a second writer to the same room waits for the first."""
+        locks = RoomLockManager(stripes=16)
+        acquired = threading.Event()
+
+        def lock_same_room():
+            with locks.lock("room-a"):
+                acquired.set()
+
+        with locks.lock("room-a"):
+            worker = threading.Thread(target=lock_same_room)
+            worker.start()
+            assert not acquired.wait(timeout=0.2)
+        assert acquired.wait(timeout=2)
+        worker.join()
+
+    def test_file_locks_created_per_stripe(self, tmp_path):
+        """Test that the cross-process mode locks a file per stripe."""
+        locks = RoomLockManager(stripes=4, lock_dir=str(tmp_path / "locks"))
+        with locks.lock("room-a", "room-b"):
+            lock_files = list((tmp_path / "locks").iterdir())
+        assert {p.name for p in lock_files} == {
+            f"room-stripe-{locks.stripe(room)}.lock" for room in ("room-a", "room-b")
+        }
+
+    def test_async_lock_excludes_sync_holders(self):
+        """Test that the async lock waits for a thread holding the same room."""
+        import asyncio
+
+        locks = RoomLockManager(stripes=4)
+        order = []
+
+        def hold_in_thread(started):
+            with locks.lock("room-a"):
+                started.set()
+                time.sleep(0.2)
+                order.append("thread")
+
+        async def main():
+            started = threading.Event()
+            worker = threading.Thread(target=hold_in_thread, args=(started,))
+            worker.start()
+            await asyncio.to_thread(started.wait)
+            async with locks.async_lock("room-a"):
+                order.append("async")
+            worker.join()
+
+        asyncio.run(main())
+        assert order == ["thread", "async"]
+
+    def test_concurrent_creates_on_pooled_database(self, tmp_path):
+        """Test that racing creates yield one booking per slot and rooms do not block each other."""
+        settings = Settings(database_url=f"sqlite:///{tmp_path / 'bookings.db'}", db_pool_size=8)
+        file_engine = create_db_engine(settings)
+        Base.metadata.create_all(bind=file_engine)
+        FileSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=file_engine)
+        locks = RoomLockManager(stripes=16)
+        future_time = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        outcomes = []
+
+        def attempt(room_id, user):
+            db = FileSessionLocal()
+            try:
+                service = BookingService(db, RoomIntervalIndex(), RoomListingCache(0), locks)
+                service.create_booking(BookingCreate(
+                    room_id=room_id,
+                    start_time=future_time,
+                    end_time=future_time + timedelta(hours=1),
+                    user_name=user
+                ))
+                outcomes.append((room_id, "created"))
+            except BookingConflictError:
+                outcomes.append((room_id, "conflict"))
+            finally:
+                db.close()
+
+        try:
+            threads = [
+                threading.Thread(target=attempt, args=(room_id, f"User {i}"))
+                for i in range(6)
+                for room_id in ("room-x", "room-y")
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            for room_id in ("room-x", "room-y"):
+                assert outcomes.count((room_id, "created")) == 1
+                assert outcomes.count((room_id, "conflict")) == 5
+            with FileSessionLocal() as db:
+                assert db.query(Booking).count() == 2
+        finally:
+            file_engine.dispose()
+
+    def test_concurrent_requests_on_memory_database(self, monkeypatch):
+        """Test that every 201 from concurrent creates and reads on the in-memory database is stored."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        memory_engine = create_db_engine(Settings(database_url="sqlite:///:memory:"))
+        Base.metadata.create_all(bind=memory_engine)
+        MemorySessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=memory_engine)
+
+        def override():
+            db = MemorySessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        monkeypatch.setitem(app.dependency_overrides, get_db, override)
+        monkeypatch.setitem(app.dependency_overrides, get_read_db, override)
+        future_time = datetime.now(FINNISH_TZ) + timedelta(days=1)
+
+        def create(i):
+            return client.post("/bookings/", json={
+                "room_id": f"room-{i}",
+                "start_time": future_time.isoformat(),
+                "end_time": (future_time + timedelta(hours=1)).isoformat(),
+                "user_name": f"User {i}",
+            }).status_code
+
+        def read(i):
+            return client.get(f"/bookings/room/room-{i}").status_code
+
+        try:
+            with ThreadPoolExecutor(max_workers=16) as pool:
+                creates = [pool.submit(create, i) for i in range(60)]
+                reads = [pool.submit(read, i) for i in range(60)]
+                statuses = [future.result(timeout=30) for future in creates]
+                assert all(future.result(timeout=30) == 200 for future in reads)
+
+            assert statuses == [201] * 60
+            with MemorySessionLocal() as db:
+                assert db.query(Booking).count() == statuses.count(201)
+        finally:
+            memory_engine.dispose()
+
+    def test_begin_immediate_takes_write_lock(self, tmp_path):
+        """Test that SQLITE_BEGIN_IMMEDIATE makes transactions hold the write lock from the start."""
+        settings = Settings(
+            database_url=f"sqlite:///{tmp_path / 'bookings.db'}",
+            sqlite_begin_immediate=True,
+            sqlite_busy_timeout=0,
+        )
+        first = create_db_engine(settings)
+        second = create_db_engine(settings)
+        try:
+            with first.begin() as conn:
+                conn.execute(text("CREATE TABLE t (x INTEGER)"))
+            with first.connect() as holder:
+                holder.execute(text("SELECT count(*) FROM t"))
+                with pytest.raises(Exception, match="locked"):
+                    with second.connect() as contender:
+                        contender.execute(text("SELECT count(*) FROM t"))
+        finally:
+            first.dispose()
+            second.dispose()
+
+
+# ============================================================================
+# RECURRING BOOKING TESTS
+# ============================================================================
+
+class TestRecurringBookings:
+    """Test recurring booking series."""
+
+    @staticmethod
+    def _payload(start, recurrence, room_id="room-1"):
+        return {
+            "room_id": room_id,
+            "start_time": start.isoformat(),
+            "end_time": (start + timedelta(hours=1)).isoformat(),
+            "user_name": "Series User",
+            "recurrence": recurrence,
+        }
+
+    def test_weekly_series_created_and_cancelled(self):
+        """Test that a weekly series is stored under one series ID and cancelled at once."""
+        start = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        response = client.post("/bookings/recurring", json=self._payload(start, {"frequency": "weekly", "count": 4}))
+        assert response.status_code == 201
+        data = response.json()
+        assert data["count"] == 4
+        assert {b["series_id"] for b in data["bookings"]} == {data["series_id"]}
+
+        list_response = client.get("/bookings/room/room-1")
+        assert list_response.json()["count"] == 4
+
+        delete_response = client.delete(f"/bookings/series/{data['series_id']}")
+        assert delete_response.status_code == 204
+        assert client.get("/bookings/room/room-1").json()["count"] == 0
+        assert client.delete(f"/bookings/series/{data['series_id']}").status_code == 404
+
+    def test_series_conflict_rejects_whole_series(self):
+        """Test that one conflicting occurrence rejects every occurrence."""
+        start = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        blocker = start + timedelta(days=14, minutes=30)
+        client.post(
+            "/bookings/",
+            json={
+                "room_id": "room-1",
+                "start_time": blocker.isoformat(),
+                "end_time": (blocker + timedelta(hours=1)).isoformat(),
+                "user_name": "Blocker"
+            }
+        )
+
+        response = client.post("/bookings/recurring", json=self._payload(start, {"frequency": "weekly", "count": 4}))
+        assert response.status_code == 409
+        assert "conflict" in response.json()["detail"].lower()
+        assert client.get("/bookings/room/room-1").json()["count"] == 1
+
+    def test_until_and_interval(self):
+        """Test every-N-weeks expansion up to an inclusive end date."""
+        start = datetime(2030, 1, 7, 9, 0, tzinfo=FINNISH_TZ)
+        rule = RecurrenceRule(frequency="weekly", interval=2, until=(start + timedelta(weeks=6)).date())
+        occurrences = list(expand_occurrences(start, start + timedelta(hours=1), rule, horizon=start + timedelta(days=90)))
+        assert [s.date() for s, _ in occurrences] == [(start + timedelta(weeks=2 * i)).date() for i in range(4)]
+
+    def test_occurrences_keep_wall_clock_time_across_dst(self):
+        """Test that a series keeps its local start time over a daylight saving change."""
+        start = datetime(2030, 3, 25, 9, 0, tzinfo=FINNISH_TZ)  # DST starts on 2030-03-31
+        rule = RecurrenceRule(frequency="weekly", count=2)
+        occurrences = list(expand_occurrences(start, start + timedelta(hours=1), rule, horizon=start + timedelta(days=90)))
+        assert [s.hour for s, _ in occurrences] == [9, 9]
+        assert occurrences[0][0].utcoffset() != occurrences[1][0].utcoffset()
+
+    def test_series_beyond_horizon_rejected(self):
+        """Test that a series may not run past the 90 day booking horizon."""
+        start = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        response = client.post("/bookings/recurring", json=self._payload(start, {"frequency": "weekly", "count": 20}))
+        assert response.status_code == 400
+        assert "90 days" in response.json()["detail"]
+
+    def test_rule_requires_exactly_one_end_condition(self):
+        """Test that until and count are mutually exclusive and one is required."""
+        start = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        for recurrence in ({"frequency": "daily"}, {"frequency": "daily", "count": 2, "until": "2030-01-01"}):
+            response = client.post("/bookings/recurring", json=self._payload(start, recurrence))
+            assert response.status_code == 422
+
+
+# ============================================================================
+# EPOCH TIME STORAGE
+# ============================================================================
+
+class TestEpochStorage:
+    """Test the integer UTC epoch column type used with BOOKING_TIME_STORAGE=epoch."""
+
+    @pytest.fixture
+    def epoch_table(self):
+        from sqlalchemy import Column, Integer, MetaData, Table
+        from app.models import EpochSeconds
+
+        metadata = MetaData()
+        table = Table(
+            "epoch_times", metadata,
+            Column("id", Integer, primary_key=True),
+            Column("at", EpochSeconds),
+        )
+        epoch_engine = create_engine("sqlite://")
+        metadata.create_all(epoch_engine)
+        yield epoch_engine, table
+        epoch_engine.dispose()
+
+    def test_round_trip_across_dst(self, epoch_table):
+        """Test that values are stored as UTC seconds and read back as naive Finnish time."""
+        epoch_engine, table = epoch_table
+        winter = datetime(2030, 1, 15, 9, 30)
+        summer = datetime(2030, 7, 15, 9, 30, tzinfo=FINNISH_TZ)
+        with epoch_engine.begin() as conn:
+            conn.execute(table.insert(), [{"id": 1, "at": winter}, {"id": 2, "at": summer}])
+            raw = dict(conn.execute(text("SELECT id, at FROM epoch_times")).all())
+            stored = dict(conn.execute(table.select()).all())
+
+        assert raw[1] == int(winter.replace(tzinfo=FINNISH_TZ).timestamp())
+        assert raw[2] == int(summer.timestamp())
+        assert stored[1] == winter
+        assert stored[2] == datetime(2030, 7, 15, 9, 30)
+
+    def test_range_comparison_uses_integers(self, epoch_table):
+        """Test that time range filters work against the integer column."""
+        epoch_engine, table = epoch_table
+        base = datetime(2030, 3, 30, 23, 0, tzinfo=timezone.utc)  # 01:00 local, DST starts at 03:00
+        with epoch_engine.begin() as conn:
+            conn.execute(table.insert(), [{"id": i, "at": base + timedelta(hours=i)} for i in range(4)])
+            rows = conn.execute(
+                table.select().where(table.c.at >= base + timedelta(hours=1), table.c.at < base + timedelta(hours=3))
+            ).all()
+
+        assert [row.id for row in rows] == [1, 2]
+        # 01:00 + 2h in UTC is 04:00 local once DST has started
+        assert rows[1].at == datetime(2030, 3, 31, 4, 0)
+
+    @pytest.mark.skipif(BookingTime is EpochSeconds, reason="the suite already runs with epoch storage")
+    def test_service_paths_with_epoch_storage(self):
+        """Test the service paths with sub-second times in a process using epoch storage.
+
+        The column type is chosen when the models are imported, so the
+        service tests are run again in a subprocess with
+        BOOKING_TIME_STORAGE=epoch.
+        """
+        import os
+        import subprocess
+        import sys
+
+        result = subprocess.run(
+            [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider",
+             f"{os.path.abspath(__file__)}::TestSubSecondBookingTimes"],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            env={**os.environ, "BOOKING_TIME_STORAGE": "epoch"},
+            capture_output=True,
+            text=True,
+            timeout=120,
+        )
+        assert result.returncode == 0, result.stdout[-3000:]
+        assert " passed" in result.stdout
+
+    def test_invalid_storage_mode_rejected(self):
+        """Test that an unknown BOOKING_TIME_STORAGE value is rejected."""
+        with pytest.raises(ValueError, match="BOOKING_TIME_STORAGE"):
+            Settings(booking_time_storage="text")
+
+
+class TestSubSecondBookingTimes:
+    """Test service paths with sub-second booking times against a loaded interval index.
+
+    With BOOKING_TIME_STORAGE=epoch the stored times lose their sub-second
+    part, and the index must hold exactly the stored values.
+    """
+
+    @pytest.fixture
+    def service(self, db_session):
+        index = RoomIntervalIndex()
+        index.load(db_session)
+        return BookingService(db_session, index=index)
+
+    @staticmethod
+    def _start():
+        return (datetime.now(FINNISH_TZ) + timedelta(days=1)).replace(microsecond=123456)
+
+    @staticmethod
+    def _data(start, room_id="room-1", user_name="User 1"):
+        return BookingCreate(room_id=room_id, start_time=start, end_time=start + timedelta(hours=1), user_name=user_name)
+
+    @staticmethod
+    def _indexed(service, room_id, start):
+        return service.index.overlapping(room_id, start - timedelta(hours=1), start + timedelta(hours=2))
+
+    def test_batch_cancel_frees_slot(self, service, db_session):
+        """Test that cancelling a batch-created booking leaves no phantom interval in the index."""
+        start = self._start()
+        results = service.create_bookings_batch([self._data(start), self._data(start, room_id="room-2")])
+        assert [r.status for r in results] == ["created", "created"]
+
+        booking = results[0].booking
+        stored = db_session.get(Booking, booking.id)
+        assert self._indexed(service, "room-1", start) == [(stored.start_time, stored.end_time, booking.id)]
+
+        service.cancel_booking(booking.id)
+        assert self._indexed(service, "room-1", start) == []
+        service.create_booking(self._data(start))
+
+    def test_single_create_matches_stored_times(self, service, db_session):
+        """Test that a create returns, indexes and stores the same times, and a cancel frees them."""
+        start = self._start()
+        booking = service.create_booking(self._data(start))
+        stored = db_session.get(Booking, booking.id)
+        assert (booking.start_time, booking.end_time) == (stored.start_time, stored.end_time)
+        assert self._indexed(service, "room-1", start) == [(stored.start_time, stored.end_time, booking.id)]
+
+        service.cancel_booking(booking.id)
+        assert self._indexed(service, "room-1", start) == []
+        service.create_booking(self._data(start))
+
+    def test_recurring_cancel_frees_slots(self, service):
+        """Test that cancelling a series with sub-second times frees every occurrence."""
+        start = self._start()
+        series_id, bookings = service.create_recurring_booking(RecurringBookingCreate(
+            room_id="room-1",
+            start_time=start,
+            end_time=start + timedelta(hours=1),
+            user_name="User 1",
+            recurrence=RecurrenceRule(frequency="daily", count=3),
+        ))
+        assert [(b.start_time, b.end_time, b.id) for b in bookings] == [
+            interval for b in bookings for interval in self._indexed(service, "room-1", b.start_time)
+        ]
+
+        assert service.cancel_series(series_id) == 3
+        for booking in bookings:
+            assert self._indexed(service, "room-1", booking.start_time) == []
+        service.create_booking(self._data(start + timedelta(days=2)))
+
+    def test_bulk_cancel_frees_slots(self, service):
+        """Test that a bulk cancel by user removes exactly the indexed intervals."""
+        start = self._start()
+        service.create_bookings_batch([
+            self._data(start, user_name="Leaving"),
+            self._data(start + timedelta(hours=2), user_name="Leaving"),
+        ])
+
+        assert len(service.cancel_bookings(None, "Leaving", None, None)) == 2
+        assert self._indexed(service, "room-1", start) == []
+        assert self._indexed(service, "room-1", start + timedelta(hours=2)) == []
+        service.create_booking(self._data(start))
+
+    def test_cursor_pagination_visits_every_booking(self, service):
+        """Test that cursors built from stored times walk a listing without gaps or repeats."""
+        start = self._start()
+        created = [service.create_booking(self._data(start + timedelta(hours=i))).id for i in range(3)]
+
+        seen, cursor = [], None
+        while True:
+            rows, cursor = service.list_bookings_page("room-1", 1, window_start=start, cursor=cursor)
+            seen.extend(row.id for row in rows)
+            if cursor is None:
+                break
+        assert seen == created
+
+    def test_free_slot_can_be_booked(self, service):
+        """Test that a free slot found next to a sub-second booking can be booked exactly."""
+        start = self._start()
+        booking = service.create_booking(self._data(start))
+        slots = service.find_free_slots(
+            ["room-1"], start - timedelta(hours=1), booking.end_time + timedelta(hours=1), timedelta(hours=1)
+        )["room-1"]
+        assert (booking.end_time, booking.end_time + timedelta(hours=1)) in slots
+
+        service.create_booking(BookingCreate(
+            room_id="room-1",
+            start_time=booking.end_time.replace(tzinfo=FINNISH_TZ),
+            end_time=(booking.end_time + timedelta(hours=1)).replace(tzinfo=FINNISH_TZ),
+            user_name="User 2",
+        ))
+
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+class TestMetrics:
+    """Test the metrics registry and the /metrics endpoint."""
+
+    @staticmethod
+    def _sample(text_body, line_prefix):
+        for line in text_body.splitlines():
+            if line.startswith(line_prefix + " "):
+                return float(line.rsplit(" ", 1)[1])
+        return 0.0
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test that observations land in inclusive buckets and render cumulatively."""
+        registry = MetricsRegistry()
+        latency = registry.histogram("latency_seconds", "Latency", ("op",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.labels("read").observe(value)
+
+        body = registry.render()
+        assert "# TYPE latency_seconds histogram" in body
+        assert 'latency_seconds_bucket{op="read",le="0.1"} 2' in body
+        assert 'latency_seconds_bucket{op="read",le="1"} 3' in body
+        assert 'latency_seconds_bucket{op="read",le="+Inf"} 4' in body
+        assert 'latency_seconds_count{op="read"} 4' in body
+        assert 'latency_seconds_sum{op="read"} 3.65' in body
+
+    def test_counter_sums_thread_shards(self):
+        """Test that increments from many threads are all counted."""
+        registry = MetricsRegistry()
+        counter = registry.counter("events_total", "Events").labels()
+
+        def work():
+            for _ in range(1000):
+                counter.inc()
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert counter.value() == 8000
+
+    def test_wrong_label_count_rejected(self):
+        """Test that label values must match the declared label names."""
+        registry = MetricsRegistry()
+        counter = registry.counter("events_total", "Events", ("kind",))
+        with pytest.raises(ValueError):
+            counter.labels("a", "b")
+
+    def test_endpoint_reports_routes_stages_and_errors(self):
+        """Test that requests, create stages and handler errors show up in /metrics."""
+        before = client.get("/metrics").text
+        conflicts_before = self._sample(before, 'booking_errors_total{error="conflict"}')
+        commits_before = self._sample(before, 'booking_create_stage_seconds_count{stage="commit"}')
+
+        start_time = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        payload = {
+            "room_id": "room-1",
+            "start_time": start_time.isoformat(),
+            "end_time": (start_time + timedelta(hours=1)).isoformat(),
+            "user_name": "Metrics"
+        }
+        assert client.post("/bookings/", json=payload).status_code == 201
+        assert client.post("/bookings/", json=payload).status_code == 409
+        assert client.get("/bookings/no-such-booking").status_code == 404
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        assert self._sample(body, 'booking_errors_total{error="conflict"}') == conflicts_before + 1
+        assert self._sample(body, 'booking_create_stage_seconds_count{stage="commit"}') == commits_before + 1
+        assert 'http_requests_total{method="POST",route="/bookings/",status="409"}' in body
+        # Path parameters are reported by route template, not by value
+        assert 'http_requests_total{method="GET",route="/bookings/{booking_id}",status="404"}' in body
+        assert "no-such-booking" not in body
+        assert "# TYPE db_pool_connections gauge" in body
+
+
+# ============================================================================
+# LOGGING PIPELINE
+# ============================================================================
+
+class TestLoggingPipeline:
+    """Test the queue-based, throttled JSON logging pipeline."""
+
+    @staticmethod
+    def _record(msg, *args, level=logging.INFO):
+        return logging.LogRecord("booking_system", level, __file__, 1, msg, args, None)
+
+    def test_json_formatter_merges_arguments(self):
+        """Test that records render as one JSON object with the formatted message."""
+        entry = json.loads(JsonFormatter().format(self._record("Booking created: id=%s", "abc")))
+        assert entry["message"] == "Booking created: id=abc"
+        assert entry["level"] == "INFO"
+        assert entry["logger"] == "booking_system"
+
+    def test_rate_limit_is_per_message_type(self):
+        """Test that a burst of one message type does not starve another."""
+        throttle = LogThrottle(rate_limit=3)
+        passed = [throttle.filter(self._record("Conflict: %s", i, level=logging.WARNING)) for i in range(10)]
+        assert passed.count(True) == 3
+        assert throttle.filter(self._record("Other message"))
+
+    def test_suppressed_count_reported_on_next_record(self):
+        """Test that sampled-out records are counted on the next record that passes."""
+        throttle = LogThrottle(sample_every=4)
+        records = [self._record("Booking created: id=%s", i) for i in range(5)]
+        passed = [record for record in records if throttle.filter(record)]
+        assert [record.args for record in passed] == [(0,), (4,)]
+        assert passed[1].suppressed == 3
+
+    def test_sampling_keeps_warnings(self):
+        """Test that sampling only applies below WARNING."""
+        throttle = LogThrottle(sample_every=10)
+        assert all(throttle.filter(self._record("Database error: %s", i, level=logging.ERROR)) for i in range(5))
+
+    def test_full_queue_drops_without_blocking(self):
+        """Test that a full queue drops records instead of blocking the caller."""
+        handler = NonBlockingQueueHandler(queue.Queue(maxsize=2))
+        started = time.monotonic()
+        for i in range(100):
+            handler.handle(self._record("Request validation error: %s", i))
+        assert time.monotonic() - started < 1
+        assert handler.queue.qsize() == 2
+
+    def test_formatting_deferred_to_listener(self):
+        """Test that arguments stay unmerged until the listener formats the record."""
+        handler = NonBlockingQueueHandler(queue.Queue())
+        handler.handle(self._record("Booking created: id=%s", "abc"))
+        queued = handler.queue.get_nowait()
+        assert queued.msg == "Booking created: id=%s"
+        assert queued.args == ("abc",)
+
+
+# ============================================================================
+# BENCHMARK SUITE
+# ============================================================================
+
+class TestBenchmarkComparison:
+    """Test the regression check of the benchmark suite."""
+
+    @staticmethod
+    def _document(p50_ms, throughput):
+        return {"results": {"http.create.c1": {"p50_ms": p50_ms, "throughput": throughput}}}
+
+    def test_within_tolerance_passes(self):
+        """Test that small changes against the baseline are not reported."""
+        from benchmarks.run import compare
+        assert list(compare(self._document(1.1, 95.0), self._document(1.0, 100.0), 0.2)) == []
+
+    def test_slower_median_and_lower_throughput_reported(self):
+        """Test that latency and throughput regressions are both reported."""
+        from benchmarks.run import compare
+        regressions = list(compare(self._document(2.0, 50.0), self._document(1.0, 100.0), 0.2))
+        assert len(regressions) == 2
+        assert all(r.startswith("http.create.c1") for r in regressions)
+
+    def test_new_scenarios_ignored(self):
+        """Test that scenarios without a baseline entry are skipped."""
+        from benchmarks.run import compare
+        assert list(compare(self._document(9.0, 1.0), {"results": {}}, 0.2)) == []
+
+
+# ============================================================================
+# IDEMPOTENCY KEYS
+# ============================================================================
+
+class TestIdempotencyKeys:
+    """Test replaying POST /bookings/ responses for a repeated Idempotency-Key."""
+
+    @staticmethod
+    def _payload(start, user_name="Retry User"):
+        return {
+            "room_id": "room-1",
+            "start_time": start.isoformat(),
+            "end_time": (start + timedelta(hours=1)).isoformat(),
+            "user_name": user_name
+        }
+
+    def test_retry_replays_original_response(self):
+        """Test that a retried request returns the original 201 instead of a 409."""
+        payload = self._payload(datetime.now(FINNISH_TZ) + timedelta(days=1))
+        headers = {"Idempotency-Key": "retry-1"}
+
+        first = client.post("/bookings/", json=payload, headers=headers)
+        second = client.post("/bookings/", json=payload, headers=headers)
+
+        assert first.status_code == 201
+        assert second.status_code == 201
+        assert second.json() == first.json()
+        assert second.headers["idempotent-replayed"] == "true"
+        assert client.get("/bookings/room/room-1").json()["count"] == 1
+
+    def test_replay_survives_memory_eviction(self, db_session):
+        """Test that keys are persisted and replayed from the database."""
+        from app.models import IdempotencyKey
+
+        payload = self._payload(datetime.now(FINNISH_TZ) + timedelta(days=1))
+        headers = {"Idempotency-Key": "retry-2"}
+        first = client.post("/bookings/", json=payload, headers=headers)
+        assert db_session.query(IdempotencyKey).filter_by(key="retry-2").count() == 1
+
+        idempotency_store.clear()
+        second = client.post("/bookings/", json=payload, headers=headers)
+        assert second.status_code == 201
+        assert second.json()["id"] == first.json()["id"]
+
+    def test_equivalent_timezone_is_same_request(self):
+        """Test that the fingerprint uses the normalized request, not the raw JSON."""
+        start = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        headers = {"Idempotency-Key": "retry-3"}
+        first = client.post("/bookings/", json=self._payload(start), headers=headers)
+        second = client.post("/bookings/", json=self._payload(start.astimezone(timezone.utc)), headers=headers)
+        assert second.status_code == 201
+        assert second.json()["id"] == first.json()["id"]
+
+    def test_key_reused_with_different_request_rejected(self):
+        """Test that a key cannot be reused for a different booking."""
+        start = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        headers = {"Idempotency-Key": "retry-4"}
+        assert client.post("/bookings/", json=self._payload(start), headers=headers).status_code == 201
+
+        response = client.post("/bookings/", json=self._payload(start, "Someone Else"), headers=headers)
+        assert response.status_code == 400
+        assert "Idempotency-Key" in response.json()["detail"]
+
+    def test_failed_request_not_recorded(self):
+        """Test that only successful responses are stored, so a failed request can be retried."""
+        start = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        assert client.post("/bookings/", json=self._payload(start, "Blocker")).status_code == 201
+        headers = {"Idempotency-Key": "retry-5"}
+        assert client.post("/bookings/", json=self._payload(start), headers=headers).status_code == 409
+        assert client.post("/bookings/", json=self._payload(start), headers=headers).status_code == 409
+
+    def test_concurrent_retry_waits_and_replays(self, tmp_path, monkeypatch):
+        """Test that a retry arriving while the original is in flight gets the replayed 201."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        file_engine = create_engine(f"sqlite:///{tmp_path / 'bookings.db'}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(file_engine)
+        FileSession = sessionmaker(autocommit=False, autoflush=False, bind=file_engine)
+
+        def override():
+            db = FileSession()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        in_create = threading.Event()
+        original_create = BookingService.create_booking
+
+        def slow_create(self, booking_data):
+            in_create.set()
+            time.sleep(0.3)
+            return original_create(self, booking_data)
+
+        monkeypatch.setattr(BookingService, "create_booking", slow_create)
+        monkeypatch.setitem(app.dependency_overrides, get_db, override)
+        monkeypatch.setitem(app.dependency_overrides, get_read_db, override)
+
+        payload = self._payload(datetime.now(FINNISH_TZ) + timedelta(days=1))
+        headers = {"Idempotency-Key": "retry-concurrent"}
+        try:
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                first = pool.submit(client.post, "/bookings/", json=payload, headers=headers)
+                assert in_create.wait(5)
+                second = pool.submit(client.post, "/bookings/", json=payload, headers=headers)
+                first, second = first.result(timeout=10), second.result(timeout=10)
+
+            assert (first.status_code, second.status_code) == (201, 201)
+            assert second.json() == first.json()
+            assert second.headers["idempotent-replayed"] == "true"
+            with FileSession() as db:
+                assert db.query(Booking).count() == 1
+        finally:
+            file_engine.dispose()
+
+    def test_expired_key_not_replayed(self, db_session):
+        """Test that keys past their TTL are not replayed."""
+        from app.models import IdempotencyKey
+
+        start = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        headers = {"Idempotency-Key": "retry-6"}
+        assert client.post("/bookings/", json=self._payload(start), headers=headers).status_code == 201
+        db_session.query(IdempotencyKey).update({"expires_at": int(time.time()) - 1})
+        db_session.commit()
+        idempotency_store.clear()
+
+        # The key is expired, so the request runs again and hits the existing booking
+        assert client.post("/bookings/", json=self._payload(start), headers=headers).status_code == 409
+
+
+# ============================================================================
+# BULK CANCEL
+# ============================================================================
+
+class TestBulkCancel:
+    """Test single-statement cancellation of many bookings."""
+
+    @staticmethod
+    def _create(room_id, start, user_name="Test User"):
+        response = client.post(
+            "/bookings/",
+            json={
+                "room_id": room_id,
+                "start_time": start.isoformat(),
+                "end_time": (start + timedelta(hours=1)).isoformat(),
+                "user_name": user_name
+            }
+        )
+        assert response.status_code == 201
+        return response.json()["id"]
+
+    def test_cancel_room_within_window(self):
+        """Test that only the room's bookings overlapping the window are canceled."""
+        base = (datetime.now(FINNISH_TZ) + timedelta(days=1)).replace(hour=8, minute=0, second=0, microsecond=0)
+        ids = [self._create("room-1", base + timedelta(hours=2 * i)) for i in range(4)]
+        other_room = self._create("room-2", base)
+
+        response = client.delete(
+            "/bookings/",
+            params={
+                "room_id": "room-1",
+                "from": (base + timedelta(hours=2, minutes=30)).isoformat(),
+                "to": (base + timedelta(hours=5)).isoformat(),
+            }
+        )
+        assert response.status_code == 200
+        assert response.json()["canceled"] == 2
+        assert sorted(response.json()["booking_ids"]) == sorted(ids[1:3])
+
+        remaining = [b["id"] for b in client.get("/bookings/room/room-1").json()["bookings"]]
+        assert remaining == [ids[0], ids[3]]
+        assert client.get(f"/bookings/{other_room}").status_code == 200
+
+    def test_cancel_by_user_across_rooms(self):
+        """Test that a user filter cancels the user's bookings in every room."""
+        base = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        self._create("room-1", base, "Leaving User")
+        self._create("room-2", base, "Leaving User")
+        kept = self._create("room-3", base, "Staying User")
+
+        response = client.delete("/bookings/", params={"user_name": "Leaving User"})
+        assert response.json()["canceled"] == 2
+        assert client.get(f"/bookings/{kept}").status_code == 200
+
+    def test_filter_required(self):
+        """Test that a bulk cancel without a room or user is rejected."""
+        self._create("room-1", datetime.now(FINNISH_TZ) + timedelta(days=1))
+        response = client.delete("/bookings/")
+        assert response.status_code == 400
+        assert client.get("/bookings/room/room-1").json()["count"] == 1
+
+    def test_no_matches(self):
+        """Test that a filter matching nothing cancels nothing."""
+        response = client.delete("/bookings/", params={"room_id": "empty-room"})
+        assert response.status_code == 200
+        assert response.json() == {"canceled": 0, "booking_ids": []}
+
+    def test_canceled_slots_released_in_index(self, db_session):
+        """Test that bulk cancel frees the slots in a loaded interval index."""
+        index = RoomIntervalIndex()
+        index.load(db_session)
+        service = BookingService(db_session, index=index)
+        start = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        data = BookingCreate(room_id="room-1", start_time=start, end_time=start + timedelta(hours=1), user_name="A")
+        service.create_booking(data)
+
+        assert len(service.cancel_bookings(room_id="room-1")) == 1
+        assert index.find_conflict("room-1", start, start + timedelta(hours=1)) is None
+        service.create_booking(data)
+
+
+# ============================================================================
+# MULTI-WORKER CHANGE FEED
+# ============================================================================
+
+class TestChangeFeed:
+    """Test keeping per-worker indexes and caches in step through booking_changes."""
+
+    @staticmethod
+    def _worker(db):
+        """Give a session its own index, listing cache and change feed, like a separate worker."""
+        from app.change_feed import ChangeFeed
+
+        index = RoomIntervalIndex()
+        cache = RoomListingCache(16)
+        feed = ChangeFeed(index, cache, retention_seconds=3600)
+        feed.start(db)
+        index.load(db)
+        return BookingService(db, index=index, listing_cache=cache, changes=feed), feed
+
+    @pytest.fixture
+    def workers(self):
+        from app.change_feed import configure_change_triggers
+
+        sessions = [TestingSessionLocal(), TestingSessionLocal()]
+        configure_change_triggers(sessions[0], enabled=True)
+        sessions[0].commit()
+        yield [self._worker(db) for db in sessions]
+        for db in sessions:
+            db.close()
+
+    @staticmethod
+    def _data(start, user_name="Worker"):
+        return BookingCreate(room_id="room-1", start_time=start, end_time=start + timedelta(hours=1), user_name=user_name)
+
+    def test_conflict_check_sees_other_worker(self, workers):
+        """Test that a write syncs with bookings committed by another worker first."""
+        (service_a, _), (service_b, _) = workers
+        start = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        service_a.create_booking(self._data(start))
+
+        with pytest.raises(BookingConflictError):
+            service_b.create_booking(self._data(start + timedelta(minutes=30)))
+
+    def test_cancel_propagates_to_index_and_cache(self, workers):
+        """Test that another worker's cancel frees the slot and invalidates cached listings."""
+        (service_a, _), (service_b, feed_b) = workers
+        start = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        booking = service_a.create_booking(self._data(start))
+        feed_b.sync(service_b.db)
+        assert service_b.index.find_conflict("room-1", start, start + timedelta(hours=1))
+        etag = service_b.listing_cache.lookup("room-1", ()).etag
+
+        service_a.cancel_booking(booking.id)
+        assert feed_b.sync(service_b.db) == 1
+        assert service_b.index.find_conflict("room-1", start, start + timedelta(hours=1)) is None
+        assert service_b.listing_cache.lookup("room-1", ()).etag != etag
+        service_b.create_booking(self._data(start))
+
+    def test_pruned_changes_trigger_reload(self, workers, db_session):
+        """Test that a worker which missed pruned changes rebuilds its index."""
+        from app.models import BookingChange
+
+        (service_a, _), (service_b, feed_b) = workers
+        start = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        service_a.create_booking(self._data(start))
+        service_a.create_booking(self._data(start + timedelta(hours=2)))
+        # Drop the first change row, as pruning would for a stalled worker
+        first_seq = db_session.query(BookingChange.seq).order_by(BookingChange.seq).first()[0]
+        db_session.query(BookingChange).filter(BookingChange.seq == first_seq).delete()
+        db_session.commit()
+
+        feed_b.sync(service_b.db)
+        assert len(service_b.index.overlapping("room-1", start, start + timedelta(hours=3))) == 2
+
+    def test_events_come_from_the_feed(self, workers):
+        """Test that in multi-worker mode subscribers get events for other workers' bookings."""
+        import asyncio
+        from app.events import RoomEventBroker
+
+        (service_a, _), (service_b, feed_b) = workers
+        broker = RoomEventBroker(queue_size=10)
+        feed_b.events = broker
+        start = datetime.now(FINNISH_TZ) + timedelta(days=1)
+
+        async def main():
+            subscription = broker.subscribe("room-1")
+            service_a.create_booking(self._data(start, user_name="Other worker"))
+            feed_b.sync(service_b.db)
+            return subscription.queue.get_nowait()
+
+        event = asyncio.run(main())
+        assert event.event == "created"
+        assert json.loads(event.data)["user_name"] == "Other worker"
+
+    def test_multi_worker_requires_shared_database(self):
+        """Test that multi-worker mode rejects the in-memory database and missing lock directory."""
+        with pytest.raises(ValueError, match="DATABASE_URL"):
+            Settings(multi_worker=True, room_lock_dir="/tmp/locks")
+        with pytest.raises(ValueError, match="ROOM_LOCK_DIR"):
+            Settings(multi_worker=True, database_url="sqlite:///./bookings.db")
+
+
+# ============================================================================
+# IN-MEMORY DATABASE SNAPSHOTS
+# ============================================================================
+
+class TestSnapshots:
+    """Test snapshotting the in-memory database to a file and restoring it."""
+
+    @staticmethod
+    def _memory_engine():
+        return create_engine(TEST_DATABASE_URL, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+
+    def test_snapshot_and_restore(self, tmp_path):
+        """Test that a restored database contains the snapshotted bookings."""
+        import asyncio
+        from app.snapshot import Snapshotter
+
+        start = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        for hour in range(3):
+            response = client.post("/bookings/", json={
+                "room_id": "room-1",
+                "start_time": (start + timedelta(hours=hour)).isoformat(),
+                "end_time": (start + timedelta(hours=hour, minutes=30)).isoformat(),
+                "user_name": "Snapshot",
+            })
+            assert response.status_code == 201
+
+        path = str(tmp_path / "snapshots" / "bookings.db")
+        assert asyncio.run(Snapshotter(engine, path).snapshot())
+
+        restored = self._memory_engine()
+        assert asyncio.run(Snapshotter(restored, path).restore())
+        with restored.connect() as conn:
+            assert conn.execute(text("SELECT COUNT(*) FROM bookings")).scalar() == 3
+
+    def test_unchanged_database_is_not_rewritten(self, tmp_path):
+        """Test that a snapshot is skipped until the database changes."""
+        import asyncio
+        from app.snapshot import Snapshotter
+
+        snapshotter = Snapshotter(engine, str(tmp_path / "bookings.db"))
+        assert asyncio.run(snapshotter.snapshot())
+        assert not asyncio.run(snapshotter.snapshot())
+
+        start = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        client.post("/bookings/", json={
+            "room_id": "room-1",
+            "start_time": start.isoformat(),
+            "end_time": (start + timedelta(hours=1)).isoformat(),
+            "user_name": "Snapshot",
+        })
+        assert asyncio.run(snapshotter.snapshot())
+
+    def test_missing_snapshot_starts_empty(self, tmp_path):
+        """Test that restoring without a snapshot file leaves the database alone."""
+        import asyncio
+        from app.snapshot import Snapshotter
+
+        assert not asyncio.run(Snapshotter(self._memory_engine(), str(tmp_path / "none.db")).restore())
+
+    def test_snapshot_waits_for_open_transaction(self, tmp_path):
+        """Test that a snapshot during an uncommitted write waits for it instead of rolling it back."""
+        import asyncio
+        from app.snapshot import Snapshotter
+
+        memory_engine = create_db_engine(Settings(database_url="sqlite:///:memory:"))
+        Base.metadata.create_all(bind=memory_engine)
+        MemorySessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=memory_engine)
+        path = str(tmp_path / "bookings.db")
+        start = datetime.now(FINNISH_TZ).replace(tzinfo=None) + timedelta(days=1)
+        try:
+            writer = MemorySessionLocal()
+            writer.add(Booking(room_id="room-1", start_time=start, end_time=start + timedelta(hours=1), user_name="Writer"))
+            writer.flush()
+
+            snapshot = threading.Thread(target=lambda: asyncio.run(Snapshotter(memory_engine, path).snapshot()))
+            snapshot.start()
+            snapshot.join(0.3)
+            assert snapshot.is_alive()
+
+            writer.commit()
+            writer.close()
+            snapshot.join(10)
+            assert not snapshot.is_alive()
+
+            with MemorySessionLocal() as db:
+                assert db.query(Booking).count() == 1
+            restored = self._memory_engine()
+            assert asyncio.run(Snapshotter(restored, path).restore())
+            with restored.connect() as conn:
+                assert conn.execute(text("SELECT COUNT(*) FROM bookings")).scalar() == 1
+        finally:
+            memory_engine.dispose()
+
+    def test_snapshot_path_requires_memory_database(self):
+        """Test that snapshots are rejected for a file-backed database."""
+        with pytest.raises(ValueError, match="SNAPSHOT_PATH"):
+            Settings(snapshot_path="/tmp/bookings.db", database_url="sqlite:///./bookings.db")
+
+
+# ============================================================================
+# ARCHIVING PAST BOOKINGS
+# ============================================================================
+
+class TestArchive:
+    """Test moving past bookings to bookings_archive and listing them on request."""
+
+    @staticmethod
+    def _add_past_bookings(db, count, days_ago=40):
+        """Insert bookings that ended long ago; the API refuses bookings in the past."""
+        start = datetime.now(FINNISH_TZ).replace(tzinfo=None, microsecond=0) - timedelta(days=days_ago)
+        for i in range(count):
+            db.add(Booking(
+                room_id="room-1",
+                start_time=start + timedelta(hours=i),
+                end_time=start + timedelta(hours=i, minutes=30),
+                user_name="History",
+            ))
+        db.commit()
+
+    @staticmethod
+    def _create_future_booking():
+        start = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        response = client.post("/bookings/", json={
+            "room_id": "room-1",
+            "start_time": start.isoformat(),
+            "end_time": (start + timedelta(hours=1)).isoformat(),
+            "user_name": "Future",
+        })
+        assert response.status_code == 201
+        return response.json()
+
+    def test_archive_moves_only_past_bookings(self, db_session):
+        """Test that bookings past the horizon move in chunks and recent ones stay."""
+        from app.archive import BookingArchiver
+        from app.models import BookingArchive
+
+        self._add_past_bookings(db_session, 5)
+        self._add_past_bookings(db_session, 1, days_ago=10)
+        future = self._create_future_booking()
+
+        archiver = BookingArchiver(timedelta(days=30), batch_size=2)
+        assert archiver.archive(db_session) == 5
+        assert archiver.archive(db_session) == 0
+
+        remaining = {booking.user_name for booking in db_session.query(Booking).all()}
+        assert db_session.query(Booking).count() == 2
+        assert remaining == {"History", "Future"}
+        assert db_session.query(BookingArchive).count() == 5
+        assert db_session.get(Booking, future["id"]) is not None
+
+    def test_archived_bookings_leave_the_index(self, db_session):
+        """Test that archiving removes bookings from the interval index."""
+        from app.archive import BookingArchiver
+
+        self._add_past_bookings(db_session, 1)
+        index = RoomIntervalIndex()
+        index.load(db_session)
+        start, end = db_session.query(Booking.start_time, Booking.end_time).one()
+        assert index.find_conflict("room-1", start, end)
+
+        BookingArchiver(timedelta(days=30), batch_size=10, index=index).archive(db_session)
+        assert index.find_conflict("room-1", start, end) is None
+
+    def test_listing_includes_history_on_request(self, db_session):
+        """Test that archived bookings are listed, in order and paginated, only with include_history."""
+        from app.archive import BookingArchiver
+
+        self._add_past_bookings(db_session, 3)
+        self._create_future_booking()
+        BookingArchiver(timedelta(days=30), batch_size=10).archive(db_session)
+
+        assert client.get("/bookings/room/room-1").json()["count"] == 1
+
+        first = client.get("/bookings/room/room-1", params={"include_history": True, "limit": 2}).json()
+        assert [b["user_name"] for b in first["bookings"]] == ["History", "History"]
+        second = client.get(
+            "/bookings/room/room-1",
+            params={"include_history": True, "limit": 2, "cursor": first["next_cursor"]},
+        ).json()
+        assert [b["user_name"] for b in second["bookings"]] == ["History", "Future"]
+        assert second["next_cursor"] is None
+
+    def test_archived_booking_can_be_fetched_but_not_canceled(self, db_session):
+        """Test that GET /bookings/{id} finds an archived booking and DELETE still reports 404."""
+        from app.archive import BookingArchiver
+
+        self._add_past_bookings(db_session, 1)
+        booking_id = db_session.query(Booking.id).scalar()
+        BookingArchiver(timedelta(days=30), batch_size=10).archive(db_session)
+
+        response = client.get(f"/bookings/{booking_id}")
+        assert response.status_code == 200
+        assert response.json()["user_name"] == "History"
+        assert client.delete(f"/bookings/{booking_id}").status_code == 404
+
+    def test_chunk_waits_for_room_lock(self, db_session):
+        """Test that a chunk is moved only once the writer holding its room's lock is done."""
+        from app.archive import BookingArchiver
+        from app.locks import RoomLockManager
+
+        self._add_past_bookings(db_session, 1)
+        locks = RoomLockManager(stripes=4)
+        archiver = BookingArchiver(timedelta(days=30), batch_size=10, locks=locks)
+        moved = []
+        with locks.lock("room-1"):
+            worker = threading.Thread(target=lambda: moved.append(archiver.archive(TestingSessionLocal())))
+            worker.start()
+            worker.join(0.3)
+            assert worker.is_alive()
+        worker.join(10)
+        assert moved == [1]
+
+    def test_archiving_is_off_by_default(self):
+        """Test that archiving only runs when ARCHIVE_INTERVAL_SECONDS is set."""
+        assert Settings().archive_interval_seconds == 0
+
+
+# ============================================================================
+# SERVER-SENT BOOKING EVENTS
+# ============================================================================
+
+class TestRoomEvents:
+    """Test pushing booking events to subscribers of a room."""
+
+    @staticmethod
+    def _booking_json(room_id="room-1", user_name="Live"):
+        start = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        return {
+            "room_id": room_id,
+            "start_time": start.isoformat(),
+            "end_time": (start + timedelta(hours=1)).isoformat(),
+            "user_name": user_name,
+        }
+
+    def test_create_and_cancel_reach_subscribers(self):
+        """Test that bookings made through the API are pushed to the room's subscribers only."""
+        import asyncio
+        from app.events import room_events
+
+        async def main():
+            subscription = room_events.subscribe("room-1")
+            try:
+                await asyncio.to_thread(client.post, "/bookings/", json=self._booking_json("room-2"))
+                created = await asyncio.to_thread(client.post, "/bookings/", json=self._booking_json())
+                await asyncio.to_thread(client.delete, f"/bookings/{created.json()['id']}")
+                return [await asyncio.wait_for(subscription.queue.get(), 5) for _ in range(2)], created.json()
+            finally:
+                room_events.unsubscribe(subscription)
+
+        events, booking = asyncio.run(main())
+        assert [event.event for event in events] == ["created", "canceled"]
+        assert all(json.loads(event.data)["id"] == booking["id"] for event in events)
+        assert json.loads(events[1].data)["user_name"] == "Live"
+        assert not room_events.has_subscribers("room-1")
+
+    def test_slow_subscriber_is_dropped_with_resync(self):
+        """Test that a full queue drops the subscriber and leaves only a resync event."""
+        import asyncio
+        from app.events import RESYNC, RoomEventBroker, event_stream
+
+        broker = RoomEventBroker(queue_size=2)
+
+        async def main():
+            stream = event_stream(broker, "room-1", heartbeat=5)
+            assert (await anext(stream)).startswith(b"retry:")
+            for i in range(3):
+                broker.publish("room-1", "created", json.dumps({"n": i}).encode())
+            assert not broker.has_subscribers("room-1")
+            return [chunk async for chunk in stream]
+
+        chunks = asyncio.run(main())
+        assert chunks == [f"event: {RESYNC}\ndata: {{}}\n\n".encode()]
+
+    def test_idle_stream_sends_heartbeats(self):
+        """Test that an idle stream sends keep-alive comments and unsubscribes when closed."""
+        import asyncio
+        from app.events import RoomEventBroker, event_stream
+
+        broker = RoomEventBroker(queue_size=10)
+
+        async def main():
+            stream = event_stream(broker, "room-1", heartbeat=0.01)
+            await anext(stream)
+            heartbeat = await anext(stream)
+            broker.publish("room-1", "canceled", b'{"id": "b1"}')
+            event = await anext(stream)
+            await stream.aclose()
+            return heartbeat, event
+
+        heartbeat, event = asyncio.run(main())
+        assert heartbeat == b": keep-alive\n\n"
+        assert event == b'event: canceled\ndata: {"id": "b1"}\n\n'
+        assert not broker.has_subscribers("room-1")
+
+
+# ============================================================================
+# UTILIZATION COUNTERS
+# ============================================================================
+
+class TestUtilization:
+    """Test the per-room, per-hour booked-time counters and the summary built from them."""
+
+    @staticmethod
+    def _day_start(days_ahead=2):
+        return datetime.now(FINNISH_TZ).replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=days_ahead)
+
+    @staticmethod
+    def _create(room_id, start, end, user_name="User 1"):
+        response = client.post("/bookings/", json={
+            "room_id": room_id,
+            "start_time": start.isoformat(),
+            "end_time": end.isoformat(),
+            "user_name": user_name,
+        })
+        assert response.status_code == 201
+        return response.json()
+
+    @staticmethod
+    def _counters(db):
+        from app.models import RoomUtilization
+
+        db.expire_all()
+        return {
+            (row.room_id, row.day, row.hour): row.booked_seconds
+            for row in db.query(RoomUtilization).all()
+            if row.booked_seconds
+        }
+
+    def test_create_and_cancel_update_counters(self, db_session):
+        """Test that a create adds its time per hour and a cancel takes it back."""
+        day = self._day_start()
+        booking = self._create("room-1", day + timedelta(hours=10, minutes=30), day + timedelta(hours=12))
+
+        assert self._counters(db_session) == {
+            ("room-1", day.date(), 10): 1800,
+            ("room-1", day.date(), 11): 3600,
+        }
+
+        assert client.delete(f"/bookings/{booking['id']}").status_code == 204
+        assert self._counters(db_session) == {}
+
+    def test_summary_by_day_and_hour_of_week(self):
+        """Test booked minutes and occupancy per day and per hour of week."""
+        day = self._day_start()
+        # Crosses midnight into the next day
+        self._create("room-1", day + timedelta(hours=23), day + timedelta(days=1, hours=1))
+        self._create("room-2", day + timedelta(hours=9), day + timedelta(hours=9, minutes=30))
+
+        response = client.get("/bookings/utilization", params={
+            "from": day.date().isoformat(),
+            "to": (day + timedelta(days=2)).date().isoformat(),
+            "room_id": ["room-1"],
+        })
+        assert response.status_code == 200
+        rooms = response.json()["rooms"]
+        assert [room["room_id"] for room in rooms] == ["room-1"]
+        summary = rooms[0]
+        assert summary["booked_minutes"] == 120
+        assert summary["occupancy_percent"] == round(100 * 2 / 48, 2)
+        assert [(d["day"], d["booked_minutes"]) for d in summary["by_day"]] == [
+            (day.date().isoformat(), 60),
+            ((day + timedelta(days=1)).date().isoformat(), 60),
+        ]
+        weekday = day.weekday()
+        assert [(h["weekday"], h["hour"], h["occupancy_percent"]) for h in summary["by_hour_of_week"]] == sorted([
+            (weekday, 23, 100.0),
+            ((weekday + 1) % 7, 0, 100.0),
+        ])
+
+        all_rooms = client.get("/bookings/utilization", params={
+            "from": day.date().isoformat(), "to": (day + timedelta(days=1)).date().isoformat(),
+        }).json()["rooms"]
+        assert {room["room_id"]: room["booked_minutes"] for room in all_rooms} == {"room-1": 60, "room-2": 30}
+
+    def test_summary_rejects_invalid_window(self):
+        """Test that an empty, reversed or too long window is rejected."""
+        day = self._day_start().date()
+        assert client.get("/bookings/utilization", params={
+            "from": day.isoformat(), "to": day.isoformat(),
+        }).status_code == 400
+        assert client.get("/bookings/utilization", params={
+            "from": day.isoformat(), "to": (day + timedelta(days=400)).isoformat(),
+        }).status_code == 400
+
+    def test_rebuild_matches_incremental_counters(self, db_session):
+        """Test that rebuilding from the bookings gives the counters maintained on every write."""
+        from app.utilization import rebuild_utilization
+
+        day = self._day_start()
+        self._create("room-1", day + timedelta(hours=8, minutes=15), day + timedelta(hours=9, minutes=45))
+        canceled = self._create("room-1", day + timedelta(hours=13), day + timedelta(hours=14))
+        self._create("room-2", day + timedelta(hours=8), day + timedelta(hours=10), user_name="Leaving User")
+        series = client.post("/bookings/recurring", json={
+            "room_id": "room-3",
+            "start_time": (day + timedelta(hours=15)).isoformat(),
+            "end_time": (day + timedelta(hours=16, minutes=20)).isoformat(),
+            "user_name": "User 2",
+            "recurrence": {"frequency": "daily", "count": 3},
+        })
+        assert series.status_code == 201
+        client.delete(f"/bookings/{canceled['id']}")
+        client.delete("/bookings/", params={"user_name": "Leaving User"})
+
+        incremental = self._counters(db_session)
+        assert incremental
+        rebuild_utilization(db_session)
+        assert self._counters(db_session) == incremental
+
+    def test_archiving_keeps_counters(self, db_session):
+        """Test that archived bookings still count, also after a rebuild."""
+        from app.archive import BookingArchiver
+        from app.utilization import rebuild_utilization
+
+        start = datetime.now(FINNISH_TZ).replace(tzinfo=None, minute=0, second=0, microsecond=0) - timedelta(days=40)
+        db_session.add(Booking(room_id="room-1", start_time=start, end_time=start + timedelta(hours=1), user_name="History"))
+        db_session.commit()
+        rebuild_utilization(db_session)
+        before = self._counters(db_session)
+        assert before == {("room-1", start.date(), start.hour): 3600}
+
+        BookingArchiver(timedelta(days=30), batch_size=10).archive(db_session)
+        assert self._counters(db_session) == before
+        rebuild_utilization(db_session)
+        assert self._counters(db_session) == before
+
+    def test_upsert_follows_the_dialect(self):
+        """Test that the counter upsert is built for the database's dialect, not only SQLite."""
+        from sqlalchemy.dialects import mysql, postgresql
+        from app.utilization import upsert_statement
+
+        postgres_sql = str(upsert_statement("postgresql").compile(dialect=postgresql.dialect()))
+        assert "ON CONFLICT (room_id, day, hour) DO UPDATE" in postgres_sql
+        mysql_sql = str(upsert_statement("mysql").compile(dialect=mysql.dialect()))
+        assert "ON DUPLICATE KEY UPDATE" in mysql_sql
+        assert upsert_statement("mssql") is None
+
+    def test_fallback_without_upsert(self, db_session, monkeypatch):
+        """Test that dialects without an upsert update existing counters and insert new ones."""
+        from app import utilization
+
+        monkeypatch.setattr(utilization, "upsert_statement", lambda dialect: None)
+        day = self._day_start()
+        first = self._create("room-1", day + timedelta(hours=10), day + timedelta(hours=10, minutes=30))
+        self._create("room-1", day + timedelta(hours=10, minutes=30), day + timedelta(hours=11, minutes=15))
+
+        assert self._counters(db_session) == {
+            ("room-1", day.date(), 10): 3600,
+            ("room-1", day.date(), 11): 900,
+        }
+        client.delete(f"/bookings/{first['id']}")
+        assert self._counters(db_session) == {
+            ("room-1", day.date(), 10): 1800,
+            ("room-1", day.date(), 11): 900,
+        }
+
+
+# ============================================================================
+# USER BOOKING LISTING
+# ============================================================================
+
+class TestUserBookings:
+    """Test listing one user's bookings across rooms."""
+
+    @staticmethod
+    def _create(room_id, start, user_name):
+        response = client.post("/bookings/", json={
+            "room_id": room_id,
+            "start_time": start.isoformat(),
+            "end_time": (start + timedelta(hours=1)).isoformat(),
+            "user_name": user_name,
+        })
+        assert response.status_code == 201
+        return response.json()
+
+    def test_lists_bookings_of_every_room_in_order(self):
+        """Test that a user's bookings in all rooms are listed by start time, and nobody else's."""
+        base = datetime.now(FINNISH_TZ) + timedelta(days=1)
+        later = self._create("room-2", base + timedelta(hours=3), "Matti Meikäläinen")
+        earlier = self._create("room-1", base, "Matti Meikäläinen")
+        self._create("room-1", base + timedelta(hours=1), "Someone Else")
+
+        response = client.get("/bookings/user/Matti Meikäläinen")
+        assert response.status_code == 200
+        data = response.json()
+        assert [b["id"] for b in data["bookings"]] == [earlier["id"], later["id"]]
+        assert data["count"] == 2
+        assert data["next_cursor"] is None
+        assert client.get("/bookings/user/Nobody").json()["count"] == 0
+
+    def test_window_and_pagination(self):
+        """Test that from/to narrow the listing and cursors walk through it."""
+        base = datetime.now(FINNISH_TZ).replace(microsecond=0) + timedelta(days=1)
+        ids = [self._create(f"room-{i}", base + timedelta(hours=2 * i), "Pager")["id"] for i in range(5)]
+
+        window = {"from": (base + timedelta(hours=2)).isoformat(), "to": (base + timedelta(hours=8)).isoformat()}
+        first = client.get("/bookings/user/Pager", params={**window, "limit": 2}).json()
+        assert [b["id"] for b in first["bookings"]] == ids[1:3]
+        second = client.get(
+            "/bookings/user/Pager", params={**window, "limit": 2, "cursor": first["next_cursor"]}
+        ).json()
+        assert [b["id"] for b in second["bookings"]] == ids[3:4]
+        assert second["next_cursor"] is None
+
+    def test_includes_archived_bookings_on_request(self, db_session):
+        """Test that archived bookings of the user are listed only with include_history."""
+        from app.archive import BookingArchiver
+
+        start = datetime.now(FINNISH_TZ).replace(tzinfo=None, microsecond=0) - timedelta(days=40)
+        db_session.add(Booking(room_id="room-9", start_time=start, end_time=start + timedelta(hours=1), user_name="Pager"))
+        db_session.commit()
+        BookingArchiver(timedelta(days=30), batch_size=10).archive(db_session)
+        self._create("room-1", datetime.now(FINNISH_TZ) + timedelta(days=1), "Pager")
+
+        assert client.get("/bookings/user/Pager").json()["count"] == 1
+        history = client.get("/bookings/user/Pager", params={"include_history": True}).json()
+        assert [b["room_id"] for b in history["bookings"]] == ["room-9", "room-1"]
+
+    def test_query_uses_user_index(self, db_session):
+        """Test that the user listing is an index search, not a scan of every room."""
+        from sqlalchemy import event
+
+        plans = []
+
+        def explain(conn, cursor, statement, parameters, *args):
+            if statement.lstrip().startswith("SELECT") and "user_name =" in statement:
+                plans.extend(row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters))
+
+        event.listen(engine, "before_cursor_execute", explain)
+        try:
+            service = BookingService(db_session)
+            service.list_user_bookings_page("Pager", 10, window_start=datetime.now(FINNISH_TZ))
+        finally:
+            event.remove(engine, "before_cursor_execute", explain)
+
+        assert plans
+        assert all("ix_bookings_user_time" in plan for plan in plans if plan.startswith(("SEARCH", "SCAN")))
+